@@ -1,7 +1,6 @@
-const { spawn } = require('child_process');
-const path = require('path');
 const Prediction = require('../models/Prediction');
 const externalApiService = require('../services/externalApiService');
+const { getPool } = require('../services/predictionPool');
 
 exports.getForecast = async (req, res) => {
     try {
@@ -30,7 +29,11 @@ exports.getForecast = async (req, res) => {
 
         for (let i = 0; i < 7; i++) { // Next 7 days
             batchInput.push({
+                // Workers with a temporal state (PREDICT_TEMPORAL_STATE) keep each location's rolling history;
+                // forecast days are scored against it without being recorded as observations
+                location: location || `${lat},${lon}`,
                 date: daily.time[i],
+                observed: false,
                 temp: daily.temperature_2m_max[i],
                 humidity: daily.relative_humidity_2m_mean[i] || 60, // Default if null
                 rainfall: daily.rain_sum[i] || daily.precipitation_sum[i] || 0,
@@ -38,49 +41,25 @@ exports.getForecast = async (req, res) => {
             });
         }
 
-        // 3. Call Python in Batch Mode
-        const pythonScriptPath = path.join(__dirname, '../../ml/predict.py');
+        // 3. Score the batch on a warm Python worker
         console.log(`[Forecast] Running batch prediction for ${batchInput.length} days`);
 
-        const pythonProcess = spawn('python', [
-            pythonScriptPath,
-            '--batch',
-            JSON.stringify(batchInput),
-            'Low' // Default risk for forecast
-        ]);
-
-        let dataString = '';
-        let errorString = '';
+        let forecastResults;
+        try {
+            // Default risk for forecast; the chart only needs disease and risk score
+            forecastResults = await getPool().predictBatch(batchInput, 'Low', 'minimal');
+        } catch (err) {
+            console.error(`[Forecast] Prediction worker failed: ${err.message}`);
+            return res.status(500).json({ message: 'Forecast generation failed', error: err.message });
+        }
 
-        pythonProcess.stdout.on('data', (data) => {
-            dataString += data.toString();
-        });
+        // Merge with input data for frontend chart
+        const finalData = forecastResults.map((pred, index) => ({
+            ...pred,
+            ...batchInput[index], // formatting date, temp, etc.
+        }));
 
-        pythonProcess.stderr.on('data', (data) => {
-            errorString += data.toString();
-        });
-
-        pythonProcess.on('close', (code) => {
-            if (code !== 0) {
-                console.error(`[Forecast] Python script exited with code ${code}: ${errorString}`);
-                return res.status(500).json({ message: 'Forecast generation failed', error: errorString });
-            }
-
-            try {
-                const forecastResults = JSON.parse(dataString);
-
-                // Merge with input data for frontend chart
-                const finalData = forecastResults.map((pred, index) => ({
-                    ...pred,
-                    ...batchInput[index], // formatting date, temp, etc.
-                }));
-
-                res.json(finalData);
-            } catch (err) {
-                console.error('[Forecast] JSON error:', err);
-                res.status(500).json({ message: 'Error processing forecast' });
-            }
-        });
+        res.json(finalData);
 
     } catch (error) {
         console.error('[Forecast] Error:', error);
@@ -112,71 +91,41 @@ exports.predictDisease = async (req, res) => {
             console.log('[Predict] Context fetch failed or skipped, defaulting to Low risk');
         }
 
-        // Path to python script
-        const pythonScriptPath = path.join(__dirname, '../../ml/predict.py');
-
-        // Call Python script
-        const pythonProcess = spawn('python', [
-            pythonScriptPath,
-            temperature,
-            humidity,
-            rainfall,
-            aqi,
-            location || 'Unknown',
-            riskLevel // Passing risk level
-        ]);
-
-        let dataString = '';
-        let errorString = '';
-
-        pythonProcess.stdout.on('data', (data) => {
-            dataString += data.toString();
-        });
-
-        pythonProcess.stderr.on('data', (data) => {
-            errorString += data.toString();
-        });
-
-        pythonProcess.on('close', async (code) => {
-            if (code !== 0) {
-                console.error(`[Predict] Python script exited with code ${code}: ${errorString}`);
-                return res.status(500).json({ message: 'Prediction failed', error: errorString });
-            }
+        // Score on a warm Python worker
+        let predictionResult;
+        try {
+            predictionResult = await getPool().predict({ temperature, humidity, rainfall, aqi, riskLevel });
+        } catch (err) {
+            console.error(`[Predict] Prediction worker failed: ${err.message}`);
+            return res.status(500).json({ message: 'Prediction failed', error: err.message });
+        }
+        console.log("[Predict] Python result:", predictionResult);
 
+        // Save to database
+        if (user_id) {
             try {
-                const predictionResult = JSON.parse(dataString);
-                console.log("[Predict] Python result:", predictionResult);
-
-                // Save to database
-                if (user_id) {
-                    try {
-                        const savedPrediction = await Prediction.create({
-                            user_id,
-                            temperature,
-                            humidity,
-                            rainfall,
-                            aqi,
-                            location: location || 'Unknown',
-                            predicted_disease: predictionResult.disease,
-                            accuracy: predictionResult.accuracy
-                        });
-                        console.log(`[Predict] Saved to DB. Insert ID: ${savedPrediction}`);
-                    } catch (dbError) {
-                        console.error("[Predict] DB Save Error:", dbError);
-                        // Using console.error to make sure it shows up in logs
-                    }
-                } else {
-                    console.log("[Predict] No User ID, skipping DB save.");
-                }
-
-                // Attach risk context to response
-                predictionResult.risk_context = riskLevel;
-                res.json(predictionResult);
-            } catch (err) {
-                console.error('[Predict] JSON Parse/Process Error:', err);
-                res.status(500).json({ message: 'Error processing prediction result' });
+                const savedPrediction = await Prediction.create({
+                    user_id,
+                    temperature,
+                    humidity,
+                    rainfall,
+                    aqi,
+                    location: location || 'Unknown',
+                    predicted_disease: predictionResult.disease,
+                    accuracy: predictionResult.accuracy
+                });
+                console.log(`[Predict] Saved to DB. Insert ID: ${savedPrediction}`);
+            } catch (dbError) {
+                console.error("[Predict] DB Save Error:", dbError);
+                // Using console.error to make sure it shows up in logs
             }
-        });
+        } else {
+            console.log("[Predict] No User ID, skipping DB save.");
+        }
+
+        // Attach risk context to response
+        predictionResult.risk_context = riskLevel;
+        res.json(predictionResult);
 
     } catch (error) {
         console.error('[Predict] Server Error:', error);
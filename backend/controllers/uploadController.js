@@ -12,7 +12,12 @@ exports.uploadDataset = (req, res) => {
         // Trigger model retraining
         // In a real app, this should be a background job
         const trainScriptPath = path.join(__dirname, '../../ml/train_model.py');
-        const trainProcess = spawn('python', [trainScriptPath, filePath]);
+        const trainArgs = [trainScriptPath, filePath];
+        // mode=incremental folds the upload into the saved models instead of a full retrain
+        if (req.body && req.body.mode === 'incremental') {
+            trainArgs.push('--incremental');
+        }
+        const trainProcess = spawn('python', trainArgs);
 
         let dataString = '';
 
@@ -16,10 +16,14 @@ const storage = multer.diskStorage({
 });
 
 const fileFilter = (req, file, cb) => {
-    if (file.mimetype === 'text/csv' || file.mimetype === 'application/vnd.ms-excel') {
+    const ext = path.extname(file.originalname).toLowerCase();
+    if (file.mimetype === 'text/csv' || file.mimetype === 'application/vnd.ms-excel' || ext === '.csv') {
+        cb(null, true);
+    } else if (ext === '.parquet' || ext === '.pq') {
+        // Parquet uploads usually arrive as application/octet-stream
         cb(null, true);
     } else {
-        cb(new Error('Only CSV files are allowed'), false);
+        cb(new Error('Only CSV or Parquet files are allowed'), false);
     }
 };
 
@@ -24,7 +24,7 @@ router.post('/outbreak-analysis', auth, async (req, res) => {
             aqi: parseFloat(aqi)
         };
 
-        const analysis = analyzeOutbreakRisk(forecastData || [], currentConditions);
+        const analysis = await analyzeOutbreakRisk(forecastData || [], currentConditions);
         console.log(`[Outbreak] Analysis complete. Threat: ${analysis.overallThreat}, Warnings: ${analysis.totalWarnings}`);
         res.json(analysis);
     } catch (error) {
@@ -1,167 +1,109 @@
-const axios = require('axios');
+const { getPool } = require('./predictionPool');
+
+// ==================== DISEASE PROFILES ====================
+// Outbreak thresholds, risk multipliers and peak seasons live in ml/rules.py
+// (OUTBREAK_THRESHOLDS) and are applied by the vectorized outbreak scorer in
+// ml/predict.py; this table only describes each disease for the UI.
+const DISEASE_PROFILES = {
+    'Malaria': { incubation: '10-15 days', vector: 'Anopheles mosquito', transmission: 'Vector-borne' },
+    'Dengue': { incubation: '4-10 days', vector: 'Aedes aegypti', transmission: 'Vector-borne' },
+    'Typhoid': { incubation: '6-30 days', vector: 'Contaminated water/food', transmission: 'Waterborne' },
+    'Cholera': { incubation: '2-5 days', vector: 'Contaminated water', transmission: 'Waterborne' },
+    'Asthma': { incubation: 'Immediate', vector: 'Airborne pollutants', transmission: 'Environmental' },
+    'Viral Fever': { incubation: '1-5 days', vector: 'Person-to-person', transmission: 'Airborne/Contact' },
+    'Heat Stroke': { incubation: 'Immediate', vector: 'Extreme heat', transmission: 'Environmental' }
+};
 
-// ==================== DISEASE OUTBREAK THRESHOLDS ====================
-const OUTBREAK_THRESHOLDS = {
-    'Malaria': {
-        tempRange: [25, 40], humidityMin: 65, rainfallMin: 80,
-        riskMultiplier: 1.3, incubation: '10-15 days',
-        vector: 'Anopheles mosquito', transmission: 'Vector-borne',
-        seasonalPeak: [6, 7, 8, 9, 10] // June - October
-    },
-    'Dengue': {
-        tempRange: [25, 38], humidityMin: 60, rainfallMin: 50,
-        riskMultiplier: 1.4, incubation: '4-10 days',
-        vector: 'Aedes aegypti', transmission: 'Vector-borne',
-        seasonalPeak: [7, 8, 9, 10, 11]
-    },
-    'Typhoid': {
-        tempRange: [20, 40], humidityMin: 50, rainfallMin: 150,
-        riskMultiplier: 1.2, incubation: '6-30 days',
-        vector: 'Contaminated water/food', transmission: 'Waterborne',
-        seasonalPeak: [6, 7, 8, 9]
-    },
-    'Cholera': {
-        tempRange: [20, 42], humidityMin: 60, rainfallMin: 200,
-        riskMultiplier: 1.5, incubation: '2-5 days',
-        vector: 'Contaminated water', transmission: 'Waterborne',
-        seasonalPeak: [6, 7, 8, 9]
-    },
-    'Asthma': {
-        tempRange: [0, 50], humidityMin: 0, rainfallMin: 0, aqiMin: 120,
-        riskMultiplier: 1.1, incubation: 'Immediate',
-        vector: 'Airborne pollutants', transmission: 'Environmental',
-        seasonalPeak: [10, 11, 12, 1, 2]
-    },
-    'Viral Fever': {
-        tempRange: [0, 20, 35, 50], humidityMin: 40, rainfallMin: 0,
-        riskMultiplier: 1.0, incubation: '1-5 days',
-        vector: 'Person-to-person', transmission: 'Airborne/Contact',
-        seasonalPeak: [11, 12, 1, 2, 3]
-    },
-    'Heat Stroke': {
-        tempRange: [38, 55], humidityMin: 0, rainfallMin: 0,
-        riskMultiplier: 1.6, incubation: 'Immediate',
-        vector: 'Extreme heat', transmission: 'Environmental',
-        seasonalPeak: [3, 4, 5, 6]
-    }
+const ALERT_COLORS = {
+    'CRITICAL': '#dc2626', 'HIGH': '#ef4444', 'ELEVATED': '#f59e0b', 'ADVISORY': '#3b82f6', 'Normal': '#10b981'
+};
+
+const TRIGGER_TEXT = {
+    temperature: (v) => `Temperature ${v}°C within risk range`,
+    humidity: (v) => `Humidity ${v}% exceeds outbreak threshold`,
+    rainfall: (v) => `Rainfall ${v}mm exceeds outbreak threshold`,
+    aqi: (v) => `AQI ${v} exceeds outbreak threshold`
 };
 
 // ==================== OUTBREAK ANALYSIS ENGINE ====================
-function analyzeOutbreakRisk(weatherForecast, currentConditions) {
+// Today's conditions are day 0 of the horizon, followed by the forecast days;
+// the Python scorer ranks each disease by its worst day and the longest run
+// of consecutive days meeting every threshold.
+async function analyzeOutbreakRisk(weatherForecast, currentConditions) {
     const today = new Date();
     const currentMonth = today.getMonth() + 1;
 
+    const days = [
+        { date: 'Today', temp: currentConditions.temperature, humidity: currentConditions.humidity,
+            rainfall: currentConditions.rainfall, aqi: currentConditions.aqi, month: currentMonth },
+        ...(weatherForecast || []).map((day, index) => ({
+            date: day.date || `Day ${index + 1}`,
+            temp: day.temp,
+            humidity: day.humidity,
+            rainfall: day.rainfall,
+            // Forecasts rarely carry AQI; assume today's persists
+            aqi: day.aqi ?? currentConditions.aqi,
+            month: day.date ? parseInt(String(day.date).slice(5, 7), 10) || currentMonth : currentMonth
+        }))
+    ];
+
+    const report = await getPool().outbreak([days.map((d) => [d.temp, d.humidity, d.rainfall, d.aqi])], {
+        months: [days.map((d) => d.month)],
+        minScore: 0,
+        timeline: true
+    });
+
     const warnings = [];
-    const timeline = [];
     const trendData = [];
-
-    for (const [disease, thresholds] of Object.entries(OUTBREAK_THRESHOLDS)) {
-        let riskScore = 0;
-        let triggers = [];
-        const isSeasonal = thresholds.seasonalPeak.includes(currentMonth);
-
-        // Current conditions analysis
-        const temp = currentConditions.temperature;
-        const hum = currentConditions.humidity;
-        const rain = currentConditions.rainfall;
-        const aqi = currentConditions.aqi;
-
-        // Temperature match
-        if (temp >= thresholds.tempRange[0] && temp <= thresholds.tempRange[1]) {
-            riskScore += 20;
-            triggers.push(`Temperature ${temp}°C within risk range`);
-        }
-
-        // Humidity match
-        if (hum >= thresholds.humidityMin) {
-            riskScore += 15;
-            triggers.push(`Humidity ${hum}% exceeds threshold (${thresholds.humidityMin}%)`);
-        }
-
-        // Rainfall match
-        if (rain >= thresholds.rainfallMin && thresholds.rainfallMin > 0) {
-            riskScore += 20;
-            triggers.push(`Rainfall ${rain}mm exceeds threshold (${thresholds.rainfallMin}mm)`);
-        }
-
-        // AQI match (for respiratory diseases)
-        if (thresholds.aqiMin && aqi >= thresholds.aqiMin) {
-            riskScore += 25;
-            triggers.push(`AQI ${aqi} exceeds threshold (${thresholds.aqiMin})`);
-        }
-
-        // Seasonal boost
-        if (isSeasonal) {
-            riskScore += 15;
-            triggers.push(`Currently in peak season for ${disease}`);
-        }
-
-        // Apply multiplier
-        riskScore = Math.min(100, Math.round(riskScore * thresholds.riskMultiplier));
-
-        // Determine alert level
-        let alertLevel = 'Normal';
-        let alertColor = '#10b981';
-        if (riskScore >= 75) { alertLevel = 'CRITICAL'; alertColor = '#dc2626'; }
-        else if (riskScore >= 55) { alertLevel = 'HIGH'; alertColor = '#ef4444'; }
-        else if (riskScore >= 35) { alertLevel = 'ELEVATED'; alertColor = '#f59e0b'; }
-        else if (riskScore >= 15) { alertLevel = 'ADVISORY'; alertColor = '#3b82f6'; }
-
-        // Build warning object
-        if (riskScore >= 15) {
+    for (const w of report.warnings) {
+        const profile = DISEASE_PROFILES[w.disease] || {};
+        const peak = days[w.peak_day];
+        const triggers = w.triggers.map((feature) => TRIGGER_TEXT[feature](w.conditions[feature]));
+        if (w.seasonal) triggers.push(`${peak.date} falls in peak season for ${w.disease}`);
+        if (w.run_days > 1) triggers.push(`${w.run_days} consecutive days meet every threshold from ${days[w.run_start].date}`);
+        triggers.push(`Ensemble probability ${w.probability}% on ${peak.date}`);
+
+        if (w.risk_score >= 15) {
             warnings.push({
-                disease,
-                riskScore,
-                alertLevel,
-                alertColor,
+                disease: w.disease,
+                riskScore: w.risk_score,
+                alertLevel: w.alert_level,
+                alertColor: ALERT_COLORS[w.alert_level],
                 triggers,
-                incubation: thresholds.incubation,
-                vector: thresholds.vector,
-                transmission: thresholds.transmission,
-                isSeasonal,
-                recommendation: getRecommendation(disease, alertLevel)
+                incubation: profile.incubation,
+                vector: profile.vector,
+                transmission: profile.transmission,
+                isSeasonal: w.seasonal,
+                peakDay: peak.date,
+                runDays: w.run_days,
+                recommendation: getRecommendation(w.disease, w.alert_level)
             });
         }
 
-        // Add to trend data
         trendData.push({
-            disease,
-            riskScore,
-            alertLevel,
-            isSeasonal
+            disease: w.disease,
+            riskScore: w.risk_score,
+            alertLevel: w.alert_level,
+            isSeasonal: w.seasonal
         });
     }
 
     // Forecast-based timeline (if weather forecast available)
-    if (weatherForecast && weatherForecast.length > 0) {
-        weatherForecast.forEach((day, index) => {
-            const dayRisks = {};
-            for (const [disease, thresholds] of Object.entries(OUTBREAK_THRESHOLDS)) {
-                let dayScore = 0;
-                if (day.temp >= thresholds.tempRange[0] && day.temp <= thresholds.tempRange[1]) dayScore += 25;
-                if (day.humidity >= thresholds.humidityMin) dayScore += 20;
-                if (day.rainfall >= thresholds.rainfallMin && thresholds.rainfallMin > 0) dayScore += 25;
-                dayScore = Math.min(100, Math.round(dayScore * thresholds.riskMultiplier));
-                dayRisks[disease] = dayScore;
-            }
-
-            const topDisease = Object.entries(dayRisks).sort((a, b) => b[1] - a[1])[0];
-            timeline.push({
-                date: day.date || `Day ${index + 1}`,
-                risks: dayRisks,
-                topDisease: topDisease[0],
-                topScore: topDisease[1],
-                temp: day.temp,
-                humidity: day.humidity,
-                rainfall: day.rainfall
-            });
-        });
-    }
-
-    // Sort warnings by risk score (highest first)
-    warnings.sort((a, b) => b.riskScore - a.riskScore);
-
-    // Generate overall threat level
+    const timeline = days.slice(1).map((day, index) => {
+        const dayRisks = report.timeline[0][index + 1];
+        const topDisease = Object.entries(dayRisks).sort((a, b) => b[1] - a[1])[0];
+        return {
+            date: day.date,
+            risks: dayRisks,
+            topDisease: topDisease[0],
+            topScore: topDisease[1],
+            temp: day.temp,
+            humidity: day.humidity,
+            rainfall: day.rainfall
+        };
+    });
+
+    // Warnings arrive ranked by risk score (highest first)
     const maxRisk = warnings.length > 0 ? warnings[0].riskScore : 0;
     let overallThreat = 'LOW';
     if (maxRisk >= 75) overallThreat = 'CRITICAL';
@@ -0,0 +1,154 @@
+const { spawn } = require('child_process');
+const path = require('path');
+const os = require('os');
+
+// ==================== PYTHON PREDICTION WORKER POOL ====================
+// Keeps N long-running `predict.py --serve` processes alive so each request
+// reuses an interpreter that already has numpy/sklearn imported and the
+// ensemble unpickled, instead of paying that cold start on every call.
+
+const SCRIPT_PATH = path.join(__dirname, '../../ml/predict.py');
+const PYTHON_BIN = process.env.PYTHON_BIN || 'python';
+const POOL_SIZE = parseInt(process.env.PREDICT_WORKERS, 10) || Math.min(4, os.cpus().length);
+const REQUEST_TIMEOUT_MS = parseInt(process.env.PREDICT_TIMEOUT_MS, 10) || 30000;
+// 'fast' scores with the distilled lookup grid (train_model.py --distill); 'cascade'
+// consults the SVM only for rows the cheaper members leave uncertain
+const ENGINE = process.env.PREDICT_ENGINE || 'full';
+const RESTART_DELAY_MS = 1000;
+
+class PredictionWorker {
+    constructor(index, onExit) {
+        this.index = index;
+        this.pending = new Map();
+        this.buffer = '';
+        this.stderr = '';
+        this.alive = true;
+        this.process = spawn(PYTHON_BIN, [SCRIPT_PATH, '--serve']);
+
+        this.process.stdout.on('data', (data) => this.onData(data));
+        this.process.stderr.on('data', (data) => {
+            // Keep only the tail so a noisy worker cannot grow memory unbounded
+            this.stderr = (this.stderr + data.toString()).slice(-4000);
+        });
+        this.process.on('error', (err) => this.fail(err));
+        this.process.stdin.on('error', (err) => this.fail(err));
+        this.process.on('close', (code) => {
+            this.alive = false;
+            this.fail(new Error(`Prediction worker exited with code ${code}: ${this.stderr}`));
+            onExit(this);
+        });
+    }
+
+    onData(data) {
+        this.buffer += data.toString();
+        let newline;
+        while ((newline = this.buffer.indexOf('\n')) >= 0) {
+            const line = this.buffer.slice(0, newline).trim();
+            this.buffer = this.buffer.slice(newline + 1);
+            if (!line) continue;
+
+            let response;
+            try {
+                response = JSON.parse(line);
+            } catch (err) {
+                console.error(`[PredictionPool] Worker ${this.index} sent invalid JSON:`, line);
+                continue;
+            }
+
+            const entry = this.pending.get(response.id);
+            if (!entry) continue;
+            this.pending.delete(response.id);
+            clearTimeout(entry.timer);
+
+            if (response.error) {
+                entry.reject(new Error(response.error));
+            } else if (response.result && response.result.error) {
+                entry.reject(new Error(response.result.error));
+            } else {
+                entry.resolve(response.result);
+            }
+        }
+    }
+
+    send(id, request) {
+        return new Promise((resolve, reject) => {
+            const timer = setTimeout(() => {
+                this.pending.delete(id);
+                reject(new Error(`Prediction request ${id} timed out after ${REQUEST_TIMEOUT_MS}ms`));
+            }, REQUEST_TIMEOUT_MS);
+            this.pending.set(id, { resolve, reject, timer });
+            this.process.stdin.write(JSON.stringify({ id, ...request }) + '\n');
+        });
+    }
+
+    fail(err) {
+        for (const entry of this.pending.values()) {
+            clearTimeout(entry.timer);
+            entry.reject(err);
+        }
+        this.pending.clear();
+    }
+}
+
+class PredictionPool {
+    constructor(size = POOL_SIZE) {
+        this.size = size;
+        this.nextId = 1;
+        this.workers = [];
+        for (let i = 0; i < size; i++) {
+            this.workers.push(this.spawnWorker(i));
+        }
+    }
+
+    spawnWorker(index) {
+        return new PredictionWorker(index, (dead) => {
+            console.error(`[PredictionPool] Worker ${dead.index} exited, restarting`);
+            // Back off briefly so a broken Python setup does not spin in a respawn loop
+            setTimeout(() => {
+                if (this.workers[dead.index] === dead) {
+                    this.workers[dead.index] = this.spawnWorker(dead.index);
+                }
+            }, RESTART_DELAY_MS);
+        });
+    }
+
+    // Requests are pipelined: pick the worker with the fewest in-flight requests
+    request(payload) {
+        const alive = this.workers.filter((w) => w.alive);
+        if (alive.length === 0) {
+            return Promise.reject(new Error('No prediction workers available'));
+        }
+        const worker = alive.reduce((best, w) => (w.pending.size < best.pending.size ? w : best));
+        return worker.send(this.nextId++, payload);
+    }
+
+    // detail: 'minimal' | 'standard' | 'full' (full adds the explainability block)
+    predict({ temperature, humidity, rainfall, aqi, riskLevel = 'Low', detail = 'full' }) {
+        return this.request({ op: 'predict', temperature, humidity, rainfall, aqi, risk_level: riskLevel, engine: ENGINE, detail });
+    }
+
+    predictBatch(items, riskLevel = 'Low', detail = 'standard') {
+        return this.request({ op: 'batch', items, risk_level: riskLevel, engine: ENGINE, detail });
+    }
+
+    // forecast: [location][day][temperature, humidity, rainfall, aqi]; resolves to ranked outbreak warnings
+    outbreak(forecast, { locations, dates, months, riskLevel = 'Low', minScore, top, timeline = false } = {}) {
+        return this.request({
+            op: 'outbreak', forecast, locations, dates, months, risk_level: riskLevel, engine: ENGINE,
+            min_score: minScore, top, timeline
+        });
+    }
+}
+
+let pool = null;
+
+// Lazily created so scripts that only require the controllers do not spawn Python
+const getPool = () => {
+    if (!pool) {
+        pool = new PredictionPool();
+        console.log(`[PredictionPool] Started ${pool.size} prediction workers`);
+    }
+    return pool;
+};
+
+module.exports = { getPool, PredictionPool };
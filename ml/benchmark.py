@@ -0,0 +1,297 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Measure the scoring work itself, not result-cache lookups
+os.environ['PREDICT_CACHE_SIZE'] = '0'
+
+import numpy as np
+import sklearn
+
+import predict
+from model_registry import ModelRegistry
+from result_cache import ResultCache
+from rules import FEATURES, PREDICTION_RULES
+from serving_artifacts import load_artifact, resolve_artifact
+from train_model import create_probabilistic_data
+
+# ==================== BENCHMARK SUITE ====================
+# Times the prediction and training pipelines and compares the results with a
+# stored baseline. Each case reports the median of its runs; a case regresses
+# when its median exceeds the baseline's by more than its threshold.
+#
+#   python benchmark.py --save-baseline            # record benchmark_baseline.json
+#   python benchmark.py --threshold 0.25           # compare; exit 1 on regression
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(ML_DIR, 'benchmark_baseline.json')
+DEFAULT_THRESHOLD = 0.2
+GROUPS = ('latency', 'batch', 'models', 'rules', 'generator', 'training')
+
+BATCH_SIZES = (7, 1000, 100000)
+GENERATOR_SIZES = (5000, 50000, 500000)
+TRAINING_SIZES = (2000, 5000)
+QUICK_BATCH_SIZES = (7, 1000)
+# Outbreak early warning: (locations, days), e.g. every district over a 16-day forecast
+OUTBREAK_SHAPE = (700, 16)
+QUICK_OUTBREAK_SHAPE = (100, 7)
+QUICK_GENERATOR_SIZES = (5000, 50000)
+QUICK_TRAINING_SIZES = (2000,)
+
+SAMPLE_INPUT = (32, 85, 120, 90)
+
+
+class Case(object):
+    """One timed operation; ``run`` is called ``repeat`` times after ``warmup`` untimed calls."""
+
+    def __init__(self, name, group, run, rows=None, repeat=5, warmup=1):
+        self.name = name
+        self.group = group
+        self.run = run
+        self.rows = rows
+        self.repeat = repeat
+        self.warmup = warmup
+
+    def measure(self):
+        for _ in range(self.warmup):
+            self.run()
+        runs = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            self.run()
+            runs.append(time.perf_counter() - start)
+        result = {'group': self.group, 'median_s': statistics.median(runs), 'min_s': min(runs),
+                  'runs': [round(r, 6) for r in runs]}
+        if self.rows:
+            result['rows'] = self.rows
+            result['rows_per_s'] = round(self.rows / result['median_s'], 1)
+        return result
+
+
+def random_features(n, seed=0):
+    """Climate inputs spread over the realistic range of every feature."""
+    rng = np.random.default_rng(seed)
+    return rng.uniform([5, 10, 0, 10], [48, 100, 400, 400], size=(n, len(FEATURES)))
+
+
+def _items(features):
+    return [{'temp': t, 'humidity': h, 'rainfall': r, 'aqi': a, 'date': str(i)}
+            for i, (t, h, r, a) in enumerate(features.tolist())]
+
+
+def _fresh_registry():
+    predict.registry = ModelRegistry(loader=load_artifact, resolve=resolve_artifact)
+
+
+def latency_cases(quick):
+    python = [sys.executable, os.path.join(ML_DIR, 'predict.py')] + [str(v) for v in SAMPLE_INPUT] + ['X', 'Low']
+    cached = ResultCache(max_entries=16)
+
+    def cold():
+        _fresh_registry()
+        predict.calculate_risk(*SAMPLE_INPUT)
+
+    def cached_call():
+        original, predict.result_cache = predict.result_cache, cached
+        try:
+            predict.calculate_risk(*SAMPLE_INPUT)
+        finally:
+            predict.result_cache = original
+
+    return [
+        # Interpreter start-up, imports and model loads: the old spawn-per-request cost
+        Case('calculate_risk.cold_process', 'latency',
+             lambda: subprocess.run(python, check=True, capture_output=True), repeat=3 if quick else 5, warmup=0),
+        Case('calculate_risk.cold', 'latency', cold, repeat=3, warmup=0),
+        Case('calculate_risk.warm', 'latency', lambda: predict.calculate_risk(*SAMPLE_INPUT), repeat=20),
+        Case('calculate_risk.warm_minimal', 'latency',
+             lambda: predict.calculate_risk(*SAMPLE_INPUT, detail='minimal'), repeat=20),
+        Case('calculate_risk.cached', 'latency', cached_call, repeat=50)
+    ]
+
+
+def batch_cases(quick):
+    cases = []
+    for n in (QUICK_BATCH_SIZES if quick else BATCH_SIZES):
+        items = _items(random_features(n))
+        repeat = 5 if n <= 1000 else 1
+        cases.append(Case(f'batch.standard_{n}', 'batch', lambda items=items: predict.predict_batch(items),
+                          rows=n, repeat=repeat))
+        cases.append(Case(f'batch.cascade_{n}', 'batch',
+                          lambda items=items: predict.predict_batch(items, engine='cascade'), rows=n, repeat=repeat))
+        if n <= 1000:
+            cases.append(Case(f'batch.full_{n}', 'batch',
+                              lambda items=items: predict.predict_batch(items, detail='full'), rows=n, repeat=repeat))
+    locations, days = QUICK_OUTBREAK_SHAPE if quick else OUTBREAK_SHAPE
+    forecast = random_features(locations * days).reshape(locations, days, -1)
+    cases.append(Case(f'batch.outbreak_{locations}x{days}', 'batch',
+                      lambda: predict.outbreak_report(forecast, months=7), rows=locations * days, repeat=3))
+    return cases
+
+
+def model_cases(quick):
+    X = random_features(1000)
+    cases = []
+    for name, mpath in predict.ENSEMBLE_MEMBERS:
+        if os.path.exists(mpath):
+            model = predict.registry.get(mpath)
+            key = name.lower().replace(' ', '_')
+            cases.append(Case(f'predict_proba.{key}_1000', 'models', lambda model=model: model.predict_proba(X),
+                              rows=len(X)))
+    return cases
+
+
+def rule_cases(quick):
+    X = random_features(100000)
+    sample = random_features(1000)
+    scores = predict.score_features(sample)
+    results = predict.build_results(scores, detail='full')
+    return [
+        Case('rules.prediction_100000', 'rules', lambda: PREDICTION_RULES(X), rows=len(X)),
+        Case('explain.scores_1000', 'rules', lambda: predict.explain_scores(scores), rows=len(sample)),
+        Case('explain.payload_1000', 'rules', lambda: predict.build_results(scores, detail='full'),
+             rows=len(sample)),
+        Case('serialize.json_1000', 'rules', lambda: json.dumps(results), rows=len(sample)),
+        Case('serialize.encoder_1000', 'rules', lambda: predict.encoder.lines(results), rows=len(sample))
+    ]
+
+
+def generator_cases(quick):
+    return [Case(f'generator.rows_{n}', 'generator', lambda n=n: create_probabilistic_data(n), rows=n,
+                 repeat=3 if n <= 50000 else 1)
+            for n in (QUICK_GENERATOR_SIZES if quick else GENERATOR_SIZES)]
+
+
+def training_cases(quick):
+    """Full retrains on synthetic datasets, run in a scratch copy of ml/ so live models are untouched."""
+    workdir = tempfile.mkdtemp(prefix='bench_train_')
+    for path in glob.glob(os.path.join(ML_DIR, '*.py')):
+        shutil.copy(path, workdir)
+
+    cases = []
+    for n in (QUICK_TRAINING_SIZES if quick else TRAINING_SIZES):
+        dataset = os.path.join(workdir, f'synthetic_{n}.csv')
+        create_probabilistic_data(n).to_csv(dataset, index=False)
+        command = [sys.executable, os.path.join(workdir, 'train_model.py'), dataset, '--max-rows', str(n)]
+        cases.append(Case(f'train_models.rows_{n}', 'training',
+                          lambda command=command: subprocess.run(command, check=True, capture_output=True, cwd=workdir),
+                          rows=n, repeat=1, warmup=0))
+    return cases, workdir
+
+
+def run_benchmarks(groups=GROUPS, quick=False, log=print):
+    builders = {'latency': latency_cases, 'batch': batch_cases, 'models': model_cases,
+                'rules': rule_cases, 'generator': generator_cases}
+    results = {}
+    workdir = None
+    try:
+        for group in groups:
+            if group == 'training':
+                cases, workdir = training_cases(quick)
+            else:
+                cases = builders[group](quick)
+            for case in cases:
+                results[case.name] = case.measure()
+                line = f"  {case.name:38s} {results[case.name]['median_s'] * 1e3:12.2f} ms"
+                if case.rows:
+                    line += f"  {results[case.name]['rows_per_s']:>14,.0f} rows/s"
+                log(line)
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'quick': quick
+        },
+        'results': results
+    }
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD, case_thresholds=None):
+    """Per-case comparison rows and the names of cases slower than baseline * (1 + threshold)."""
+    case_thresholds = case_thresholds or {}
+    rows, regressions = [], []
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        limit = case_thresholds.get(name, threshold)
+        ratio = result['median_s'] / base['median_s'] if base['median_s'] > 0 else float('inf')
+        regressed = ratio > 1 + limit
+        rows.append({'case': name, 'baseline_s': base['median_s'], 'current_s': result['median_s'],
+                     'ratio': round(ratio, 3), 'threshold': limit, 'regressed': regressed})
+        if regressed:
+            regressions.append(name)
+    return rows, regressions
+
+
+def _parse_case_thresholds(values):
+    thresholds = {}
+    for value in values or []:
+        name, _, limit = value.partition('=')
+        thresholds[name] = float(limit)
+    return thresholds
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the prediction and training pipelines.')
+    parser.add_argument('--groups', nargs='+', choices=GROUPS, default=list(GROUPS), help='case groups to run')
+    parser.add_argument('--quick', action='store_true', help='smaller batch, generator and training sizes')
+    parser.add_argument('--output', help='write the results JSON here')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline results JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown before a case counts as a regression (0.2 = 20%%)')
+    parser.add_argument('--case-threshold', action='append', metavar='CASE=RATIO',
+                        help='per-case threshold override, e.g. calculate_risk.cold_process=0.5')
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print("CLIMATE DISEASE PREDICTOR - BENCHMARKS")
+    print("=" * 72)
+    report = run_benchmarks(args.groups, args.quick)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved: {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one.")
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows, regressions = compare(report, baseline, args.threshold, _parse_case_thresholds(args.case_threshold))
+    print(f"\nCompared with {args.baseline} ({baseline['meta'].get('created', 'unknown date')}):")
+    print("-" * 72)
+    for row in rows:
+        flag = 'REGRESSION' if row['regressed'] else 'ok'
+        print(f"  {row['case']:38s} {row['ratio']:6.2f}x  (limit {1 + row['threshold']:.2f}x)  {flag}")
+    print("-" * 72)
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed: {', '.join(regressions)}")
+        sys.exit(1)
+    print("No regressions.")
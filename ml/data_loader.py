@@ -0,0 +1,168 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from rules import DISEASES, FEATURES
+
+# ==================== DATASET INGESTION ====================
+# Streams uploaded surveillance records (CSV or Parquet) in fixed-size chunks
+# with compact column types, so multi-GB histories never have to fit in one
+# DataFrame. Chunks feed incremental learners directly, or load_sample keeps
+# a uniform, memory-bounded random sample for a full retrain.
+
+LABEL_COLUMN = 'disease'
+# Optional columns the temporal features need (kept as strings)
+TEMPORAL_COLUMNS = ('location', 'date')
+FEATURE_DTYPE = np.float32
+LABEL_DTYPE = pd.CategoricalDtype(DISEASES)
+LABEL_LOOKUP = {d.lower(): d for d in DISEASES}
+DEFAULT_CHUNK_SIZE = 100000
+DEFAULT_MAX_ROWS = 500000
+
+# Accepted spellings of the required columns (matched case-insensitively)
+COLUMN_ALIASES = {
+    'temp': 'temperature',
+    'temperature_c': 'temperature',
+    'relative_humidity': 'humidity',
+    'rain': 'rainfall',
+    'rainfall_mm': 'rainfall',
+    'precipitation': 'rainfall',
+    'air_quality': 'aqi',
+    'label': 'disease',
+    'diagnosis': 'disease',
+    'city': 'location',
+    'district': 'location',
+    'day': 'date',
+    'timestamp': 'date'
+}
+
+
+class SchemaError(ValueError):
+    """The input file is missing required columns or cannot be read."""
+
+
+def resolve_columns(header, required=FEATURES + (LABEL_COLUMN,)):
+    """Map each required column name to the matching column in ``header``."""
+    found = {}
+    for column in header:
+        key = str(column).strip().lower()
+        key = COLUMN_ALIASES.get(key, key)
+        if key in required and key not in found:
+            found[key] = column
+    missing = [c for c in required if c not in found]
+    if missing:
+        raise SchemaError(f"Dataset is missing required column(s): {', '.join(missing)} "
+                          f"(found: {', '.join(map(str, header))})")
+    return found
+
+
+def _read_header(path, file_format):
+    if file_format == 'parquet':
+        return _parquet_file(path).schema_arrow.names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def _parquet_file(path):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet datasets requires pyarrow (pip install pyarrow)")
+    return pq.ParquetFile(path)
+
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    return 'parquet' if ext in ('.parquet', '.pq') else 'csv'
+
+
+def _normalize_chunk(chunk, columns, stats, keep=()):
+    """Rename, cast and validate one raw chunk; invalid rows are dropped and counted."""
+    df = pd.DataFrame({name: pd.to_numeric(chunk[columns[name]], errors='coerce').astype(FEATURE_DTYPE)
+                       for name in FEATURES})
+    labels = chunk[columns[LABEL_COLUMN]].astype(str).str.strip().str.lower().map(LABEL_LOOKUP)
+    df[LABEL_COLUMN] = labels.astype(LABEL_DTYPE)
+    for name in keep:
+        df[name] = chunk[columns[name]].to_numpy()
+
+    valid = df[LABEL_COLUMN].notna().to_numpy() & np.isfinite(df[list(FEATURES)].to_numpy()).all(axis=1)
+    stats['rows_read'] += len(df)
+    stats['rows_dropped'] += int((~valid).sum())
+    if not valid.all():
+        df = df[valid]
+    return df.reset_index(drop=True)
+
+
+def iter_dataset(path, chunk_size=DEFAULT_CHUNK_SIZE, stats=None, keep=()):
+    """Yield validated DataFrames of at most chunk_size rows.
+
+    Features are float32 and ``disease`` is a categorical over DISEASES. Rows
+    with unknown labels or non-numeric features are dropped and counted in
+    ``stats`` (rows_read / rows_dropped) when a dict is passed. Columns named
+    in ``keep`` (e.g. TEMPORAL_COLUMNS) are required too and passed through.
+    """
+    if not os.path.exists(path):
+        raise SchemaError(f"Dataset not found: {path}")
+    if stats is None:
+        stats = {}
+    stats.setdefault('rows_read', 0)
+    stats.setdefault('rows_dropped', 0)
+
+    file_format = detect_format(path)
+    columns = resolve_columns(_read_header(path, file_format), FEATURES + (LABEL_COLUMN,) + tuple(keep))
+    usecols = list(columns.values())
+
+    if file_format == 'parquet':
+        batches = (batch.to_pandas() for batch in
+                   _parquet_file(path).iter_batches(batch_size=chunk_size, columns=usecols))
+    else:
+        # Read everything as strings, then coerce: a stray value in a numeric
+        # column drops that row instead of failing the whole file.
+        batches = pd.read_csv(path, usecols=usecols, dtype=str, chunksize=chunk_size)
+
+    for chunk in batches:
+        df = _normalize_chunk(chunk, columns, stats, keep)
+        if len(df):
+            yield df
+
+
+def load_sample(path, max_rows=DEFAULT_MAX_ROWS, chunk_size=DEFAULT_CHUNK_SIZE, seed=42, stats=None):
+    """Uniform random sample of at most max_rows rows, streamed in one pass.
+
+    Every row gets a random key and the max_rows smallest keys are kept, so
+    peak memory is bounded by max_rows + chunk_size rows regardless of file
+    size (see sample_rows). Returns (X float32 (n, 4), disease label codes int8).
+    """
+    chunks = ((df[list(FEATURES)].to_numpy(dtype=FEATURE_DTYPE), df[LABEL_COLUMN].cat.codes.to_numpy(dtype=np.int8))
+              for df in iter_dataset(path, chunk_size, stats))
+    X, codes = sample_rows(chunks, len(FEATURES), max_rows, chunk_size, seed)
+    if len(X) == 0:
+        raise SchemaError(f"Dataset has no valid rows: {path}")
+    return X, codes
+
+
+def sample_rows(chunks, width, max_rows=DEFAULT_MAX_ROWS, chunk_size=DEFAULT_CHUNK_SIZE, seed=42):
+    """Uniform random sample of at most max_rows rows from (X, label codes) chunks.
+
+    Chunks may hold at most chunk_size rows. They are written into buffers
+    for max_rows + chunk_size rows, allocated once and reused for every chunk.
+    """
+    rng = np.random.default_rng(seed)
+    capacity = max_rows + chunk_size
+    keys = np.empty(capacity)
+    X = np.empty((capacity, width), dtype=FEATURE_DTYPE)
+    codes = np.empty(capacity, dtype=np.int8)
+    n = 0
+
+    for chunk_X, chunk_codes in chunks:
+        end = n + len(chunk_X)
+        keys[n:end] = rng.random(len(chunk_X))
+        X[n:end] = chunk_X
+        codes[n:end] = chunk_codes
+        n = end
+        if n > max_rows:
+            keep = np.argpartition(keys[:n], max_rows)[:max_rows]
+            keys[:max_rows], X[:max_rows], codes[:max_rows] = keys[keep], X[keep], codes[keep]
+            n = max_rows
+
+    return X[:n].copy(), codes[:n].copy()
@@ -0,0 +1,117 @@
+import os
+import time
+
+import joblib
+import numpy as np
+
+from rules import DISEASES, FEATURES
+
+# ==================== DISTILLED FAST-PATH MODEL ====================
+# A lookup grid over the four climate features holding the ensemble's averaged
+# class probabilities (the expensive part of calculate_risk: four
+# predict_proba calls including the RBF SVM). Serving interpolates the grid
+# and then applies the expert rules and fusion exactly as the full path does.
+#
+# predict is imported lazily: unpickling a grid inside a prediction worker
+# imports this module, and must not load a second copy of the predictor.
+
+FAST_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'fast_model.joblib')
+DEFAULT_RESOLUTION = 16
+FIDELITY_SAMPLES = 20000
+
+# Grid span per feature; inputs outside are clamped to the edge
+GRID_RANGES = {
+    'temperature': (0, 55),
+    'humidity': (0, 100),
+    'rainfall': (0, 500),
+    'aqi': (0, 500)
+}
+
+
+class DistilledGrid(object):
+    """Multilinear interpolation over a regular grid of ensemble probabilities."""
+
+    def __init__(self, table, lows, highs, sources):
+        self.table = np.ascontiguousarray(table, dtype=np.float32)
+        self.lows = np.asarray(lows, dtype=np.float64)
+        self.highs = np.asarray(highs, dtype=np.float64)
+        self.shape = np.array(table.shape[:-1])
+        self.steps = (self.highs - self.lows) / (self.shape - 1)
+        # Digest of every ensemble artifact the grid was distilled from
+        self.sources = dict(sources)
+        self.fidelity = {}
+        self.classes_ = np.array(DISEASES, dtype=object)
+
+    def is_current(self, registry):
+        """True if every source artifact is still the one the grid was built from."""
+        return all(registry.digest(path) == digest for path, digest in self.sources.items())
+
+    def predict_proba(self, X):
+        X = np.clip(np.asarray(X, dtype=np.float64), self.lows, self.highs)
+        pos = (X - self.lows) / self.steps
+        base = np.minimum(np.floor(pos).astype(np.int64), self.shape - 2)
+        frac = pos - base
+
+        proba = np.zeros((len(X), self.table.shape[-1]))
+        for corner in range(1 << len(self.shape)):
+            bits = np.array([(corner >> d) & 1 for d in range(len(self.shape))])
+            weight = np.prod(np.where(bits, frac, 1 - frac), axis=1)
+            idx = base + bits
+            proba += weight[:, np.newaxis] * self.table[tuple(idx.T)]
+        return proba
+
+
+def _grid_axes(resolution):
+    return [np.linspace(GRID_RANGES[f][0], GRID_RANGES[f][1], resolution) for f in FEATURES]
+
+
+def measure_fidelity(grid, n_samples=FIDELITY_SAMPLES, seed=0):
+    """Agreement between the fast tier and the full ensemble on random inputs."""
+    import predict
+    rng = np.random.default_rng(seed)
+    X = rng.uniform(grid.lows, grid.highs, size=(n_samples, len(FEATURES)))
+    full = predict.score_features(X, engine='full')
+
+    start = time.perf_counter()
+    fast = predict.score_features(X, engine='fast')
+    seconds = time.perf_counter() - start
+
+    return {
+        'samples': n_samples,
+        'disease_agreement': round(float(np.mean(full['prediction'] == fast['prediction'])), 4),
+        'risk_score_mae': round(float(np.mean(np.abs(full['risk_score'] - fast['risk_score']))), 3),
+        'probability_mae': round(float(np.mean(np.abs(full['risks'] - fast['risks']))), 5),
+        'microseconds_per_row': round(seconds / n_samples * 1e6, 2)
+    }
+
+
+def build_fast_model(resolution=DEFAULT_RESOLUTION, chunk_size=50000):
+    """Distill the saved ensemble into a lookup grid and report its fidelity."""
+    import predict
+    registry = predict.registry
+    sources = {mpath: registry.digest(mpath) for _, mpath in predict.ENSEMBLE_MEMBERS
+               if os.path.exists(mpath)}
+    if not sources:
+        raise FileNotFoundError("No trained models found - run train_model.py first")
+
+    axes = _grid_axes(resolution)
+    points = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, len(FEATURES))
+    print(f"  Evaluating ensemble on {len(points)} grid points ({resolution}^{len(FEATURES)})...")
+    table = np.empty((len(points), len(DISEASES)))
+    for start in range(0, len(points), chunk_size):
+        table[start:start + chunk_size] = predict.ensemble_scores(points[start:start + chunk_size])[0]
+
+    grid = DistilledGrid(table.reshape((resolution,) * len(FEATURES) + (len(DISEASES),)),
+                         [a[0] for a in axes], [a[-1] for a in axes], sources)
+    save_fast_model(grid)
+
+    # Fidelity is measured through the saved artifact, exactly as served
+    grid.fidelity = measure_fidelity(grid)
+    save_fast_model(grid)
+    return grid
+
+
+def save_fast_model(grid):
+    tmp_path = f'{FAST_MODEL_PATH}.tmp'
+    joblib.dump(grid, tmp_path, compress=0)
+    os.replace(tmp_path, FAST_MODEL_PATH)
@@ -0,0 +1,201 @@
+import argparse
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+
+from rules import DISEASES, FEATURES
+from data_loader import COLUMN_ALIASES
+from instrumentation import megabytes, peak_rss_bytes
+
+# ==================== REGIONAL GRID SWEEP ====================
+# Scores a gridded climate field (lat x lon x day) in one job and writes
+# compact per-cell rasters for the risk maps. Cells are flattened, split into
+# fixed-size chunks and scored with predict.score_features (the vectorized
+# core of calculate_risk) across a process pool; each worker loads the
+# ensemble once.
+
+DEFAULT_CHUNK_CELLS = 50000
+COORDINATES = ('lat', 'lon', 'day')
+COORDINATE_ALIASES = {'latitude': 'lat', 'longitude': 'lon', 'time': 'day', 'date': 'day'}
+
+# Raster value for cells with missing or non-finite inputs
+NODATA = 255
+
+
+class FieldError(ValueError):
+    """The climate field is missing variables or has inconsistent shapes."""
+
+
+def _canonical(name):
+    key = str(name).strip().lower()
+    return COORDINATE_ALIASES.get(key, COLUMN_ALIASES.get(key, key))
+
+
+def _from_mapping(arrays, source, dtype=np.float64):
+    variables = {_canonical(name): name for name in arrays}
+    missing = [f for f in FEATURES if f not in variables]
+    if missing:
+        raise FieldError(f"{source} is missing variable(s): {', '.join(missing)} "
+                         f"(found: {', '.join(map(str, arrays))})")
+    cube = np.stack([np.asarray(arrays[variables[f]], dtype=dtype) for f in FEATURES], axis=-1)
+    if cube.ndim != 4:
+        raise FieldError(f"{source}: variables must be (lat, lon, day) arrays, got shape {cube.shape[:-1]}")
+    coords = {c: np.asarray(arrays[variables[c]]) for c in COORDINATES if c in variables}
+    return cube, coords
+
+
+def _open_netcdf(path, dtype=np.float64):
+    try:
+        import xarray as xr
+    except ImportError:
+        raise ImportError("Reading NetCDF fields requires xarray and netCDF4 (pip install xarray netCDF4)")
+    ds = xr.open_dataset(path)
+    names = {_canonical(name): name for name in list(ds.data_vars) + list(ds.coords)}
+    dims = [names[c] for c in COORDINATES if c in names]
+    arrays = {name: ds[name].transpose(*dims).values if name in ds.data_vars else ds[name].values
+              for name in list(ds.data_vars) + list(ds.coords)}
+    return _from_mapping(arrays, path, dtype)
+
+
+def load_field(path, compact=False):
+    """Read a climate field as a float64 (lat, lon, day, 4) cube plus any coordinates.
+
+    .npz: one (lat, lon, day) array per variable (temperature, humidity,
+    rainfall, aqi; the dataset column aliases are accepted) and optional
+    lat/lon/day vectors. .npy: a single (lat, lon, day, 4) array in that
+    variable order. .nc: a NetCDF dataset with the same variables (needs xarray).
+    compact=True reads the cube as float32 instead, halving its memory.
+    """
+    dtype = np.float32 if compact else np.float64
+    if not os.path.exists(path):
+        raise FieldError(f"Climate field not found: {path}")
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npz':
+        with np.load(path) as data:
+            return _from_mapping({name: data[name] for name in data.files}, path, dtype)
+    if ext == '.npy':
+        cube = np.load(path, mmap_mode='r')
+        if cube.ndim != 4 or cube.shape[-1] != len(FEATURES):
+            raise FieldError(f"{path}: expected a (lat, lon, day, {len(FEATURES)}) array, got {cube.shape}")
+        return np.asarray(cube, dtype=dtype), {}
+    if ext in ('.nc', '.nc4', '.netcdf'):
+        return _open_netcdf(path, dtype)
+    raise FieldError(f"Unsupported climate field format '{ext}' (expected .npz, .npy or .nc)")
+
+
+def _score_chunk(features, risk_level, engine, with_accuracy=False, compact=False):
+    """Per-cell (probabilities, disease, risk score, severity[, accuracy %]) for one chunk."""
+    import predict
+    scores = predict.score_features(features, risk_level, engine, compact)
+    outputs = (scores['risks'].astype(np.float16), scores['prediction'].astype(np.uint8),
+               scores['risk_score'].astype(np.uint8), scores['severity'].astype(np.uint8))
+    if with_accuracy:
+        outputs += (predict.round_half_even(scores['accuracy'] * 100, 2),)
+    return outputs
+
+
+def _cell_locations(grid_shape, coords):
+    """'lat,lon' label of every grid cell (grid indices when coordinates are missing)."""
+    lat = coords.get('lat', np.arange(grid_shape[0]))
+    lon = coords.get('lon', np.arange(grid_shape[1]))
+    labels = np.array([[f'{y:g},{x:g}' for x in lon] for y in lat], dtype=object)
+    return np.broadcast_to(labels[:, :, np.newaxis], grid_shape).reshape(-1)
+
+
+def _store_rows(store, flat, cells, locations, disease, accuracy):
+    """Add one `predictions` row per scored cell to ``store``."""
+    names = np.array(DISEASES, dtype=object)[disease]
+    store.add_rows(list(zip([store.user_id] * len(cells), *flat[cells].astype(np.float64).T.tolist(),
+                            locations[cells].tolist(), names.tolist(), accuracy.tolist())))
+
+
+def sweep(cube, risk_level='Low', engine='full', chunk_cells=DEFAULT_CHUNK_CELLS, n_workers=None, store=None,
+          coords=None, compact=False):
+    """Score every cell of a (lat, lon, day, 4) cube.
+
+    Returns rasters shaped like the grid: ``probabilities`` (float16, one
+    layer per disease), ``disease`` (index into DISEASES), ``risk_score``
+    (0-100) and ``severity`` (index into predict.SEVERITY_LEVELS). Cells with
+    missing inputs are NODATA (NaN probabilities). With a ``store``
+    (prediction_store.PredictionStore) every scored cell is also persisted
+    as a `predictions` row located by its ``coords``. compact=True scores
+    float32 chunks (a float32 cube's cells as they are) instead of float64.
+    """
+    grid_shape = cube.shape[:-1]
+    flat = cube.reshape(-1, len(FEATURES))
+    valid = np.flatnonzero(np.isfinite(flat).all(axis=1))
+
+    probabilities = np.full((len(flat), len(DISEASES)), np.nan, dtype=np.float16)
+    codes = {name: np.full(len(flat), NODATA, dtype=np.uint8) for name in ('disease', 'risk_score', 'severity')}
+
+    bounds = [(start, min(start + chunk_cells, len(valid))) for start in range(0, len(valid), chunk_cells)]
+    n_jobs = min(n_workers or os.cpu_count() or 1, max(len(bounds), 1))
+    locations = _cell_locations(grid_shape, coords or {}) if store is not None else None
+    outputs = Parallel(n_jobs=n_jobs, return_as='generator')(
+        delayed(_score_chunk)(flat[valid[start:stop]], risk_level, engine, store is not None, compact)
+        for start, stop in bounds)
+    for (start, stop), (proba, disease, risk_score, severity, *accuracy) in zip(bounds, outputs):
+        cells = valid[start:stop]
+        if store is not None:
+            _store_rows(store, flat, cells, locations, disease, accuracy[0])
+        probabilities[cells] = proba
+        codes['disease'][cells] = disease
+        codes['risk_score'][cells] = risk_score
+        codes['severity'][cells] = severity
+
+    rasters = {name: values.reshape(grid_shape) for name, values in codes.items()}
+    rasters['probabilities'] = probabilities.reshape(grid_shape + (len(DISEASES),))
+    return rasters
+
+
+def write_rasters(path, rasters, coords=None):
+    """Save the rasters with their legends (and grid coordinates) as a compressed .npz."""
+    from predict import SEVERITY_LEVELS
+    np.savez_compressed(path, diseases=np.array(DISEASES), severity_levels=np.array(SEVERITY_LEVELS),
+                        nodata=np.uint8(NODATA), **rasters, **(coords or {}))
+
+
+def run_sweep(field_path, out_path, risk_level='Low', engine='full', chunk_cells=DEFAULT_CHUNK_CELLS, n_workers=None,
+              store=None, compact=False):
+    started = time.perf_counter()
+    cube, coords = load_field(field_path, compact)
+    rasters = sweep(cube, risk_level, engine, chunk_cells, n_workers, store, coords, compact)
+    write_rasters(out_path, rasters, coords)
+    if store is not None:
+        store.close()
+        print(f"Persisted {store.written} predictions")
+    seconds = time.perf_counter() - started
+
+    cells = int(np.prod(cube.shape[:-1]))
+    scored = int((rasters['disease'] != NODATA).sum())
+    print(f"Scored {scored}/{cells} cells of a {' x '.join(map(str, cube.shape[:-1]))} grid "
+          f"in {seconds:.2f}s ({scored / max(seconds, 1e-9):.0f} cells/s)")
+    print(f"Rasters: {out_path} ({os.path.getsize(out_path) / 1e6:.1f} MB)")
+    peak = peak_rss_bytes()
+    print(f"Peak memory ({'compact' if compact else 'float64'} mode): {megabytes(peak)} MB in this process")
+    return {'cells': cells, 'scored': scored, 'seconds': seconds, 'peak_rss_bytes': peak}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score a lat x lon x day climate field into risk rasters.')
+    parser.add_argument('field', help='.npz / .npy / .nc climate field')
+    parser.add_argument('output', help='output .npz with probability, disease, risk score and severity rasters')
+    parser.add_argument('--risk-level', default='Low', help='regional outbreak context (Low/Moderate/High)')
+    parser.add_argument('--workers', type=int, default=None, help='process pool size (default: all cores)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_CELLS, help='cells scored per task')
+    parser.add_argument('--fast', action='store_true', help='use the distilled fast-path model')
+    parser.add_argument('--persist', metavar='TARGET',
+                        help="also insert every scored cell into the predictions table ('mysql' or 'sqlite:PATH')")
+    parser.add_argument('--store-chunk', type=int, default=None, help='rows per bulk insert')
+    parser.add_argument('--user-id', type=int, default=None, help='owner recorded on the persisted rows')
+    parser.add_argument('--compact', action='store_true', help='score float32 feature chunks (less memory per worker)')
+    args = parser.parse_args()
+
+    store = None
+    if args.persist:
+        from prediction_store import open_store
+        store = open_store(args.persist, args.store_chunk, args.user_id)
+    run_sweep(args.field, args.output, args.risk_level, 'fast' if args.fast else 'full', args.chunk_size, args.workers,
+              store, args.compact)
@@ -0,0 +1,172 @@
+import json
+import math
+import os
+import time
+import warnings
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+
+# ==================== HYPERPARAMETER SEARCH ====================
+# Successive halving over each ensemble member's search space. Every
+# candidate is cross-validated on a small stratified subset first; only the
+# best 1/eta of each family move on to a subset eta times larger, until one
+# candidate per family is left or the subset is every training row. Most
+# candidates are dropped after fits that cost a fraction of a full one, so
+# a wide grid fits in the wall-clock budget of a single retrain. All
+# candidates of a round (every family, every fold) run as independent tasks
+# on one process pool.
+#
+# Subsets are nested prefixes of one stratified shuffle, and each round's
+# fold matrices are sliced once and shared by all candidates; the pool stays
+# open between rounds, so joblib memory-maps each matrix to the workers once.
+
+HYPERPARAMETERS_PATH = os.path.join(os.path.dirname(__file__), 'hyperparameters.json')
+
+SEARCH_SPACES = {
+    'RandomForest': {'n_estimators': [100, 200, 400], 'max_depth': [10, 15, None], 'min_samples_split': [2, 5]},
+    'LogisticRegression': {'C': [0.01, 0.1, 1.0, 10.0, 100.0]},
+    'SVM': {'C': [1.0, 10.0, 100.0], 'gamma': ['scale', 'auto']}
+}
+DEFAULT_BUDGET_SECONDS = 600
+DEFAULT_ETA = 3
+DEFAULT_MIN_ROWS = 500
+SEARCH_FOLDS = 3
+
+
+def halving_sizes(n_rows, min_rows=DEFAULT_MIN_ROWS, eta=DEFAULT_ETA):
+    """Subset sizes of each round, growing by eta and ending at n_rows."""
+    rounds = 1 + max(0, int(math.floor(math.log(n_rows / max(min(min_rows, n_rows), 1), eta))))
+    return [int(math.ceil(n_rows / eta ** (rounds - 1 - r))) for r in range(rounds)]
+
+
+class FoldCache(object):
+    """Nested stratified row subsets and their cross-validation fold matrices.
+
+    ``folds(rows)`` splits the first ``rows`` rows of one stratified shuffle
+    (every prefix keeps the class proportions) and slices the fold matrices
+    once; later calls for the same size return the same arrays.
+    """
+
+    def __init__(self, X, y, n_folds=SEARCH_FOLDS, seed=42):
+        self.X = X
+        self.y = y
+        self.n_folds = n_folds
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        _, codes = np.unique(y, return_inverse=True)
+        # Spread each class evenly over the order: rank within class / class size
+        key = np.empty(len(y))
+        for code in range(codes.max() + 1):
+            members = np.flatnonzero(codes == code)
+            key[rng.permutation(members)] = (np.arange(len(members)) + rng.random()) / len(members)
+        self.order = np.argsort(key, kind='stable')
+        self._folds = {}
+
+    def folds(self, rows):
+        if rows not in self._folds:
+            idx = self.order[:rows]
+            X, y = self.X[idx], self.y[idx]
+            splitter = StratifiedKFold(n_splits=self.n_folds, shuffle=True, random_state=self.seed)
+            with warnings.catch_warnings():
+                # Rare classes can have fewer rows than folds in the first rounds
+                warnings.simplefilter('ignore', UserWarning)
+                splits = list(splitter.split(X, y))
+            self._folds[rows] = [(np.ascontiguousarray(X[train]), y[train], np.ascontiguousarray(X[test]), y[test])
+                                 for train, test in splits]
+        return self._folds[rows]
+
+
+def _evaluate(family, candidate, estimator, params, fold):
+    """Fit one candidate on one fold and score it (runs in a worker process)."""
+    X_train, y_train, X_test, y_test = fold
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        # Extreme candidates (e.g. a weakly regularized LR) may stop at max_iter; they are simply scored as fitted
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        model = clone(estimator).set_params(**params).fit(X_train, y_train)
+    seconds = time.perf_counter() - start
+    return family, candidate, float((model.predict(X_test) == y_test).mean()), seconds
+
+
+def successive_halving(estimators, X, y, spaces=SEARCH_SPACES, budget=DEFAULT_BUDGET_SECONDS, eta=DEFAULT_ETA,
+                       min_rows=DEFAULT_MIN_ROWS, n_folds=SEARCH_FOLDS, n_workers=1, log=print):
+    """Tune every estimator in ``estimators`` (name -> unfitted model) over its space.
+
+    A round only starts if its estimated wall time (the previous round's,
+    scaled by rows and candidates) fits in what is left of ``budget``
+    seconds; the first round always runs. Returns (winners, trials):
+    winners maps each family to the params, mean CV accuracy, mean fit
+    seconds and subset size of its best candidate in the last round it
+    reached; trials lists every candidate scored in every round.
+    """
+    started = time.perf_counter()
+    cache = FoldCache(X, y, n_folds)
+    grids = {name: list(ParameterGrid(spaces.get(name, {}))) for name in estimators}
+    alive = {name: list(range(len(grid))) for name, grid in grids.items()}
+    sizes = halving_sizes(len(y), min_rows, eta)
+    trials, best = [], {}
+    previous = None
+
+    with Parallel(n_jobs=n_workers) as parallel:
+        for rnd, rows in enumerate(sizes):
+            # Families down to one candidate are settled
+            active = {name: candidates for name, candidates in alive.items() if len(candidates) > 1 or rnd == 0}
+            if not active:
+                break
+            n_candidates = sum(len(candidates) for candidates in active.values())
+            if previous is not None:
+                prev_seconds, prev_rows, prev_candidates = previous
+                estimate = prev_seconds * (rows / prev_rows) * (n_candidates / prev_candidates)
+                remaining = budget - (time.perf_counter() - started)
+                if estimate > remaining:
+                    log(f"  Stopping before round {rnd + 1}: needs ~{estimate:.0f}s, {max(remaining, 0):.0f}s "
+                        f"of the budget left")
+                    break
+
+            round_start = time.perf_counter()
+            folds = cache.folds(rows)
+            outputs = parallel(delayed(_evaluate)(name, c, estimators[name], grids[name][c], fold)
+                               for name, candidates in active.items() for c in candidates for fold in folds)
+            seconds = time.perf_counter() - round_start
+            previous = (seconds, rows, n_candidates)
+
+            scores = {}
+            for name, c, accuracy, fit_seconds in outputs:
+                scores.setdefault((name, c), []).append((accuracy, fit_seconds))
+            for name, candidates in active.items():
+                ranked = []
+                for c in candidates:
+                    runs = np.array(scores[(name, c)])
+                    trial = {'family': name, 'params': grids[name][c], 'round': rnd + 1, 'rows': rows,
+                             'accuracy': round(float(runs[:, 0].mean()), 4),
+                             'fit_seconds': round(float(runs[:, 1].mean()), 4)}
+                    trials.append(trial)
+                    ranked.append((-trial['accuracy'], trial['fit_seconds'], c, trial))
+                ranked.sort(key=lambda r: r[:3])
+                best[name] = ranked[0][3]
+                alive[name] = [c for _, _, c, _ in ranked[:max(1, int(math.ceil(len(ranked) / eta)))]]
+            log(f"  Round {rnd + 1}/{len(sizes)}: {n_candidates} candidates on {rows} rows in {seconds:.1f}s")
+
+    winners = {name: {key: trial[key] for key in ('params', 'accuracy', 'fit_seconds', 'rows')}
+               for name, trial in best.items()}
+    return winners, trials
+
+
+def load_hyperparameters(path=HYPERPARAMETERS_PATH):
+    """Tuned params per family from the last search, or {} if none was run."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {name: result['params'] for name, result in json.load(f)['winners'].items()}
+
+
+def save_hyperparameters(report, path=HYPERPARAMETERS_PATH):
+    """Atomically write a search report (winners and every trial) as JSON."""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
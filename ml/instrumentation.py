@@ -0,0 +1,205 @@
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+# ==================== INSTRUMENTATION ====================
+# Stage timers and counters for the prediction and training pipelines.
+# Timings use the monotonic perf_counter clock and accumulate per stage
+# (sum and count); counters and collected values (model loads, cache hits)
+# are exported alongside them in the Prometheus text exposition format.
+# Peak resident memory is reported for sizing worker processes, and
+# histograms record distributions such as micro-batch sizes.
+
+
+class Histogram(object):
+    """Counts of observed values per cumulative upper bound, plus their sum."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+
+    def snapshot(self):
+        """(cumulative (upper bound, count) pairs ending with +Inf, sum)."""
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        cumulative, running = [], 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            running += count
+            cumulative.append((bound, running))
+        return cumulative, total
+
+
+class Metrics(object):
+    """Process-wide stage timings, counters and collected values for one pipeline."""
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.stage_seconds = defaultdict(float)
+        self.stage_count = defaultdict(int)
+        self.counters = defaultdict(int)
+        self._collectors = []
+        self._histograms = []
+        self._captures = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            self.stage_seconds[name] += seconds
+            self.stage_count[name] += 1
+            for timings in self._captures:
+                timings[name] = timings.get(name, 0.0) + seconds
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def timed(self, name, func):
+        """Wrap ``func`` so every call is observed as stage ``name``."""
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def collect(self, name, help_text, metric_type, read):
+        """Export the value returned by ``read()`` (a number) at every export."""
+        self._collectors.append((name, help_text, metric_type, read))
+
+    def histogram(self, name, help_text, buckets):
+        """A Histogram exported as ``name`` (observe values on the returned object)."""
+        histogram = Histogram(buckets)
+        self._histograms.append((name, help_text, histogram))
+        return histogram
+
+    @contextmanager
+    def capture(self):
+        """Collect the stage seconds observed inside the block into a dict.
+
+        Stages nest, so an outer stage's time includes the inner stages it ran.
+        """
+        timings = {}
+        with self._lock:
+            self._captures.append(timings)
+        try:
+            yield timings
+        finally:
+            with self._lock:
+                # By identity: nested captures may hold equal dicts
+                self._captures = [t for t in self._captures if t is not timings]
+
+    def to_prometheus(self):
+        ns = self.namespace
+        with self._lock:
+            stages = sorted(self.stage_seconds.items())
+            counts = dict(self.stage_count)
+            counters = sorted(self.counters.items())
+
+        lines = [f'# HELP {ns}_stage_seconds Wall time spent in each pipeline stage.',
+                 f'# TYPE {ns}_stage_seconds summary']
+        for stage, seconds in stages:
+            lines.append(f'{ns}_stage_seconds_sum{{stage="{stage}"}} {seconds:.6f}')
+            lines.append(f'{ns}_stage_seconds_count{{stage="{stage}"}} {counts[stage]}')
+        for name, value in counters:
+            lines.append(f'# TYPE {ns}_{name}_total counter')
+            lines.append(f'{ns}_{name}_total {value}')
+        for name, help_text, metric_type, read in self._collectors:
+            lines.append(f'# HELP {ns}_{name} {help_text}')
+            lines.append(f'# TYPE {ns}_{name} {metric_type}')
+            lines.append(f'{ns}_{name} {read()}')
+        for name, help_text, histogram in self._histograms:
+            cumulative, total = histogram.snapshot()
+            lines.append(f'# HELP {ns}_{name} {help_text}')
+            lines.append(f'# TYPE {ns}_{name} histogram')
+            for bound, count in cumulative:
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'{ns}_{name}_bucket{{le="{le}"}} {count}')
+            lines.append(f'{ns}_{name}_sum {total:.6f}')
+            lines.append(f'{ns}_{name}_count {cumulative[-1][1]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Atomically write the Prometheus text file (e.g. for node_exporter's textfile collector)."""
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+def milliseconds(timings):
+    return {stage: round(seconds * 1000, 3) for stage, seconds in timings.items()}
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, in bytes (0 where unsupported)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def megabytes(n_bytes):
+    return round(n_bytes / 1e6, 1)
+
+
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+
+
+@contextmanager
+def profiling(mode, stream=sys.stderr, limit=25):
+    """Profile the block with cProfile or tracemalloc and report to ``stream``.
+
+    mode=None runs the block unprofiled.
+    """
+    if not mode:
+        yield
+        return
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{mode}' (expected one of: {', '.join(PROFILE_MODES)})")
+
+    if mode == 'cprofile':
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+    else:
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"tracemalloc: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB", file=stream)
+            for stat in snapshot.statistics('lineno')[:limit]:
+                print(f"  {stat}", file=stream)
@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+# ==================== MICRO-BATCHING SCHEDULER ====================
+# Coalesces concurrent single-row requests into one matrix call. A 1x4
+# predict_proba costs almost as much as a 256x4 one, so a serve worker that
+# scores each request alone wastes most of the ensemble's vectorization.
+# Requests are queued and scored together once max_batch are waiting or
+# max_wait has passed since the oldest arrived, whichever comes first; while
+# a batch is being scored the next one fills up, so batches grow with load.
+#
+#   PREDICT_MAX_BATCH=64        # 1 disables batching
+#   PREDICT_MAX_WAIT_MS=2
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_WAIT_MS = 2.0
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+WAIT_SECONDS_BUCKETS = (0.0001, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+
+class MicroBatcher(object):
+    """Queues items and scores them in batches on the running event loop.
+
+    ``score(items)`` receives up to max_batch items and returns one result per
+    item, in order. submit() returns an asyncio Future for the item's result;
+    if ``score`` raises, every future of that batch gets the exception. With
+    ``metrics`` (an instrumentation.Metrics) the batch sizes, the latency the
+    queue added to each item and the queue depth are exported.
+    """
+
+    def __init__(self, score, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT_MS / 1000, metrics=None):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.score = score
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.metrics = metrics
+        self.batches = 0
+        self.peak_depth = 0
+        self._queue = []
+        self._timer = None
+        if metrics is not None:
+            self._sizes = metrics.histogram('batch_size', 'Requests scored per micro-batch.', BATCH_SIZE_BUCKETS)
+            self._waits = metrics.histogram('batch_wait_seconds', 'Latency added by the micro-batch queue per request.',
+                                            WAIT_SECONDS_BUCKETS)
+            metrics.collect('batch_queue_depth', 'Requests waiting for the next micro-batch.', 'gauge', self.__len__)
+            metrics.collect('batch_queue_depth_peak', 'Most requests ever waiting at once.', 'gauge',
+                            lambda: self.peak_depth)
+
+    def __len__(self):
+        return len(self._queue)
+
+    def submit(self, item):
+        """Queue ``item``; must be called from the event loop's thread."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((item, future, time.perf_counter()))
+        self.peak_depth = max(self.peak_depth, len(self._queue))
+        if len(self._queue) >= self.max_batch:
+            self.dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self.dispatch)
+        return future
+
+    def dispatch(self):
+        """Score the oldest max_batch queued items now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+        if not batch:
+            return
+        started = time.perf_counter()
+        self.batches += 1
+        if self.metrics is not None:
+            self._sizes.observe(len(batch))
+            for _, _, submitted in batch:
+                self._waits.observe(started - submitted)
+            self.metrics.inc('batches')
+
+        try:
+            if self.metrics is not None:
+                with self.metrics.stage('batch'):
+                    results = self.score([item for item, _, _ in batch])
+            else:
+                results = self.score([item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+        if self._queue:
+            # Items that arrived while this batch was scored keep their own deadline
+            oldest = self._queue[0][2]
+            delay = max(0.0, oldest + self.max_wait - time.perf_counter())
+            self._timer = asyncio.get_running_loop().call_later(delay, self.dispatch)
+
+    def flush(self):
+        """Score everything queued, without waiting for the deadline."""
+        while self._queue:
+            self.dispatch()
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import threading
+import time
+
+import joblib
+
+# ==================== MODEL REGISTRY ====================
+# Deserializes each model artifact once per process and hands out the shared
+# instance. Artifacts are re-checked on disk (mtime/size, then content hash) so
+# a retrain is picked up without restarting a long-running server.
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-1 of a file's contents."""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class _Entry(object):
+    __slots__ = ('model', 'source', 'mtime_ns', 'size', 'digest', 'derived', 'checked_at')
+
+    def __init__(self, model, source, stat, digest):
+        self.model = model
+        self.source = source
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.digest = digest
+        self.derived = {}
+        self.checked_at = time.monotonic()
+
+
+class ModelRegistry(object):
+    """Process-wide cache of loaded models with change detection.
+
+    Models are treated as read-only once loaded. A changed artifact is loaded
+    into a fresh entry and swapped in under a lock, so callers never see a
+    half-loaded model; if the new file cannot be loaded (e.g. it is still
+    being written) the previous model keeps serving.
+
+    ``resolve`` maps a model's logical path to the file actually loaded (e.g.
+    a memory-mappable serving copy); switching files counts as a change.
+    """
+
+    def __init__(self, check_interval=2.0, loader=joblib.load, resolve=None):
+        self.check_interval = check_interval
+        self.loader = loader
+        self.resolve = resolve
+        self.generation = 0
+        self.loads = 0
+        self._entries = {}
+        self._file_digests = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load_entry(self, path, source, stat, digest=None):
+        model = self.loader(source)
+        entry = _Entry(model, source, stat, digest or file_digest(source))
+        with self._lock:
+            self._entries[path] = entry
+            self.generation += 1
+            self.loads += 1
+        return entry
+
+    def _entry(self, path):
+        entry = self._entries.get(path)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < self.check_interval:
+            return entry
+
+        source = self.resolve(path) if self.resolve else path
+        try:
+            stat = os.stat(source)
+        except FileNotFoundError:
+            if entry is not None:
+                with self._lock:
+                    self._entries.pop(path, None)
+                    self.generation += 1
+            return None
+
+        if entry is None or entry.source != source:
+            return self._load_entry(path, source, stat)
+
+        entry.checked_at = now
+        if stat.st_mtime_ns == entry.mtime_ns and stat.st_size == entry.size:
+            return entry
+
+        # Metadata changed: only reload if the content really did
+        digest = file_digest(source)
+        if digest == entry.digest:
+            entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+            return entry
+        try:
+            return self._load_entry(path, source, stat, digest)
+        except Exception:
+            return entry
+
+    def get(self, path):
+        """Return the shared model stored at ``path``, or None if it does not exist."""
+        entry = self._entry(path)
+        return entry.model if entry is not None else None
+
+    def digest(self, path):
+        """Content hash of the currently loaded artifact at ``path``."""
+        entry = self._entry(path)
+        return entry.digest if entry is not None else None
+
+    def _file_digest(self, path):
+        """Content hash of the file ``path`` resolves to, without loading it (rehashed only when it changes)."""
+        source = self.resolve(path) if self.resolve else path
+        try:
+            stat = os.stat(source)
+        except FileNotFoundError:
+            return None
+        cached = self._file_digests.get(source)
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            cached = self._file_digests[source] = (stat.st_mtime_ns, stat.st_size, file_digest(source))
+        return cached[2]
+
+    def fingerprint(self, paths):
+        """Combined content hash of the artifacts at ``paths``; changes when any of them does.
+
+        Artifacts that are not loaded yet are hashed on disk instead of being loaded.
+        """
+        h = hashlib.sha1()
+        for path in paths:
+            digest = self.digest(path) if path in self._entries else self._file_digest(path)
+            h.update(f'{os.path.basename(path)}={digest}\n'.encode())
+        return h.hexdigest()
+
+    def derived(self, path, key, build):
+        """Cache ``build(model)`` alongside the model; dropped when the model reloads."""
+        entry = self._entry(path)
+        if entry is None:
+            return None
+        if key not in entry.derived:
+            entry.derived[key] = build(entry.model)
+        return entry.derived[key]
+
+    def preload(self, paths):
+        for path in paths:
+            try:
+                self.get(path)
+            except Exception:
+                pass
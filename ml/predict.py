@@ -1,10 +1,24 @@
+import time
+_import_started = time.perf_counter()
+
 import sys
 import json
-import joblib
 import numpy as np
 import os
 import warnings
 import traceback
+from contextlib import nullcontext
+from datetime import date
+
+from instrumentation import Metrics, megabytes, milliseconds, peak_rss_bytes, profiling
+from model_registry import ModelRegistry
+from serving_artifacts import load_artifact, resolve_artifact
+from distill import FAST_MODEL_PATH
+from result_cache import cache_from_env
+from result_encoder import OUTPUT_FORMATS, ResultEncoder, msgpack_dumps
+from tree_shap import ForestShap
+from temporal_features import TEMPORAL_FEATURES, TemporalState
+from rules import DISEASES, FEATURES, OUTBREAK_THRESHOLDS, PREDICTION_RULES, CONTRIBUTION_RULES, risk_level_boost
 
 warnings.filterwarnings("ignore")
 
@@ -13,6 +27,63 @@ model_path = os.path.join(model_dir, 'model.pkl')
 rf_model_path = os.path.join(model_dir, 'RandomForest_model.pkl')
 svm_model_path = os.path.join(model_dir, 'SVM_model.pkl')
 lr_model_path = os.path.join(model_dir, 'LogisticRegression_model.pkl')
+fast_model_path = FAST_MODEL_PATH
+temporal_model_path = os.path.join(model_dir, 'Temporal_model.pkl')
+
+ENSEMBLE_MEMBERS = [
+    ('Random Forest', rf_model_path),
+    ('SVM', svm_model_path),
+    ('Logistic Regression', lr_model_path),
+    ('Primary Model', model_path)
+]
+
+# Stage timings and counters for this process (see instrumentation.py)
+metrics = Metrics('climate_predict')
+
+# Shared, load-once model instances for this process; memory-mapped serving
+# copies are used when train_model.py has exported them
+registry = ModelRegistry(loader=metrics.timed('model_load', load_artifact), resolve=resolve_artifact)
+
+# Results of recent inputs, dropped whenever the artifacts above change
+result_cache = cache_from_env()
+
+# One reusable JSON encoder for every result written (byte-identical to json.dumps)
+encoder = ResultEncoder()
+
+metrics.collect('models_loaded', 'Model artifacts currently held by the registry.', 'gauge', lambda: len(registry))
+metrics.collect('model_loads_total', 'Model artifacts deserialized since start-up.', 'counter', lambda: registry.loads)
+for _stat in ('hits', 'disk_hits', 'misses', 'evictions'):
+    metrics.collect(f'cache_{_stat}_total', f'Result cache {_stat.replace("_", " ")}.', 'counter',
+                    lambda _stat=_stat: result_cache.stats()[_stat])
+metrics.collect('cache_entries', 'Results held in the in-memory cache.', 'gauge', lambda: len(result_cache))
+metrics.collect('peak_rss_bytes', 'Peak resident memory of this process.', 'gauge', peak_rss_bytes)
+
+# Written by the CLI and serve mode when set (Prometheus text format)
+METRICS_FILE = os.environ.get('PREDICT_METRICS_FILE') or None
+METRICS_FLUSH_SECONDS = 5.0
+
+# Daily history of every location (temporal_features.py). Items carrying a
+# ``location`` and ``date`` update it (``"observed": false`` items, such as
+# forecast days, only read it), and the temporal forest (train_model.py
+# --temporal) joins the ensemble for them; the state is saved to
+# PREDICT_TEMPORAL_STATE between runs
+TEMPORAL_STATE_PATH = os.environ.get('PREDICT_TEMPORAL_STATE') or None
+temporal_state = TemporalState.load(TEMPORAL_STATE_PATH) if TEMPORAL_STATE_PATH else None
+
+def save_temporal_state():
+    if temporal_state is not None and TEMPORAL_STATE_PATH:
+        temporal_state.save(TEMPORAL_STATE_PATH)
+
+# Compact mode (PREDICT_COMPACT=1 or --compact): feature matrices are float32
+# instead of float64, halving their footprint; the forest scores float32
+# natively, so only the SVM and Logistic Regression widen their own copy
+COMPACT = os.environ.get('PREDICT_COMPACT', '').lower() in ('1', 'true', 'yes')
+
+# Serve mode coalesces concurrent 'predict' requests into micro-batches of up
+# to MAX_BATCH rows, waiting at most MAX_WAIT_MS for a batch to fill (see
+# micro_batch.py); MAX_BATCH=1 answers each request on its own
+MAX_BATCH = int(os.environ.get('PREDICT_MAX_BATCH') or 64)
+MAX_WAIT_MS = float(os.environ.get('PREDICT_MAX_WAIT_MS') or 2.0)
 
 # ==================== DISEASE KNOWLEDGE BASE ====================
 DISEASE_PRECAUTIONS = {
@@ -82,6 +153,54 @@ DISEASE_PRECAUTIONS = {
     ]
 }
 
+DISEASE_INDEX = {d: i for i, d in enumerate(DISEASES)}
+NO_DISEASE = DISEASE_INDEX['No Disease']
+
+FEATURE_NAMES = ['Temperature', 'Humidity', 'Rainfall', 'AQI']
+FEATURE_UNITS = ['°C', '%', 'mm', 'Index']
+
+SEVERITY_LEVELS = ['Low', 'Moderate', 'High', 'Critical']
+SEVERITY_THRESHOLDS = np.array([35, 60, 80])
+
+# Response payloads, smallest first (see build_results)
+DETAIL_LEVELS = ('minimal', 'standard', 'full')
+
+# Natural-language reasoning per feature: (threshold, template) checked top-down,
+# the first threshold the value reaches wins. None entries are handled separately.
+REASONING_THRESHOLDS = {
+    'Temperature': [(42, 'EXTREME heat (>{val}°C) — very strong trigger for heat stroke and disease'),
+                    (38, 'Very high temperature ({val}°C) — significant risk factor'),
+                    (35, 'High temperature ({val}°C) — triggers multiple disease pathways'),
+                    (30, 'Elevated temperature ({val}°C) — warm conditions favor vector-borne diseases'),
+                    (25, 'Moderate warmth ({val}°C) — above tropical disease activation threshold'),
+                    (18, None),  # handled separately
+                    (0, 'Low temperature ({val}°C) — cold stress may trigger viral infections')],
+    'Humidity': [(80, 'Very high humidity ({val}%) — ideal for mosquito breeding and pathogen survival'),
+                 (70, 'High humidity ({val}%) — favorable for disease vector proliferation'),
+                 (60, 'Moderate-high humidity ({val}%) — approaching disease-conducive levels'),
+                 (30, None),
+                 (0, 'Low humidity ({val}%) — dry conditions may aggravate respiratory issues')],
+    'Rainfall': [(300, 'Extreme rainfall ({val}mm) — high flood risk, water contamination likely'),
+                 (200, 'Heavy rainfall ({val}mm) — standing water creates vector breeding grounds'),
+                 (150, 'Significant rainfall ({val}mm) — water-borne disease risk elevated'),
+                 (100, 'Moderate rainfall ({val}mm) — conditions support mosquito life cycle'),
+                 (50, 'Light rainfall ({val}mm) — minor contribution to disease risk'),
+                 (0, 'Minimal or no rainfall ({val}mm) — dry conditions')],
+    'AQI': [(300, 'HAZARDOUS air quality (AQI {val}) — severe respiratory risk for all groups'),
+            (200, 'Very unhealthy air quality (AQI {val}) — serious asthma and respiratory risk'),
+            (150, 'Unhealthy air quality (AQI {val}) — significant respiratory disease trigger'),
+            (100, 'Moderate air quality (AQI {val}) — sensitive groups may experience effects'),
+            (50, 'Acceptable air quality (AQI {val}) — low respiratory risk'),
+            (0, 'Good air quality (AQI {val}) — minimal respiratory risk')]
+}
+
+# The reasoning fragments, prepared once: per feature, a fill-in function for
+# each threshold's text and one for values within the normal range
+REASONING_FORMATS = [[text.format if text else None for _, text in REASONING_THRESHOLDS[name]]
+                     for name in FEATURE_NAMES]
+NORMAL_RANGE_FORMATS = [f'{name}: {{}} — within normal range'.format for name in FEATURE_NAMES]
+DIRECTIONS = np.array(['low_risk', 'moderate', 'high_risk'], dtype=object)
+
 def get_severity(risk_score):
     """Determine severity level based on risk score."""
     if risk_score >= 80:
@@ -93,347 +212,973 @@ def get_severity(risk_score):
     else:
         return 'Low'
 
-def predict(temperature, humidity, rainfall, aqi, location, risk_level='Low', batch_mode=False):
-    if batch_mode:
-        try:
-            inputs = json.loads(temperature)
-            results = []
-            for item in inputs:
-                res = calculate_risk(item['temp'], item['humidity'], item['rainfall'], item['aqi'], risk_level)
-                res['date'] = item.get('date', '')
-                results.append(res)
-            print(json.dumps(results))
-        except Exception as e:
-            print(json.dumps({"error": str(e), "trace": traceback.format_exc()}))
-        return
+def _class_index(model):
+    """(column, disease) pairs for the model's classes that the risk table knows."""
+    return [(i, disease) for i, disease in enumerate(model.classes_) if disease in DISEASE_INDEX]
 
-    calculate_risk(temperature, humidity, rainfall, aqi, risk_level, print_output=True)
+def _feature_importances(model):
+    return [round(float(x), 4) for x in model.feature_importances_]
 
-def calculate_risk(temperature, humidity, rainfall, aqi, risk_level='Low', print_output=False):
-    try:
-        temp = float(temperature)
-        hum = float(humidity)
-        rain = float(rainfall)
-        air_quality = float(aqi)
-
-        # Initialize disease risks
-        disease_risks = {
-            'Malaria': 0.0, 'Dengue': 0.0, 'Typhoid': 0.0,
-            'Asthma': 0.0, 'Viral Fever': 0.0, 'Cholera': 0.0,
-            'Heat Stroke': 0.0, 'No Disease': 0.0
-        }
+def _disease_columns(model):
+    """Column of each disease in the model's classes_ (-1 if the model lacks it)."""
+    classes = list(model.classes_)
+    return np.array([classes.index(d) if d in classes else -1 for d in DISEASES])
 
-        # ==================== ENSEMBLE MODEL PREDICTIONS ====================
-        ensemble_results = {}
-        models_to_load = {
-            'Random Forest': rf_model_path,
-            'SVM': svm_model_path,
-            'Logistic Regression': lr_model_path,
-            'Primary Model': model_path
-        }
+def round_half_even(values, ndigits):
+    """Vectorized equivalent of Python's round(x, ndigits) for float arrays.
 
-        features = np.array([[temp, hum, rain, air_quality]])
-        model_votes = {}
-
-        for model_name, mpath in models_to_load.items():
-            if os.path.exists(mpath):
-                try:
-                    model = joblib.load(mpath)
-                    if hasattr(model, 'predict_proba'):
-                        probas = model.predict_proba(features)[0]
-                        classes = model.classes_
-                        best_idx = np.argmax(probas)
-                        pred = classes[best_idx]
-                        conf = float(probas[best_idx])
-
-                        # Accumulate probabilities
-                        for i, disease in enumerate(classes):
-                            if disease in disease_risks:
-                                disease_risks[disease] += float(probas[i])
-
-                        model_votes[model_name] = pred
-                        ensemble_results[model_name] = {
-                            'prediction': pred,
-                            'confidence': round(conf * 100, 1)
-                        }
-                    else:
-                        pred = model.predict(features)[0]
-                        model_votes[model_name] = pred
-                        ensemble_results[model_name] = {
-                            'prediction': pred,
-                            'confidence': 85.0
-                        }
-                except Exception:
-                    pass
-
-        # Average model probabilities
-        num_models = len(ensemble_results)
-        if num_models > 0:
-            for k in disease_risks:
-                disease_risks[k] /= num_models
+    np.round scales by 10**ndigits first, which can land on the wrong side of a
+    .5 boundary; those near-tie elements are re-rounded with Python's round so
+    the result matches the scalar code path exactly.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scale = 10.0 ** ndigits
+    scaled = values * scale
+    out = np.rint(scaled) / scale
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-7
+    if near_tie.any():
+        out[near_tie] = [round(float(v), ndigits) for v in values[near_tie]]
+    return out
 
-        # ==================== EXPERT SYSTEM (RULE-BASED) ====================
-        rule_scores = {k: 0.0 for k in disease_risks}
-        rule_scores['No Disease'] = 0.15
-
-        # --- Malaria Rules ---
-        if temp > 25 and hum > 60:
-            rule_scores['Malaria'] += 0.2
-        if temp > 30 and hum > 80:
-            rule_scores['Malaria'] += 0.35
-        if rain > 100 and temp > 25:
-            rule_scores['Malaria'] += 0.25
-
-        # --- Dengue Rules ---
-        if temp > 25 and temp < 35 and hum > 60:
-            rule_scores['Dengue'] += 0.25
-        if rain > 50 and rain < 300 and hum > 70:
-            rule_scores['Dengue'] += 0.3
-        if temp > 28 and hum > 75:
-            rule_scores['Dengue'] += 0.2
-
-        # --- Typhoid Rules ---
-        if rain > 150:
-            rule_scores['Typhoid'] += 0.3
-        if rain > 250 and hum > 70:
-            rule_scores['Typhoid'] += 0.35
-        if temp > 25 and rain > 100:
-            rule_scores['Typhoid'] += 0.15
-
-        # --- Cholera Rules ---
-        if rain > 200 and temp > 25:
-            rule_scores['Cholera'] += 0.35
-        if rain > 300:
-            rule_scores['Cholera'] += 0.3
-        if hum > 80 and rain > 150:
-            rule_scores['Cholera'] += 0.2
-
-        # --- Asthma Rules ---
-        if air_quality > 100:
-            rule_scores['Asthma'] += 0.2
-        if air_quality > 150:
-            rule_scores['Asthma'] += 0.35
-        if air_quality > 200:
-            rule_scores['Asthma'] += 0.3
-        if air_quality > 300:
-            rule_scores['Asthma'] += 0.2
-
-        # --- Viral Fever Rules ---
-        if temp > 35:
-            rule_scores['Viral Fever'] += 0.25
-        if temp < 18:
-            rule_scores['Viral Fever'] += 0.3
-        if abs(temp - 25) > 10:
-            rule_scores['Viral Fever'] += 0.15
-
-        # --- Heat Stroke Rules ---
-        if temp > 38:
-            rule_scores['Heat Stroke'] += 0.4
-        if temp > 42:
-            rule_scores['Heat Stroke'] += 0.4
-        if temp > 35 and hum < 30:
-            rule_scores['Heat Stroke'] += 0.25
-
-        # --- Regional Risk Boost ---
-        if risk_level == 'High':
-            rule_scores['Malaria'] += 0.25
-            rule_scores['Dengue'] += 0.25
-            rule_scores['Viral Fever'] += 0.15
-        elif risk_level == 'Moderate':
-            rule_scores['Malaria'] += 0.1
-            rule_scores['Dengue'] += 0.1
-
-        # ==================== FUSION ====================
-        for k, rule_score in rule_scores.items():
-            if k in disease_risks:
-                if num_models > 0:
-                    disease_risks[k] = (disease_risks[k] * 0.6) + (rule_score * 0.4)
-                else:
-                    disease_risks[k] = rule_score
+def _row_sum(matrix):
+    """Left-to-right sum across columns (matches Python's sum over a dict)."""
+    total = matrix[:, 0].copy()
+    for j in range(1, matrix.shape[1]):
+        total += matrix[:, j]
+    return total
 
-        # Normalize
-        total_risk = sum(disease_risks.values())
-        if total_risk > 0:
-            for k in disease_risks:
-                disease_risks[k] /= total_risk
+# ==================== VECTORIZED RISK ENGINE ====================
+ENGINES = ('full', 'fast', 'cascade')
 
-        # Pick best
-        best_disease = max(disease_risks, key=disease_risks.get)
-        prediction = best_disease
-        accuracy = disease_risks[best_disease]
-        risk_score = round(accuracy * 100, 0)
+def _stage_name(model_name):
+    return f"predict_proba.{model_name.lower().replace(' ', '_')}"
 
-        # If "No Disease" wins but with low confidence, and something else is close, flag it
-        if prediction == 'No Disease' and accuracy < 0.3:
-            sorted_risks = sorted(disease_risks.items(), key=lambda x: x[1], reverse=True)
-            if len(sorted_risks) > 1 and sorted_risks[1][1] > 0.15:
-                prediction = sorted_risks[1][0]
-                accuracy = sorted_risks[1][1]
-                risk_score = round(accuracy * 100, 0)
-
-        severity = get_severity(risk_score)
-
-        # Get precautions
-        precautions = DISEASE_PRECAUTIONS.get(prediction, DISEASE_PRECAUTIONS['No Disease'])
-
-        # ==================== EXPLAINABLE AI ====================
-        feature_names = ['Temperature', 'Humidity', 'Rainfall', 'AQI']
-        feature_values = [temp, hum, rain, air_quality]
-        feature_units = ['°C', '%', 'mm', 'Index']
-
-        # 1) Model-based feature importance (from Random Forest)
-        model_importance = [0.25, 0.25, 0.25, 0.25]  # default equal
-        if os.path.exists(rf_model_path):
+def ensemble_scores(features, temporal=None):
+    """Average class probabilities of every available ensemble member.
+
+    Members whose artifacts have identical content (model.pkl is a copy of
+    the best member) are evaluated once; each copy still counts in the average.
+    ``temporal`` holds TEMPORAL_FEATURES per row (NaN rows for items without
+    history); the temporal forest joins the average for the rows that have them.
+    """
+    n = len(features)
+    risks = np.zeros((n, len(DISEASES)))
+    members = []
+    evaluated = {}
+
+    for model_name, mpath in ENSEMBLE_MEMBERS:
+        if os.path.exists(mpath):
             try:
-                rf = joblib.load(rf_model_path)
-                if hasattr(rf, 'feature_importances_'):
-                    imp = rf.feature_importances_
-                    model_importance = [round(float(x), 4) for x in imp]
+                model = registry.get(mpath)
+                if hasattr(model, 'predict_proba'):
+                    digest = registry.digest(mpath)
+                    if digest not in evaluated:
+                        with metrics.stage(_stage_name(model_name)):
+                            evaluated[digest] = model.predict_proba(features)
+                    probas = evaluated[digest]
+                    classes = model.classes_
+                    best_idx = np.argmax(probas, axis=1)
+                    conf = probas[np.arange(n), best_idx]
+
+                    # Accumulate probabilities
+                    for i, disease in registry.derived(mpath, 'class_index', _class_index):
+                        risks[:, DISEASE_INDEX[disease]] += probas[:, i]
+
+                    members.append((model_name, classes[best_idx], round_half_even(conf * 100, 1)))
+                else:
+                    members.append((model_name, model.predict(features), np.full(n, 85.0)))
             except Exception:
                 pass
 
-        # 2) Rule-based contribution analysis
-        # Measure how each feature's value triggered rule conditions
-        rule_contributions = {'Temperature': 0.0, 'Humidity': 0.0, 'Rainfall': 0.0, 'AQI': 0.0}
-
-        # Temperature contributions
-        if temp > 25: rule_contributions['Temperature'] += 0.15
-        if temp > 30: rule_contributions['Temperature'] += 0.2
-        if temp > 35: rule_contributions['Temperature'] += 0.25
-        if temp > 38: rule_contributions['Temperature'] += 0.3
-        if temp > 42: rule_contributions['Temperature'] += 0.3
-        if temp < 18: rule_contributions['Temperature'] += 0.25
-
-        # Humidity contributions
-        if hum > 60: rule_contributions['Humidity'] += 0.15
-        if hum > 70: rule_contributions['Humidity'] += 0.2
-        if hum > 75: rule_contributions['Humidity'] += 0.15
-        if hum > 80: rule_contributions['Humidity'] += 0.2
-        if hum < 30: rule_contributions['Humidity'] += 0.15
-
-        # Rainfall contributions
-        if rain > 50: rule_contributions['Rainfall'] += 0.1
-        if rain > 100: rule_contributions['Rainfall'] += 0.15
-        if rain > 150: rule_contributions['Rainfall'] += 0.2
-        if rain > 200: rule_contributions['Rainfall'] += 0.25
-        if rain > 250: rule_contributions['Rainfall'] += 0.2
-        if rain > 300: rule_contributions['Rainfall'] += 0.2
-
-        # AQI contributions
-        if air_quality > 100: rule_contributions['AQI'] += 0.15
-        if air_quality > 150: rule_contributions['AQI'] += 0.25
-        if air_quality > 200: rule_contributions['AQI'] += 0.25
-        if air_quality > 300: rule_contributions['AQI'] += 0.2
-
-        # Normalize rule contributions
-        total_rc = sum(rule_contributions.values())
-        if total_rc > 0:
-            rule_contributions = {k: round(v / total_rc, 4) for k, v in rule_contributions.items()}
+    # Average model probabilities
+    if temporal is not None and os.path.exists(temporal_model_path):
+        try:
+            dated = np.flatnonzero(~np.isnan(temporal).any(axis=1))
+            model = registry.get(temporal_model_path)
+            if len(dated) and hasattr(model, 'predict_proba'):
+                with metrics.stage(_stage_name('Temporal Forest')):
+                    probas = model.predict_proba(np.hstack([features[dated], temporal[dated]]))
+                class_index = registry.derived(temporal_model_path, 'class_index', _class_index)
+                best_idx = np.argmax(probas, axis=1)
+                preds = np.full(n, None, dtype=object)
+                preds[dated] = model.classes_[best_idx]
+                conf = np.full(n, np.nan)
+                conf[dated] = round_half_even(probas[np.arange(len(dated)), best_idx] * 100, 1)
+
+                for i, disease in class_index:
+                    risks[dated, DISEASE_INDEX[disease]] += probas[:, i]
+                counts = np.full(n, len(members))
+                counts[dated] += 1
+                members.append(('Temporal Forest', preds, conf))
+                risks /= np.maximum(counts, 1)[:, None]
+                return risks, members
+        except Exception:
+            pass
+    if members:
+        risks /= len(members)
+    return risks, members
+
+# ==================== CASCADE ENGINE ====================
+# engine='cascade' evaluates members cheapest first and stops, per row, once
+# the fused risk (ensemble so far + rules) is decisive: its top two diseases
+# are at least CASCADE_MARGIN apart. The RBF SVM, by far the slowest member,
+# then only sees the rows the others leave uncertain. Duplicate artifacts
+# are evaluated once with their copies' weight, so a row that runs every
+# member gets the full ensemble's average.
+CASCADE_ORDER = ('Logistic Regression', 'Random Forest', 'SVM', 'Primary Model')
+CASCADE_MARGIN = float(os.environ.get('PREDICT_CASCADE_MARGIN') or 0.15)
+
+def cascade_members():
+    """[(name, path, copies)] of the distinct available artifacts, cheapest first.
+
+    ``copies`` names every member sharing the artifact's content, ``name`` first.
+    """
+    paths = dict(ENSEMBLE_MEMBERS)
+    unique, by_digest = [], {}
+    for model_name in CASCADE_ORDER:
+        mpath = paths[model_name]
+        if not os.path.exists(mpath):
+            continue
+        digest = registry.digest(mpath)
+        if digest in by_digest:
+            unique[by_digest[digest]][2].append(model_name)
         else:
-            rule_contributions = {k: 0.25 for k in rule_contributions}
-
-        # 3) Combined importance (fused model + rule)
-        combined_importance = []
-        for i, name in enumerate(feature_names):
-            mi = model_importance[i] if i < len(model_importance) else 0.25
-            ri = rule_contributions.get(name, 0.25)
-            combined = round((mi * 0.5 + ri * 0.5) * 100, 1)
-            combined_importance.append(combined)
-
-        # Normalize combined to sum to 100
-        total_combined = sum(combined_importance)
-        if total_combined > 0:
-            combined_importance = [round(x / total_combined * 100, 1) for x in combined_importance]
-
-        # 4) Generate natural language reasoning
-        reasoning = []
-        thresholds = {
-            'Temperature': [(42, 'EXTREME heat (>{val}°C) — very strong trigger for heat stroke and disease'),
-                           (38, 'Very high temperature ({val}°C) — significant risk factor'),
-                           (35, 'High temperature ({val}°C) — triggers multiple disease pathways'),
-                           (30, 'Elevated temperature ({val}°C) — warm conditions favor vector-borne diseases'),
-                           (25, 'Moderate warmth ({val}°C) — above tropical disease activation threshold'),
-                           (18, None),  # handled separately
-                           (0, 'Low temperature ({val}°C) — cold stress may trigger viral infections')],
-            'Humidity': [(80, 'Very high humidity ({val}%) — ideal for mosquito breeding and pathogen survival'),
-                        (70, 'High humidity ({val}%) — favorable for disease vector proliferation'),
-                        (60, 'Moderate-high humidity ({val}%) — approaching disease-conducive levels'),
-                        (30, None),
-                        (0, 'Low humidity ({val}%) — dry conditions may aggravate respiratory issues')],
-            'Rainfall': [(300, 'Extreme rainfall ({val}mm) — high flood risk, water contamination likely'),
-                         (200, 'Heavy rainfall ({val}mm) — standing water creates vector breeding grounds'),
-                         (150, 'Significant rainfall ({val}mm) — water-borne disease risk elevated'),
-                         (100, 'Moderate rainfall ({val}mm) — conditions support mosquito life cycle'),
-                         (50, 'Light rainfall ({val}mm) — minor contribution to disease risk'),
-                         (0, 'Minimal or no rainfall ({val}mm) — dry conditions')],
-            'AQI': [(300, 'HAZARDOUS air quality (AQI {val}) — severe respiratory risk for all groups'),
-                    (200, 'Very unhealthy air quality (AQI {val}) — serious asthma and respiratory risk'),
-                    (150, 'Unhealthy air quality (AQI {val}) — significant respiratory disease trigger'),
-                    (100, 'Moderate air quality (AQI {val}) — sensitive groups may experience effects'),
-                    (50, 'Acceptable air quality (AQI {val}) — low respiratory risk'),
-                    (0, 'Good air quality (AQI {val}) — minimal respiratory risk')]
-        }
+            by_digest[digest] = len(unique)
+            unique.append([model_name, mpath, [model_name]])
+    return [(model_name, mpath, tuple(copies)) for model_name, mpath, copies in unique]
 
-        for i, (name, val) in enumerate(zip(feature_names, feature_values)):
-            thresh_list = thresholds.get(name, [])
-            reason_text = f'{name}: {val} — within normal range'
-            for thresh_val, desc in thresh_list:
-                if desc is None:
-                    continue
-                if val >= thresh_val:
-                    reason_text = desc.format(val=round(val, 1))
-                    break
+def _fuse(probabilities, rule_scores):
+    """Blend ensemble probabilities with rule scores 60/40 and normalize each row."""
+    return _normalize((probabilities * 0.6) + (rule_scores * 0.4))
+
+def _normalize(risks):
+    """Scale each row with a positive total to sum to 1, in place."""
+    total_risk = _row_sum(risks)
+    positive = total_risk > 0
+    risks[positive] /= total_risk[positive, None]
+    return risks
+
+def cascade_scores(features, rule_scores, margin=None):
+    """ensemble_scores, stopping per row once the fused top-two margin reaches ``margin``.
+
+    Returns (risks, members, used): members' predictions and confidences are
+    None / NaN on rows they did not evaluate, and used[r, m] tells whether
+    member m scored row r. Copies of one artifact are listed as separate
+    members with the same values, like ensemble_scores does.
+    """
+    margin = CASCADE_MARGIN if margin is None else margin
+    n = len(features)
+    totals = np.zeros((n, len(DISEASES)))
+    weights = np.zeros(n)
+    active = np.arange(n)
+    members, used = [], []
+
+    for model_name, mpath, copies in cascade_members():
+        if not len(active):
+            break
+        model = registry.get(mpath)
+        if model is None or not hasattr(model, 'predict_proba'):
+            continue
+        with metrics.stage(_stage_name(model_name)):
+            probas = model.predict_proba(features[active])
+        for i, disease in registry.derived(mpath, 'class_index', _class_index):
+            totals[active, DISEASE_INDEX[disease]] += len(copies) * probas[:, i]
+        weights[active] += len(copies)
+
+        best_idx = np.argmax(probas, axis=1)
+        preds = np.full(n, None, dtype=object)
+        preds[active] = model.classes_[best_idx]
+        conf = np.full(n, np.nan)
+        conf[active] = round_half_even(probas[np.arange(len(active)), best_idx] * 100, 1)
+        mask = np.zeros(n, dtype=bool)
+        mask[active] = True
+        for copy_name in copies:
+            members.append((copy_name, preds, conf))
+            used.append(mask)
+        metrics.inc(f"cascade_rows_{model_name.lower().replace(' ', '_')}", len(active))
+
+        # Rows whose fused risk is still close between the top two go on
+        fused = _fuse(totals[active] / weights[active, None], rule_scores[active])
+        top_two = np.partition(fused, -2, axis=1)[:, -2:]
+        active = active[top_two[:, 1] - top_two[:, 0] < margin]
+
+    scored = weights > 0
+    totals[scored] /= weights[scored, None]
+    return totals, members, np.column_stack(used) if used else np.zeros((n, 0), dtype=bool)
+
+def _fast_scores(features):
+    """Distilled-grid stand-in for ensemble_scores; None if missing or built from other models."""
+    if not os.path.exists(fast_model_path):
+        _fast_fallback(len(features), 'no distilled grid (run train_model.py --distill)')
+        return None
+    grid = registry.get(fast_model_path)
+    if grid is None or not grid.is_current(registry):
+        _fast_fallback(len(features), 'the distilled grid was built from other models '
+                                      '(re-run train_model.py --distill)')
+        return None
+    probas = grid.predict_proba(features)
+    best_idx = np.argmax(probas, axis=1)
+    conf = probas[np.arange(len(features)), best_idx]
+    return probas, [('Distilled Ensemble', grid.classes_[best_idx], round_half_even(conf * 100, 1))]
+
+def _fast_fallback(n, reason):
+    """Count rows the full ensemble scores for engine='fast', and say why once per process."""
+    metrics.inc('fast_fallback_rows', n)
+    if reason not in _fast_fallback_warned:
+        _fast_fallback_warned.add(reason)
+        print(json.dumps({"warning": f"engine 'fast' fell back to the full ensemble: {reason}"}), file=sys.stderr)
+
+_fast_fallback_warned = set()
+
+def _rule_scores(features, risk_level):
+    """Expert-system scores for every row, one column per disease."""
+    return PREDICTION_RULES(features) + risk_level_boost(risk_level)
+
+def _rule_contributions(features):
+    """How strongly each feature's value triggered rule conditions, per row."""
+    return CONTRIBUTION_RULES(features)
+
+def score_features(features, risk_level='Low', engine='full', compact=None, margin=None, temporal=None):
+    """Fused ensemble + expert-system risk for an (N, 4) feature matrix.
+
+    engine='fast' replaces the ensemble with the distilled lookup grid
+    (train_model.py --distill); it falls back to the full ensemble, with a
+    warning on stderr, when no grid matches the current models; 'engine'
+    holds the engine that ran. engine='cascade' evaluates members
+    cheapest first until the fused margin reaches ``margin`` (default
+    CASCADE_MARGIN) and adds a per-row ``used`` member mask. compact=True
+    scores a float32 matrix (default: COMPACT). ``temporal`` (N, k) rolling
+    features let the full engine add the temporal forest (see
+    ensemble_scores). Returns a dict of per-row arrays; see build_results
+    for the JSON shape.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}' (expected one of: {', '.join(ENGINES)})")
+    dtype = np.float32 if (COMPACT if compact is None else compact) else np.float64
+    features = np.asarray(features, dtype=dtype).reshape(-1, len(FEATURE_NAMES))
+    n = len(features)
+    rows = np.arange(n)
+
+    used = fast = None
+    if engine == 'cascade':
+        # The cascade needs the rule scores to decide when to stop
+        with metrics.stage('rules'):
+            rule_scores = _rule_scores(features, risk_level)
+        with metrics.stage('ensemble'):
+            risks, members, used = cascade_scores(features, rule_scores, margin)
+    else:
+        # ==================== ENSEMBLE MODEL PREDICTIONS ====================
+        with metrics.stage('ensemble'):
+            fast = _fast_scores(features) if engine == 'fast' else None
+            risks, members = fast if fast is not None else ensemble_scores(features, temporal)
+
+        # ==================== EXPERT SYSTEM (RULE-BASED) ====================
+        with metrics.stage('rules'):
+            rule_scores = _rule_scores(features, risk_level)
+
+    # ==================== FUSION ====================
+    with metrics.stage('fusion'):
+        risks = _fuse(risks, rule_scores) if members else _normalize(rule_scores)
+
+        # Pick best
+        prediction = np.argmax(risks, axis=1)
+        accuracy = risks[rows, prediction]
+
+        # If "No Disease" wins but with low confidence, and something else is close, flag it
+        others = risks.copy()
+        others[:, NO_DISEASE] = -np.inf
+        runner_up = np.argmax(others, axis=1)
+        flagged = (prediction == NO_DISEASE) & (accuracy < 0.3) & (risks[rows, runner_up] > 0.15)
+        prediction = np.where(flagged, runner_up, prediction)
+        accuracy = risks[rows, prediction]
+        risk_score = round_half_even(accuracy * 100, 0)
+    metrics.inc('rows_scored', n)
+
+    return {
+        'features': features,
+        'risk_level': risk_level,
+        'risks': risks,
+        'members': members,
+        'used': used,
+        'engine': 'full' if engine == 'fast' and fast is None else engine,
+        'requested_engine': engine,
+        'prediction': prediction,
+        'accuracy': accuracy,
+        'risk_score': risk_score,
+        'severity': np.searchsorted(SEVERITY_THRESHOLDS, risk_score, side='right')
+    }
+
+def _rf_shap(features, prediction):
+    """Random Forest TreeSHAP for each row's predicted disease, in percent.
+
+    Returns (base value (N,), per-feature contributions (N, 4)), or None when
+    no forest is available.
+    """
+    if not os.path.exists(rf_model_path):
+        return None
+    try:
+        explainer = registry.derived(rf_model_path, 'tree_shap', ForestShap)
+        columns = registry.derived(rf_model_path, 'disease_columns', _disease_columns)[prediction]
+    except Exception:
+        return None
+    rows = np.arange(len(features))
+    known = columns >= 0
+    phi = explainer.shap_values(features)[rows, :, columns] * known[:, None]
+    return explainer.expected_value[columns] * known * 100, phi * 100
+
+def explain_scores(scores):
+    """Explainability arrays (importances, reasoning order, waterfall) for scored rows."""
+    features = scores['features']
+    n = len(features)
+
+    # 1) Model-based feature importance (from Random Forest)
+    model_importance = [0.25, 0.25, 0.25, 0.25]  # default equal
+    if os.path.exists(rf_model_path):
+        try:
+            if hasattr(registry.get(rf_model_path), 'feature_importances_'):
+                model_importance = registry.derived(rf_model_path, 'feature_importances', _feature_importances)
+        except Exception:
+            pass
+
+    # 2) Rule-based contribution analysis, normalized per row
+    contributions = _rule_contributions(features)
+    total_rc = _row_sum(contributions)
+    rule_importance = np.full_like(contributions, 0.25)
+    positive = total_rc > 0
+    rule_importance[positive] = round_half_even(contributions[positive] / total_rc[positive, None], 4)
+
+    # 3) Combined importance (fused model + rule), normalized to sum to 100
+    mi = np.array([model_importance[i] if i < len(model_importance) else 0.25
+                   for i in range(len(FEATURE_NAMES))])
+    combined = round_half_even((mi * 0.5 + rule_importance * 0.5) * 100, 1)
+    total_combined = _row_sum(combined)
+    positive = total_combined > 0
+    combined[positive] = round_half_even(combined[positive] / total_combined[positive, None] * 100, 1)
+
+    # 4) Reasoning template per feature: first threshold the value reaches
+    templates = np.full((n, len(FEATURE_NAMES)), -1)
+    for j, name in enumerate(FEATURE_NAMES):
+        for k in range(len(REASONING_THRESHOLDS[name]) - 1, -1, -1):
+            thresh_val, desc = REASONING_THRESHOLDS[name][k]
+            if desc is not None:
+                templates[features[:, j] >= thresh_val, j] = k
+
+    # Sort by importance descending (stable, like list.sort)
+    order = np.argsort(-combined, axis=1, kind='stable')
+
+    # 5) Waterfall data: exact TreeSHAP contributions of the Random Forest for
+    # the predicted disease, followed by the shift the rest of the ensemble and
+    # the rules add. Without a forest, the risk above the 12.5% base rate
+    # (1/8 diseases) is split by combined importance.
+    shap = _rf_shap(features, scores['prediction'])
+    if shap is not None:
+        base_risk, shap_values = shap
+        deltas = np.take_along_axis(shap_values, order, axis=1)
+    else:
+        base_risk, shap_values = np.full(n, 12.5), None
+        sorted_importance = np.take_along_axis(combined, order, axis=1)
+        deltas = (sorted_importance / 100) * (scores['risk_score'][:, None] - base_risk[:, None])
+    cumulative = np.empty_like(deltas)
+    running = base_risk
+    for j in range(deltas.shape[1]):
+        running = running + deltas[:, j]
+        cumulative[:, j] = running
+
+    return {
+        'model_importance': model_importance,
+        'rule_importance': rule_importance,
+        'combined_importance': combined,
+        'templates': templates,
+        'order': order,
+        'base_risk': base_risk,
+        'shap_values': shap_values,
+        'deltas': deltas,
+        'cumulative': cumulative
+    }
+
+def _explainability(scores, explained):
+    """Per-row explainability payloads (importances, reasoning text, waterfall)."""
+    n = len(scores['features'])
+    values = scores['features'].tolist()
+    rounded_values = round_half_even(scores['features'], 1).tolist()
+    final_risk = round_half_even(scores['risk_score'], 1).tolist()
+
+    # Identical for every row, so all payloads share one dict
+    model_importance = dict(zip(FEATURE_NAMES, explained['model_importance']))
+    rule_importance = explained['rule_importance'].tolist()
+    combined = explained['combined_importance'].tolist()
+    # high_risk above 25% of the combined importance, moderate above 15%
+    directions = DIRECTIONS[(explained['combined_importance'] > 15).astype(int)
+                            + (explained['combined_importance'] > 25)].tolist()
+    templates = explained['templates'].tolist()
+    order = explained['order'].tolist()
+    deltas = explained['deltas'].tolist()
+    delta_values = round_half_even(explained['deltas'], 1).tolist()
+    cumulative = round_half_even(explained['cumulative'], 1).tolist()
+    base_risk = round_half_even(explained['base_risk'], 1).tolist()
+    shap_values = explained['shap_values']
+    if shap_values is not None:
+        shap_rounded = round_half_even(shap_values, 2).tolist()
+        model_risk = round_half_even(explained['cumulative'][:, -1], 1).tolist()
+        # Everything the other members and the rules add on top of the forest
+        adjustment = scores['risk_score'] - explained['cumulative'][:, -1]
+        adjustment_values = round_half_even(adjustment, 1).tolist()
+
+    payloads = []
+    for r in range(n):
+        prediction = DISEASES[scores['prediction'][r]]
+
+        reasoning = []
+        for i in order[r]:
+            val = rounded_values[r][i]
+            k = templates[r][i]
             reasoning.append({
-                'feature': name,
-                'value': round(val, 1),
-                'unit': feature_units[i],
-                'importance': combined_importance[i],
-                'reasoning': reason_text,
-                'direction': 'high_risk' if combined_importance[i] > 25 else ('moderate' if combined_importance[i] > 15 else 'low_risk')
+                'feature': FEATURE_NAMES[i],
+                'value': val,
+                'unit': FEATURE_UNITS[i],
+                'importance': combined[r][i],
+                'reasoning': REASONING_FORMATS[i][k](val=val) if k >= 0 else NORMAL_RANGE_FORMATS[i](values[r][i]),
+                'direction': directions[r][i]
             })
 
-        # Sort by importance descending
-        reasoning.sort(key=lambda x: x['importance'], reverse=True)
-
-        # 5) SHAP-like waterfall data
-        base_risk = 12.5  # base rate with 8 diseases = 1/8 = 12.5%
-        waterfall = [{'label': 'Base Rate', 'value': base_risk, 'cumulative': base_risk, 'type': 'base'}]
-        cumulative = base_risk
-        for r in reasoning:
-            delta = (r['importance'] / 100) * (risk_score - base_risk)
-            cumulative += delta
+        waterfall = [{'label': 'Base Rate', 'value': base_risk[r], 'cumulative': base_risk[r], 'type': 'base'}]
+        for j, step in enumerate(reasoning):
             waterfall.append({
-                'label': r['feature'],
-                'value': round(delta, 1),
-                'cumulative': round(cumulative, 1),
-                'type': 'increase' if delta > 0 else 'decrease'
+                'label': step['feature'],
+                'value': delta_values[r][j],
+                'cumulative': cumulative[r][j],
+                'type': 'increase' if deltas[r][j] > 0 else 'decrease'
             })
-        waterfall.append({'label': 'Final Risk', 'value': round(risk_score, 1), 'cumulative': round(risk_score, 1), 'type': 'total'})
+        if shap_values is not None:
+            waterfall.append({
+                'label': 'Ensemble & Rules',
+                'value': adjustment_values[r],
+                'cumulative': final_risk[r],
+                'type': 'increase' if adjustment[r] > 0 else 'decrease'
+            })
+        waterfall.append({'label': 'Final Risk', 'value': final_risk[r], 'cumulative': final_risk[r], 'type': 'total'})
 
-        explainability = {
-            'model_importance': {feature_names[i]: model_importance[i] for i in range(len(feature_names))},
-            'rule_importance': rule_contributions,
-            'combined_importance': {feature_names[i]: combined_importance[i] for i in range(len(feature_names))},
+        top = reasoning[0]
+        payload = {
+            'model_importance': model_importance,
+            'rule_importance': dict(zip(FEATURE_NAMES, rule_importance[r])),
+            'combined_importance': dict(zip(FEATURE_NAMES, combined[r])),
             'reasoning': reasoning,
             'waterfall': waterfall,
-            'dominant_feature': reasoning[0]['feature'] if reasoning else 'Unknown',
-            'explanation_summary': f"The predicted disease '{prediction}' is primarily driven by {reasoning[0]['feature']} ({reasoning[0]['value']}{reasoning[0]['unit']}), contributing {reasoning[0]['importance']}% to the overall risk assessment."
+            'dominant_feature': top['feature'],
+            'explanation_summary': f"The predicted disease '{prediction}' is primarily driven by {top['feature']} "
+                                   f"({top['value']}{top['unit']}), contributing {top['importance']}% to the overall "
+                                   f"risk assessment."
         }
+        if shap_values is not None:
+            # Per-row TreeSHAP of the Random Forest's probability for the predicted disease (%)
+            payload['shap'] = {
+                'model': 'Random Forest',
+                'base_value': base_risk[r],
+                'values': {FEATURE_NAMES[i]: shap_rounded[r][i] for i in range(len(FEATURE_NAMES))},
+                'model_risk': model_risk[r]
+            }
+        payloads.append(payload)
+    return payloads
+
+def build_results(scores, explained=None, detail='full'):
+    """Assemble the per-row JSON-ready result dicts from score/explain arrays.
 
+    ``detail`` picks the payload: 'minimal' (disease, accuracy, risk context,
+    score and severity), 'standard' (+ precautions, per-disease risks and
+    ensemble votes) or 'full' (+ explainability). Explainability is only
+    computed for 'full'.
+    """
+    if detail not in DETAIL_LEVELS:
+        raise ValueError(f"Unknown detail level '{detail}' (expected one of: {', '.join(DETAIL_LEVELS)})")
+    if detail == 'full' and explained is None:
+        with metrics.stage('explain'):
+            explained = explain_scores(scores)
+    with metrics.stage('payload'):
+        return _payloads(scores, explained, detail)
+
+def _payloads(scores, explained, detail):
+    n = len(scores['features'])
+    risk_level = scores['risk_level']
+
+    accuracy = round_half_even(scores['accuracy'] * 100, 2).tolist()
+    risk_score = scores['risk_score'].tolist()
+    if detail != 'minimal':
+        disease_risks = round_half_even(scores['risks'] * 100, 1).tolist()
+        members = [(name, preds.tolist(), conf.tolist()) for name, preds, conf in scores['members']]
+    if scores.get('used') is not None:
+        # Cascade: only the members that scored the row are reported
+        member_names = [name for name, _, _ in scores['members']]
+        patterns = scores['used'] @ (1 << np.arange(len(member_names)))
+        names = {p: [name for m, name in enumerate(member_names) if p >> m & 1] for p in np.unique(patterns).tolist()}
+        used = [list(names[p]) for p in patterns.tolist()]
+    if detail == 'full':
+        explainability = _explainability(scores, explained)
+
+    results = []
+    for r in range(n):
+        prediction = DISEASES[scores['prediction'][r]]
         result = {
             "disease": prediction,
-            "accuracy": round(accuracy * 100, 2),
+            "accuracy": accuracy[r],
             "risk_context": risk_level,
-            "risk_score": risk_score,
-            "severity": severity,
-            "precautions": precautions,
-            "disease_risks": {k: round(v * 100, 1) for k, v in disease_risks.items()},
-            "ensemble": ensemble_results if ensemble_results else None,
-            "explainability": explainability
+            "risk_score": risk_score[r],
+            "severity": SEVERITY_LEVELS[scores['severity'][r]]
         }
+        if scores.get('used') is not None:
+            result["members_used"] = used[r]
+        if scores.get('requested_engine') == 'fast':
+            # Tells distilled results apart from those of a fallback to the full ensemble
+            result["engine"] = scores['engine']
+        if detail != 'minimal':
+            ensemble_results = {name: {'prediction': str(preds[r]), 'confidence': conf[r]}
+                                for name, preds, conf in members if preds[r] is not None}
+            result["precautions"] = DISEASE_PRECAUTIONS[prediction]
+            result["disease_risks"] = dict(zip(DISEASES, disease_risks[r]))
+            result["ensemble"] = ensemble_results if ensemble_results else None
+        if detail == 'full':
+            result["explainability"] = explainability[r]
+        results.append(result)
+    return results
+
+def _error_result(e):
+    return {"error": str(e), "trace": traceback.format_exc()}
+
+def model_version():
+    """Fingerprint of every artifact that can influence a cached result.
+
+    Artifacts no request has used yet are hashed without being loaded. The
+    temporal forest is left out: rows it scores never go through the cache.
+    """
+    return registry.fingerprint([mpath for _, mpath in ENSEMBLE_MEMBERS] + [fast_model_path])
+
+def _cache_key(values, risk_level, engine, detail):
+    if engine == 'cascade':
+        engine = f'cascade:{CASCADE_MARGIN:g}'
+    # Compact results can differ in the last digits, so they are cached apart
+    if COMPACT:
+        return (tuple(values), risk_level, engine, detail, 'compact')
+    return (tuple(values), risk_level, engine, detail)
+
+class FeatureBuffer(object):
+    """A feature matrix allocated once and refilled for every chunk of a stream.
+
+    Grows only when a chunk is larger than any before it. The view returned by
+    fill() is overwritten by the next call.
+    """
+
+    def __init__(self, capacity=0, dtype=None):
+        self.array = np.empty((capacity, len(FEATURE_NAMES)), dtype=dtype or (np.float32 if COMPACT else np.float64))
+
+    def fill(self, rows):
+        if len(rows) > len(self.array):
+            self.array = np.empty((len(rows), self.array.shape[1]), dtype=self.array.dtype)
+        view = self.array[:len(rows)]
+        view[...] = rows
+        return view
+
+def predict_batch(inputs, risk_level='Low', engine='full', detail='standard', buffer=None):
+    """Score many items with one model call per ensemble member.
+
+    Rows already in the result cache are not rescored. Explainability is
+    skipped unless detail='full'. The feature matrix is written into
+    ``buffer`` (a FeatureBuffer) when given instead of a new array. With a
+    temporal state, items with ``location`` and ``date`` update their
+    location's history in input order and are scored with its rolling
+    features (never from the cache, since their history keeps changing).
+    Items marked ``"observed": false`` (forecasts) are scored against a copy
+    of the history taken at the batch's first such item, so predicted
+    weather never enters the saved state. Without a temporal forest, dated
+    items go through the cache like any other and only report their features.
+    """
+    with metrics.stage('prepare'):
+        version = model_version() if result_cache.enabled else None
+        rows, pending, valid, results = [], {}, [], [None] * len(inputs)
+        histories, reported, forecast_state = {}, {}, None
+        temporal_model = temporal_state is not None and os.path.exists(temporal_model_path)
+        for idx, item in enumerate(inputs):
+            try:
+                values = result_cache.quantize([float(item['temp']), float(item['humidity']),
+                                                float(item['rainfall']), float(item['aqi'])])
+            except (KeyError, TypeError, ValueError) as e:
+                results[idx] = _error_result(e)
+                continue
+            if temporal_state is not None and item.get('location') is not None and item.get('date'):
+                with metrics.stage('temporal'):
+                    state = temporal_state
+                    if item.get('observed', True) is False:
+                        if forecast_state is None:
+                            forecast_state = temporal_state.copy(
+                                {other['location'] for other in inputs[idx:]
+                                 if isinstance(other, dict) and other.get('observed', True) is False})
+                        state = forecast_state
+                    try:
+                        history = state.update(item['location'], item['date'], *values[:3])
+                    except ValueError:
+                        # Unparseable date: scored on the day's values alone
+                        history = None
+                if history is not None:
+                    reported[idx] = history
+                    if temporal_model:
+                        histories[len(rows)] = history
+                        valid.append((idx, len(rows)))
+                        rows.append(values)
+                        continue
+            key = _cache_key(values, risk_level, engine, detail)
+            if key not in pending:
+                results[idx] = result_cache.get(key, version)
+                if results[idx] is not None:
+                    continue
+                # Repeated inputs within the batch are scored once
+                pending[key] = len(rows)
+                rows.append(values)
+            valid.append((idx, pending[key]))
+
+    if rows:
+        try:
+            features = buffer.fill(rows) if buffer is not None else rows
+            temporal = None
+            if histories:
+                temporal = np.full((len(rows), len(TEMPORAL_FEATURES)), np.nan)
+                for pos, history in histories.items():
+                    temporal[pos] = history
+            scored = build_results(score_features(features, risk_level, engine, temporal=temporal), detail=detail)
+        except Exception as e:
+            scored = [_error_result(e) for _ in rows]
+        for key, pos in pending.items():
+            result_cache.put(key, version, scored[pos])
+        for idx, pos in valid:
+            results[idx] = dict(scored[pos])
+
+    for idx, history in reported.items():
+        if detail != 'minimal' and 'error' not in results[idx]:
+            results[idx]['temporal_features'] = dict(zip(TEMPORAL_FEATURES, round_half_even(history, 2).tolist()))
+
+    for item, res in zip(inputs, results):
+        res['date'] = item.get('date', '')
+    return results
+
+def write_output(stream, value, output_format='json'):
+    """Write one result (or list of results) as a JSON line or a MessagePack object."""
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}' (expected one of: {', '.join(OUTPUT_FORMATS)})")
+    with metrics.stage('serialize'):
+        if output_format == 'msgpack':
+            getattr(stream, 'buffer', stream).write(msgpack_dumps(value))
+        else:
+            stream.write(encoder.dumps(value) + '\n')
+
+# ==================== STREAMING BATCH MODE ====================
+STREAM_CHUNK_SIZE = 5000
+
+def _read_ndjson(stream):
+    """Decoded items from newline-delimited JSON; undecodable lines become error results."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+            if not isinstance(item, dict):
+                raise ValueError(f"Expected a JSON object per line, got {type(item).__name__}")
+            yield item
+        except ValueError as e:
+            yield dict(_error_result(e), date='')
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def stream_batch(stream_in, stream_out, risk_level='Low', engine='full', chunk_size=STREAM_CHUNK_SIZE,
+                 detail='standard', store=None, output_format='json'):
+    """Score NDJSON items from stream_in, writing one result line per input line.
+
+    Input is consumed and scored chunk_size rows at a time, and each chunk's
+    results are flushed before the next is read, so memory stays flat for any
+    input length and callers can consume results as they arrive. Output lines
+    are in input order. Scored rows are also added to ``store`` (a
+    prediction_store.PredictionStore) when given. With output_format='msgpack'
+    each result is one MessagePack object instead of a JSON line. Every
+    chunk is scored in the same preallocated feature buffer. Returns the
+    number of rows written.
+    """
+    written = 0
+    buffer = FeatureBuffer(chunk_size)
+    for chunk in _chunks(_read_ndjson(stream_in), chunk_size):
+        # Lines that failed to decode already hold their error result
+        items = [item for item in chunk if 'error' not in item]
+        results = predict_batch(items, risk_level, engine, detail, buffer) if items else []
+        if store is not None:
+            with metrics.stage('persist'):
+                store.add(items, results)
+        scored = iter(results)
+        rows = [item if 'error' in item else next(scored) for item in chunk]
+        if output_format == 'msgpack':
+            for row in rows:
+                write_output(stream_out, row, output_format)
+        else:
+            with metrics.stage('serialize'):
+                lines = encoder.lines(rows)
+            stream_out.write('\n'.join(lines) + '\n')
+        stream_out.flush()
+        written += len(rows)
+    return written
+
+# ==================== OUTBREAK EARLY WARNING ====================
+# Scores a (locations x days x features) forecast for every outbreak-prone
+# disease in one vectorized pass: the thresholds of rules.OUTBREAK_THRESHOLDS
+# each day meets, the longest run of consecutive days meeting all of them,
+# seasonal-peak multipliers and the fused ensemble probability of each day.
+# A national run over every district and the whole horizon is one
+# score_features call plus a few array reductions, in one process.
+
+OUTBREAK_DISEASES = [threshold.disease for threshold in OUTBREAK_THRESHOLDS]
+# Score per met condition, in FEATURES order
+OUTBREAK_WEIGHTS = np.array([20.0, 15.0, 20.0, 25.0])
+SEASONAL_PEAK_MULTIPLIER = 1.25
+# Share of a day's score taken from the disease's fused ensemble probability
+OUTBREAK_ENSEMBLE_WEIGHT = 0.3
+# Added per extra consecutive day that meets every threshold, up to the cap
+OUTBREAK_RUN_BONUS = 5.0
+OUTBREAK_RUN_BONUS_CAP = 20.0
+# Alert level -> minimum score, highest first; scores below the last are not warnings
+ALERT_LEVELS = (('CRITICAL', 75), ('HIGH', 55), ('ELEVATED', 35), ('ADVISORY', 15))
+
+def _outbreak_tables():
+    """OUTBREAK_THRESHOLDS as arrays over (disease, ...)."""
+    n_bands = max(len(threshold.temperature) for threshold in OUTBREAK_THRESHOLDS)
+    # Padding bands are NaN, which no temperature falls in
+    lows = np.full((len(OUTBREAK_THRESHOLDS), n_bands), np.nan)
+    highs = np.full((len(OUTBREAK_THRESHOLDS), n_bands), np.nan)
+    # Humidity, rainfall and AQI minimums; NaN where the feature is not a factor
+    minimums = np.full((len(OUTBREAK_THRESHOLDS), 3), np.nan)
+    peak_months = np.zeros((13, len(OUTBREAK_THRESHOLDS)), dtype=bool)
+    for k, threshold in enumerate(OUTBREAK_THRESHOLDS):
+        for b, (low, high) in enumerate(threshold.temperature):
+            lows[k, b], highs[k, b] = low, high
+        minimums[k] = [threshold.humidity, threshold.rainfall or np.nan,
+                       np.nan if threshold.aqi is None else threshold.aqi]
+        peak_months[list(threshold.seasonal_peak), k] = True
+    applicable = np.hstack([np.ones((len(OUTBREAK_THRESHOLDS), 1), dtype=bool), ~np.isnan(minimums)])
+    # A zero minimum always holds: it scores, but is not worth reporting as a trigger
+    reported = applicable & np.hstack([np.ones((len(OUTBREAK_THRESHOLDS), 1)), minimums]).astype(bool)
+    multipliers = np.array([threshold.multiplier for threshold in OUTBREAK_THRESHOLDS])
+    columns = np.array([DISEASE_INDEX[disease] for disease in OUTBREAK_DISEASES])
+    return lows, highs, minimums, applicable, reported, peak_months, multipliers, columns
+
+(OUTBREAK_LOWS, OUTBREAK_HIGHS, OUTBREAK_MINIMUMS, OUTBREAK_APPLICABLE, OUTBREAK_REPORTED, OUTBREAK_PEAK_MONTHS,
+ OUTBREAK_MULTIPLIERS, OUTBREAK_COLUMNS) = _outbreak_tables()
+
+def _alert_level(score):
+    for level, minimum in ALERT_LEVELS:
+        if score >= minimum:
+            return level
+    return 'Normal'
+
+def _months(dates):
+    return [date.fromisoformat(str(day)[:10]).month for day in dates]
+
+def outbreak_scores(forecast, months=None, risk_level='Low', engine='full'):
+    """Outbreak risk of every disease in OUTBREAK_DISEASES, per location and day.
+
+    ``forecast`` is a (locations, days, 4) array (a single location may be
+    (days, 4)); days with a missing or non-finite value are skipped.
+    ``months`` (1-12) gives each day's month, per day or per (location, day),
+    and defaults to the current month. Returns (locations, days, diseases)
+    arrays ``met`` (per feature, an extra last axis), ``exceeded`` (every
+    applicable threshold met), ``seasonal``, ``probability`` and
+    ``day_score``, and per (location, disease) ``run_days`` (longest run of
+    exceeded days), ``run_start`` (-1 without one), ``peak_day`` and the
+    final ``score`` (peak day score plus the run bonus, 0-100).
+    """
+    forecast = np.asarray(forecast, dtype=np.float64)
+    if forecast.ndim == 2:
+        forecast = forecast[np.newaxis]
+    if forecast.ndim != 3 or forecast.shape[-1] != len(FEATURE_NAMES):
+        raise ValueError(f"Expected a (locations, days, {len(FEATURE_NAMES)}) forecast, got shape {forecast.shape}")
+    n_locations, n_days = forecast.shape[:2]
+    if months is None:
+        months = time.localtime().tm_mon
+    months = np.broadcast_to(np.asarray(months, dtype=np.int64), (n_locations, n_days))
+    if months.size and (months.min() < 1 or months.max() > 12):
+        raise ValueError("Months must be between 1 and 12")
+    valid = np.isfinite(forecast).all(axis=-1)
+
+    with metrics.stage('outbreak_thresholds'):
+        met = np.empty((n_locations, n_days, len(OUTBREAK_DISEASES), len(FEATURE_NAMES)), dtype=bool)
+        temperature = forecast[..., 0, np.newaxis, np.newaxis]
+        met[..., 0] = ((temperature >= OUTBREAK_LOWS) & (temperature <= OUTBREAK_HIGHS)).any(axis=-1)
+        met[..., 1:] = forecast[..., np.newaxis, 1:] >= OUTBREAK_MINIMUMS
+        met &= valid[..., np.newaxis, np.newaxis]
+        exceeded = (met | ~OUTBREAK_APPLICABLE).all(axis=-1) & valid[..., np.newaxis]
+        seasonal = OUTBREAK_PEAK_MONTHS[months]
+        threshold_score = (met @ OUTBREAK_WEIGHTS) * OUTBREAK_MULTIPLIERS
+        threshold_score *= np.where(seasonal, SEASONAL_PEAK_MULTIPLIER, 1.0)
+
+    probability = np.zeros(exceeded.shape)
+    rows = valid.ravel()
+    if rows.any():
+        scores = score_features(forecast.reshape(-1, len(FEATURE_NAMES))[rows], risk_level, engine)
+        probability.reshape(-1, len(OUTBREAK_DISEASES))[rows] = scores['risks'][:, OUTBREAK_COLUMNS] * 100
+
+    with metrics.stage('outbreak_runs'):
+        day_score = np.minimum((1 - OUTBREAK_ENSEMBLE_WEIGHT) * threshold_score
+                               + OUTBREAK_ENSEMBLE_WEIGHT * probability, 100)
+        # Length of the run of exceeded days ending at each day: running count
+        # minus the count at the last day that broke the run
+        count = np.cumsum(exceeded, axis=1)
+        run = count - np.maximum.accumulate(np.where(exceeded, 0, count), axis=1)
+        run_days = run.max(axis=1)
+        run_start = np.where(run_days > 0, run.argmax(axis=1) - run_days + 1, -1)
+        peak_day = day_score.argmax(axis=1)
+        peak = np.take_along_axis(day_score, peak_day[:, np.newaxis], axis=1)[:, 0]
+        bonus = np.minimum(OUTBREAK_RUN_BONUS * np.maximum(run_days - 1, 0), OUTBREAK_RUN_BONUS_CAP)
+        score = round_half_even(np.minimum(peak + bonus, 100), 0)
+
+    return {
+        'forecast': forecast,
+        'met': met,
+        'exceeded': exceeded,
+        'seasonal': seasonal,
+        'probability': probability,
+        'day_score': day_score,
+        'run_days': run_days,
+        'run_start': run_start,
+        'peak_day': peak_day,
+        'score': score
+    }
+
+def outbreak_warnings(scores, locations=None, dates=None, min_score=ALERT_LEVELS[-1][1], top=None):
+    """Ranked warnings from outbreak_scores: highest score first, then longest run.
+
+    Locations and days are reported by name when ``locations`` / ``dates``
+    are given, else by index. Only scores of at least ``min_score`` are
+    kept, and at most ``top`` warnings when given.
+    """
+    score, run_days = scores['score'], scores['run_days']
+    loc_idx, disease_idx = np.nonzero(score >= min_score)
+    order = np.lexsort((disease_idx, loc_idx, -run_days[loc_idx, disease_idx], -score[loc_idx, disease_idx]))
+    if top is not None:
+        order = order[:top]
+
+    def day_label(day):
+        return dates[day] if dates is not None else int(day)
+
+    warnings_out = []
+    for i in order:
+        l, k = loc_idx[i], disease_idx[i]
+        peak = scores['peak_day'][l, k]
+        start = scores['run_start'][l, k]
+        met = scores['met'][l, peak, k] & OUTBREAK_REPORTED[k]
+        warnings_out.append({
+            'location': locations[l] if locations is not None else int(l),
+            'disease': OUTBREAK_DISEASES[k],
+            'risk_score': int(score[l, k]),
+            'alert_level': _alert_level(score[l, k]),
+            'peak_day': day_label(peak),
+            'peak_score': round(float(scores['day_score'][l, peak, k]), 1),
+            'probability': round(float(scores['probability'][l, peak, k]), 1),
+            'run_days': int(run_days[l, k]),
+            'run_start': day_label(start) if start >= 0 else None,
+            'seasonal': bool(scores['seasonal'][l, peak, k]),
+            'triggers': [feature for feature, hit in zip(FEATURES, met) if hit],
+            'conditions': dict(zip(FEATURES, round_half_even(scores['forecast'][l, peak], 1).tolist()))
+        })
+    return warnings_out
+
+def outbreak_report(forecast, locations=None, dates=None, months=None, risk_level='Low', engine='full',
+                    min_score=ALERT_LEVELS[-1][1], top=None, timeline=False):
+    """Score a forecast and rank its warnings (the 'outbreak' serve op and --outbreak).
+
+    Day months come from ``dates`` ('YYYY-MM-DD', one per day) unless
+    ``months`` is given. timeline=True adds each location's daily score per
+    disease.
+    """
+    with metrics.stage('outbreak'):
+        if months is None and dates is not None:
+            months = _months(dates)
+        scores = outbreak_scores(forecast, months, risk_level, engine)
+        report = {
+            'locations': int(scores['score'].shape[0]),
+            'days': int(scores['day_score'].shape[1]),
+            'warnings': outbreak_warnings(scores, locations, dates, min_score, top)
+        }
+        if timeline:
+            daily = round_half_even(scores['day_score'], 0).astype(int).tolist()
+            report['timeline'] = [[dict(zip(OUTBREAK_DISEASES, day)) for day in location] for location in daily]
+    return report
+
+def load_forecast(path):
+    """(forecast, locations, dates) from a forecast file for --outbreak.
+
+    .json: an object with ``forecast`` ((locations, days, 4) nested lists)
+    and optional ``locations`` and ``dates``, as in the 'outbreak' serve op.
+    .npz: one (locations, days) array per variable (temperature, humidity,
+    rainfall, aqi; dataset column aliases accepted) and optional
+    ``location`` / ``date`` vectors. .npy: a single (locations, days, 4) array.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.json':
+        with open(path) as f:
+            data = json.load(f)
+        return np.asarray(data['forecast'], dtype=np.float64), data.get('locations'), data.get('dates')
+    if ext == '.npy':
+        return np.load(path), None, None
+    if ext == '.npz':
+        from data_loader import COLUMN_ALIASES
+        with np.load(path) as data:
+            arrays = {COLUMN_ALIASES.get(name.strip().lower(), name.strip().lower()): data[name] for name in data.files}
+        missing = [f for f in FEATURES if f not in arrays]
+        if missing:
+            raise ValueError(f"{path} is missing variable(s): {', '.join(missing)}")
+        forecast = np.stack([np.asarray(arrays[f], dtype=np.float64) for f in FEATURES], axis=-1)
+        locations = arrays.get('location', arrays.get('locations'))
+        dates = arrays.get('date', arrays.get('dates'))
+        return (forecast, None if locations is None else [str(l) for l in locations],
+                None if dates is None else [str(d)[:10] for d in dates])
+    raise ValueError(f"Unsupported forecast format '{ext}' (expected .json, .npz or .npy)")
+
+def predict(temperature, humidity, rainfall, aqi, location, risk_level='Low', batch_mode=False, engine='full',
+            detail=None, store=None, output_format='json'):
+    if batch_mode:
+        try:
+            inputs = json.loads(temperature)
+            results = predict_batch(inputs, risk_level, engine, detail or 'standard')
+            if store is not None:
+                with metrics.stage('persist'):
+                    store.add(inputs, results)
+            write_output(sys.stdout, results, output_format)
+        except Exception as e:
+            write_output(sys.stdout, {"error": str(e), "trace": traceback.format_exc()}, output_format)
+        return
+
+    calculate_risk(temperature, humidity, rainfall, aqi, risk_level, print_output=True, engine=engine,
+                   detail=detail or 'full', output_format=output_format)
+
+def calculate_risk(temperature, humidity, rainfall, aqi, risk_level='Low', print_output=False, engine='full',
+                   detail='full', timings=False, output_format='json'):
+    """Score one set of inputs; timings=True adds per-stage ``timings_ms`` to the result."""
+    try:
+        with metrics.capture() as stages:
+            with metrics.stage('cache'):
+                values = result_cache.quantize([float(temperature), float(humidity), float(rainfall), float(aqi)])
+                version = model_version() if result_cache.enabled else None
+                key = _cache_key(values, risk_level, engine, detail)
+                result = result_cache.get(key, version)
+            if result is None:
+                result = build_results(score_features([values], risk_level, engine), detail=detail)[0]
+                result_cache.put(key, version, result)
+        if timings:
+            result['timings_ms'] = milliseconds(stages)
 
         if print_output:
-            print(json.dumps(result))
+            write_output(sys.stdout, result, output_format)
         return result
 
     except Exception as e:
@@ -443,18 +1188,299 @@ def calculate_risk(temperature, humidity, rainfall, aqi, risk_level='Low', print
             sys.exit(1)
         return error_result
 
+# ==================== SERVING MODE ====================
+def handle_request(request):
+    """Answer one serving-mode request (a decoded JSON object)."""
+    op = request.get('op', 'predict')
+    risk_level = request.get('risk_level', 'Low')
+    engine = request.get('engine', 'full')
+    if op == 'predict':
+        if temporal_state is not None and request.get('location') is not None and request.get('date'):
+            return _predict_requests([request])[0]
+        return calculate_risk(request['temperature'], request['humidity'], request['rainfall'],
+                              request['aqi'], risk_level, engine=engine, detail=request.get('detail', 'full'))
+    if op == 'batch':
+        results = predict_batch(request['items'], risk_level, engine, request.get('detail', 'standard'))
+        if request.get('persist'):
+            # PREDICT_STORE (or the request's 'store') receives the rows in bulk
+            from prediction_store import open_store
+            with metrics.stage('persist'), open_store(request.get('store'), user_id=request.get('user_id')) as store:
+                store.add(request['items'], results)
+        return results
+    if op == 'outbreak':
+        return outbreak_report(request['forecast'], request.get('locations'), request.get('dates'),
+                               request.get('months'), risk_level, engine,
+                               request.get('min_score', ALERT_LEVELS[-1][1]), request.get('top'),
+                               request.get('timeline', False))
+    if op == 'ping':
+        return {'status': 'ok', 'pid': os.getpid(), 'models_loaded': len(registry), 'cache': result_cache.stats()}
+    if op == 'metrics':
+        return metrics.to_prometheus()
+    raise ValueError(f"Unknown op '{op}'")
+
+def _predict_requests(requests):
+    """Results of many serve 'predict' requests, as calculate_risk returns them.
+
+    Requests sharing a risk level, engine and detail are scored with one
+    predict_batch call.
+    """
+    groups = {}
+    for idx, request in enumerate(requests):
+        key = (request.get('risk_level', 'Low'), request.get('engine', 'full'), request.get('detail', 'full'))
+        groups.setdefault(key, []).append(idx)
+
+    results = [None] * len(requests)
+    for (risk_level, engine, detail), indices in groups.items():
+        items = [{'temp': requests[i]['temperature'], 'humidity': requests[i]['humidity'],
+                  'rainfall': requests[i]['rainfall'], 'aqi': requests[i]['aqi'],
+                  'location': requests[i].get('location'), 'date': requests[i].get('date'),
+                  'observed': requests[i].get('observed', True)} for i in indices]
+        for idx, result in zip(indices, predict_batch(items, risk_level, engine, detail)):
+            del result['date']
+            results[idx] = result
+    return results
+
+def _score_queued(entries):
+    """MicroBatcher scorer: one serve response per queued (request, received) entry."""
+    dispatched = time.perf_counter()
+    with metrics.capture() as stages:
+        results = _predict_requests([request for request, _ in entries])
+    responses = []
+    for (request, received), result in zip(entries, results):
+        response = {'id': request.get('id'), 'result': result}
+        if request.get('timings'):
+            # Stages are those of the whole batch the request was scored in
+            response['timings_ms'] = dict(milliseconds(stages), batch_wait=round((dispatched - received) * 1000, 3),
+                                          batch_size=len(entries))
+        responses.append(response)
+    return responses
+
+def _write_response(stream_out, response, output_format):
+    metrics.inc('requests')
+    write_output(stream_out, response, output_format)
+    stream_out.flush()
+
+async def _serve_batched(stream_in, stream_out, output_format, max_batch, max_wait_ms):
+    """serve() with 'predict' requests scored in micro-batches on an asyncio loop.
+
+    A reader thread feeds input lines to the loop, so requests keep queuing
+    while a batch is scored. Other ops are answered as they arrive, so
+    responses can overtake queued predictions; callers match them by ``id``.
+    """
+    import asyncio
+    import threading
+    from micro_batch import MicroBatcher
+
+    loop = asyncio.get_running_loop()
+    lines = asyncio.Queue()
+
+    def read():
+        for line in stream_in:
+            loop.call_soon_threadsafe(lines.put_nowait, line)
+        loop.call_soon_threadsafe(lines.put_nowait, None)
+
+    threading.Thread(target=read, name='serve-reader', daemon=True).start()
+    batcher = MicroBatcher(_score_queued, max_batch, max_wait_ms / 1000, metrics)
+    outstanding = set()
+
+    def answer(request_id, future):
+        outstanding.discard(future)
+        try:
+            response = future.result()
+        except Exception as e:
+            response = {'id': request_id, 'error': str(e),
+                        'trace': ''.join(traceback.format_exception(type(e), e, e.__traceback__))}
+            metrics.inc('request_errors')
+        _write_response(stream_out, response, output_format)
+
+    flushed_at = time.monotonic()
+    while True:
+        line = await lines.get()
+        if line is None:
+            break
+        line = line.strip()
+        if not line:
+            continue
+        received = time.perf_counter()
+        request_id, request, response = None, {}, None
+        with metrics.capture() as stages:
+            try:
+                with metrics.stage('parse'):
+                    request = json.loads(line)
+                request_id = request.get('id')
+                if request.get('op', 'predict') == 'predict':
+                    for field in ('temperature', 'humidity', 'rainfall', 'aqi'):
+                        if field not in request:
+                            raise KeyError(field)
+                    future = batcher.submit((request, received))
+                    outstanding.add(future)
+                    future.add_done_callback(lambda f, request_id=request_id: answer(request_id, f))
+                else:
+                    response = {'id': request_id, 'result': handle_request(request)}
+            except Exception as e:
+                response = {'id': request_id, 'error': str(e), 'trace': traceback.format_exc()}
+                metrics.inc('request_errors')
+        if response is not None:
+            if request.get('timings'):
+                response['timings_ms'] = milliseconds(stages)
+            _write_response(stream_out, response, output_format)
+
+        if time.monotonic() - flushed_at >= METRICS_FLUSH_SECONDS:
+            if METRICS_FILE:
+                metrics.write(METRICS_FILE)
+            save_temporal_state()
+            flushed_at = time.monotonic()
+
+    batcher.flush()
+    if outstanding:
+        await asyncio.wait(outstanding)
+    # Let the last done-callbacks write their responses
+    await asyncio.sleep(0)
+
+def serve(stream_in=sys.stdin, stream_out=sys.stdout, output_format='json', max_batch=None, max_wait_ms=None):
+    """JSON-lines loop: one request per input line, one response per output line.
+
+    The ensemble is loaded once at startup and reused for every request, so a
+    long-running worker only pays interpreter and model start-up cost once.
+    Each response echoes the request ``id`` so callers can pipeline requests;
+    requests with ``"timings": true`` also get per-stage ``timings_ms``.
+    With output_format='msgpack' each response is one MessagePack object.
+    Concurrent 'predict' requests are scored together in micro-batches of up
+    to ``max_batch`` (default MAX_BATCH) rows, waiting at most
+    ``max_wait_ms`` (default MAX_WAIT_MS) for a batch to fill.
+    """
+    max_batch = MAX_BATCH if max_batch is None else max_batch
+    max_wait_ms = MAX_WAIT_MS if max_wait_ms is None else max_wait_ms
+    with metrics.stage('preload'):
+        registry.preload([mpath for _, mpath in ENSEMBLE_MEMBERS] + [fast_model_path])
+    if max_batch > 1:
+        import asyncio
+        asyncio.run(_serve_batched(stream_in, stream_out, output_format, max_batch, max_wait_ms))
+        if METRICS_FILE:
+            metrics.write(METRICS_FILE)
+        return
+
+    flushed_at = time.monotonic()
+    for line in stream_in:
+        line = line.strip()
+        if not line:
+            continue
+        request_id, request = None, {}
+        with metrics.capture() as stages:
+            try:
+                with metrics.stage('parse'):
+                    request = json.loads(line)
+                request_id = request.get('id')
+                response = {'id': request_id, 'result': handle_request(request)}
+            except Exception as e:
+                response = {'id': request_id, 'error': str(e), 'trace': traceback.format_exc()}
+                metrics.inc('request_errors')
+        if request.get('timings'):
+            response['timings_ms'] = milliseconds(stages)
+        _write_response(stream_out, response, output_format)
+
+        if time.monotonic() - flushed_at >= METRICS_FLUSH_SECONDS:
+            if METRICS_FILE:
+                metrics.write(METRICS_FILE)
+            save_temporal_state()
+            flushed_at = time.monotonic()
+    if METRICS_FILE:
+        metrics.write(METRICS_FILE)
+
+def _pop_option(argv, name, default):
+    """Remove ``name value`` from argv and return the value (or default)."""
+    if name not in argv:
+        return default
+    i = argv.index(name)
+    value = argv[i + 1]
+    del argv[i:i + 2]
+    return value
+
+metrics.observe('import', time.perf_counter() - _import_started)
+
 if __name__ == "__main__":
+    # --fast selects the distilled fast-path model for single and batch predictions;
+    # --cascade stops evaluating members once the fused margin reaches --cascade-margin
+    engine = 'fast' if '--fast' in sys.argv else 'cascade' if '--cascade' in sys.argv else 'full'
+    CASCADE_MARGIN = float(_pop_option(sys.argv, '--cascade-margin', CASCADE_MARGIN))
+    # --timings reports per-stage milliseconds (in the result, or on stderr for batches)
+    show_timings = '--timings' in sys.argv
+    # --compact scores float32 feature matrices (as PREDICT_COMPACT=1)
+    COMPACT = COMPACT or '--compact' in sys.argv
+    sys.argv = [arg for arg in sys.argv if arg not in ('--fast', '--cascade', '--timings', '--compact')]
+    chunk_size = int(_pop_option(sys.argv, '--chunk-size', STREAM_CHUNK_SIZE))
+    # --detail minimal|standard|full; defaults to full for one prediction, standard for batches
+    detail = _pop_option(sys.argv, '--detail', None)
+    # --metrics-file PATH writes Prometheus text metrics; --profile cprofile|tracemalloc reports to stderr
+    METRICS_FILE = _pop_option(sys.argv, '--metrics-file', METRICS_FILE)
+    profile = _pop_option(sys.argv, '--profile', os.environ.get('PREDICT_PROFILE') or None)
+    # --persist mysql|sqlite:PATH bulk-inserts --batch/--stream results into the predictions table
+    persist = _pop_option(sys.argv, '--persist', None)
+    store_chunk = _pop_option(sys.argv, '--store-chunk', None)
+    user_id = _pop_option(sys.argv, '--user-id', None)
+    # --format json|msgpack: JSON lines (default) or MessagePack objects on stdout
+    output_format = _pop_option(sys.argv, '--format', 'json')
+    # --max-batch N / --max-wait-ms MS tune serve-mode micro-batching (PREDICT_MAX_BATCH / PREDICT_MAX_WAIT_MS)
+    MAX_BATCH = int(_pop_option(sys.argv, '--max-batch', MAX_BATCH))
+    MAX_WAIT_MS = float(_pop_option(sys.argv, '--max-wait-ms', MAX_WAIT_MS))
+    # --top N keeps the N highest --outbreak warnings
+    top = _pop_option(sys.argv, '--top', None)
+    # --temporal-state PATH keeps per-location rolling features across runs (as PREDICT_TEMPORAL_STATE)
+    if '--temporal-state' in sys.argv:
+        TEMPORAL_STATE_PATH = _pop_option(sys.argv, '--temporal-state', None)
+        temporal_state = TemporalState.load(TEMPORAL_STATE_PATH)
+
     if len(sys.argv) < 2:
         print(json.dumps({"error": "Insufficient arguments"}), file=sys.stderr)
         sys.exit(1)
 
-    if sys.argv[1] == '--batch':
-        json_input = sys.argv[2]
-        risk = sys.argv[3] if len(sys.argv) > 3 else 'Low'
-        predict(json_input, None, None, None, None, risk, batch_mode=True)
-    else:
-        if len(sys.argv) < 6:
-            print(json.dumps({"error": "Insufficient arguments"}), file=sys.stderr)
-            sys.exit(1)
-        risk = sys.argv[6] if len(sys.argv) > 6 else 'Low'
-        predict(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4], sys.argv[5], risk)
+    store = None
+    if persist and sys.argv[1] in ('--batch', '--stream'):
+        from prediction_store import open_store
+        store = open_store(persist, store_chunk, int(user_id) if user_id else None)
+
+    try:
+        # The store writes its last partial chunk on success and releases its connection either way
+        with profiling(profile), metrics.capture() as stages, (store if store is not None else nullcontext()):
+            if sys.argv[1] == '--serve':
+                serve(output_format=output_format)
+            elif sys.argv[1] == '--stream':
+                # --stream [file.ndjson | -] [risk_level]: NDJSON in, one NDJSON result per row out
+                source = sys.argv[2] if len(sys.argv) > 2 else '-'
+                risk = sys.argv[3] if len(sys.argv) > 3 else 'Low'
+                if source == '-':
+                    stream_batch(sys.stdin, sys.stdout, risk, engine, chunk_size, detail or 'standard', store,
+                                 output_format)
+                else:
+                    with open(source) as f:
+                        stream_batch(f, sys.stdout, risk, engine, chunk_size, detail or 'standard', store,
+                                     output_format)
+            elif sys.argv[1] == '--outbreak':
+                # --outbreak forecast.{json,npz,npy} [risk_level]: ranked warnings for every location
+                forecast, locations, dates = load_forecast(sys.argv[2])
+                risk = sys.argv[3] if len(sys.argv) > 3 else 'Low'
+                write_output(sys.stdout, outbreak_report(forecast, locations, dates, risk_level=risk, engine=engine,
+                                                         top=int(top) if top else None), output_format)
+            elif sys.argv[1] == '--batch':
+                json_input = sys.argv[2]
+                risk = sys.argv[3] if len(sys.argv) > 3 else 'Low'
+                predict(json_input, None, None, None, None, risk, batch_mode=True, engine=engine, detail=detail,
+                        store=store, output_format=output_format)
+            else:
+                if len(sys.argv) < 6:
+                    print(json.dumps({"error": "Insufficient arguments"}), file=sys.stderr)
+                    sys.exit(1)
+                risk = sys.argv[6] if len(sys.argv) > 6 else 'Low'
+                if show_timings:
+                    calculate_risk(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4], risk, print_output=True,
+                                   engine=engine, detail=detail or 'full', timings=True, output_format=output_format)
+                else:
+                    predict(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4], sys.argv[5], risk,
+                            engine=engine, detail=detail, output_format=output_format)
+        if show_timings and sys.argv[1] in ('--batch', '--stream'):
+            print(json.dumps({'timings_ms': milliseconds(stages), 'peak_rss_mb': megabytes(peak_rss_bytes()),
+                              'compact': COMPACT}), file=sys.stderr)
+    finally:
+        save_temporal_state()
+        if METRICS_FILE:
+            metrics.write(METRICS_FILE)
@@ -0,0 +1,209 @@
+import abc
+import os
+import sqlite3
+
+# ==================== PREDICTION STORE ====================
+# Bulk persistence of scored rows into the backend's `predictions` table.
+# Rows are buffered and written chunk_rows at a time with executemany (which
+# mysql-connector sends as one multi-row INSERT) over a pooled connection, so
+# batch, stream and sweep jobs do not pay one round-trip per row. A SQLite
+# file with the same table stands in for MySQL in local testing.
+#
+#   PREDICT_STORE=mysql                       # DB_* settings, as in backend/.env
+#   PREDICT_STORE=sqlite:predictions.db       # local stand-in
+
+PREDICTION_COLUMNS = ('user_id', 'temperature', 'humidity', 'rainfall', 'aqi', 'location', 'predicted_disease',
+                      'accuracy')
+DEFAULT_CHUNK_ROWS = 1000
+DEFAULT_POOL_SIZE = 4
+
+BACKEND_ENV = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend', '.env')
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    temperature REAL,
+    humidity REAL,
+    rainfall REAL,
+    aqi REAL,
+    location TEXT,
+    predicted_disease TEXT,
+    accuracy REAL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def prediction_rows(items, results, user_id=None, location=None):
+    """`predictions` rows for scored items; rows whose scoring failed are skipped.
+
+    An item's own ``user_id``/``location`` take precedence over the defaults.
+    """
+    rows = []
+    for item, result in zip(items, results):
+        if 'error' in result:
+            continue
+        rows.append((item.get('user_id', user_id), float(item['temp']), float(item['humidity']),
+                     float(item['rainfall']), float(item['aqi']), item.get('location', location),
+                     result['disease'], result['accuracy']))
+    return rows
+
+
+class PredictionStore(abc.ABC):
+    """Buffers prediction rows and inserts them chunk_rows at a time.
+
+    ``user_id`` is recorded for rows whose item does not carry its own. Use
+    as a context manager (or call close()) so the last partial chunk is written.
+    """
+
+    placeholder = '%s'
+
+    def __init__(self, chunk_rows=DEFAULT_CHUNK_ROWS, user_id=None):
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be at least 1")
+        self.chunk_rows = chunk_rows
+        self.user_id = user_id
+        self.pending = []
+        self.written = 0
+        self.statement = (f"INSERT INTO predictions ({', '.join(PREDICTION_COLUMNS)}) "
+                          f"VALUES ({', '.join([self.placeholder] * len(PREDICTION_COLUMNS))})")
+
+    def add(self, items, results, location=None):
+        self.add_rows(prediction_rows(items, results, self.user_id, location))
+
+    def add_rows(self, rows):
+        self.pending.extend(rows)
+        if len(self.pending) >= self.chunk_rows:
+            self.flush(partial=False)
+
+    def flush(self, partial=True):
+        """Insert the buffered rows in full chunks, and the remainder too when ``partial``."""
+        end = len(self.pending) if partial else len(self.pending) - len(self.pending) % self.chunk_rows
+        for start in range(0, end, self.chunk_rows):
+            chunk = self.pending[start:min(start + self.chunk_rows, end)]
+            self._insert(chunk)
+            self.written += len(chunk)
+        del self.pending[:end]
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # Rows of a failed run are dropped, but the connection is still released
+            self.pending = []
+        self.close()
+
+    @abc.abstractmethod
+    def _insert(self, rows):
+        """Insert ``rows`` (tuples in PREDICTION_COLUMNS order) in one statement."""
+
+
+class SQLiteStore(PredictionStore):
+    """Local stand-in: the same table in a SQLite file, created if missing."""
+
+    placeholder = '?'
+
+    def __init__(self, path, chunk_rows=DEFAULT_CHUNK_ROWS, user_id=None):
+        super(SQLiteStore, self).__init__(chunk_rows, user_id)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(SQLITE_SCHEMA)
+
+    def _insert(self, rows):
+        with self.conn:
+            self.conn.executemany(self.statement, rows)
+
+    def close(self):
+        super(SQLiteStore, self).close()
+        self.conn.close()
+
+
+class MySQLStore(PredictionStore):
+    """The backend's MySQL database, through a mysql-connector connection pool.
+
+    Pools are shared per connection config, so stores opened repeatedly in one
+    process (e.g. per serve request) reuse their connections.
+    """
+
+    _pools = {}
+
+    def __init__(self, chunk_rows=DEFAULT_CHUNK_ROWS, user_id=None, pool_size=DEFAULT_POOL_SIZE, **config):
+        super(MySQLStore, self).__init__(chunk_rows, user_id)
+        self.config = config or mysql_config()
+        self.pool = self._pool(self.config, pool_size)
+
+    @classmethod
+    def _pool(cls, config, pool_size):
+        try:
+            from mysql.connector import pooling
+        except ImportError:
+            raise ImportError("Persisting to MySQL requires mysql-connector-python "
+                              "(pip install mysql-connector-python)")
+        key = tuple(sorted(config.items()))
+        if key not in cls._pools:
+            cls._pools[key] = pooling.MySQLConnectionPool(pool_name=f'predictions_{len(cls._pools)}',
+                                                          pool_size=pool_size, **config)
+        return cls._pools[key]
+
+    def _insert(self, rows):
+        conn = self.pool.get_connection()
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(self.statement, rows)
+            finally:
+                cursor.close()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            # Returns the connection to the pool
+            conn.close()
+
+
+def _backend_env():
+    """KEY=VALUE settings from backend/.env, used when the variables are not in the environment."""
+    values = {}
+    if os.path.exists(BACKEND_ENV):
+        with open(BACKEND_ENV) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#') and '=' in line:
+                    key, _, value = line.partition('=')
+                    values[key.strip()] = value.strip().strip('"\'')
+    return values
+
+
+def mysql_config():
+    """Connection settings from the DB_* variables the backend uses."""
+    fallback = _backend_env()
+    setting = lambda name, default=None: os.environ.get(name) or fallback.get(name) or default
+    return {
+        'host': setting('DB_HOST', 'localhost'),
+        'port': int(setting('DB_PORT', 3306)),
+        'user': setting('DB_USER'),
+        'password': setting('DB_PASSWORD', ''),
+        'database': setting('DB_NAME')
+    }
+
+
+def open_store(target=None, chunk_rows=None, user_id=None):
+    """A store for ``target`` ('mysql', 'sqlite:PATH' or a .db/.sqlite path).
+
+    Defaults come from PREDICT_STORE, PREDICT_STORE_CHUNK and PREDICT_DB_POOL_SIZE.
+    """
+    target = target or os.environ.get('PREDICT_STORE') or 'mysql'
+    chunk_rows = int(chunk_rows or os.environ.get('PREDICT_STORE_CHUNK') or DEFAULT_CHUNK_ROWS)
+    if target.startswith('sqlite:'):
+        return SQLiteStore(target[len('sqlite:'):], chunk_rows, user_id)
+    if target.endswith(('.db', '.sqlite', '.sqlite3')):
+        return SQLiteStore(target, chunk_rows, user_id)
+    if target == 'mysql':
+        return MySQLStore(chunk_rows, user_id, int(os.environ.get('PREDICT_DB_POOL_SIZE') or DEFAULT_POOL_SIZE))
+    raise ValueError(f"Unknown prediction store '{target}' (expected 'mysql', 'sqlite:PATH' or a .db file)")
@@ -0,0 +1,128 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# ==================== RESULT CACHE ====================
+# Memoizes prediction results keyed on the exact climate inputs, the risk
+# level and the engine. Dashboard and forecast traffic repeats the same few
+# inputs, so most requests are answered without scoring, and a hit returns
+# exactly what scoring would. Setting a precision (PREDICT_CACHE_PRECISION)
+# trades that for more hits: inputs are rounded first and the rounded values
+# are scored, so results change in the rounded digits whether or not they hit.
+#
+# Entries belong to one model version (a fingerprint of the loaded artifacts);
+# when the models change the whole cache is dropped. The optional SQLite tier
+# survives restarts, so a new worker starts warm.
+
+
+class ResultCache(object):
+    """Bounded LRU of result dicts with an optional on-disk second tier.
+
+    Cached results are shared: get() and put() copy the top-level dict so a
+    caller can add keys (e.g. ``date``), but nested values must not be mutated.
+    """
+
+    def __init__(self, max_entries=4096, precision=None, path=None):
+        self.max_entries = max_entries
+        self.precision = precision
+        self.path = path
+        self.version = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path and self.enabled:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS results '
+                             '(key TEXT PRIMARY KEY, version TEXT NOT NULL, result TEXT NOT NULL)')
+            self._db.commit()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def quantize(self, values):
+        """The inputs rounded to the cache precision, if any; results are computed on these values."""
+        if not self.enabled or self.precision is None:
+            return list(values)
+        return [round(v, self.precision) for v in values]
+
+    def _check_version(self, version):
+        """Drop every entry built from other models (caller holds the lock)."""
+        if version == self.version:
+            return
+        self._entries.clear()
+        self.version = version
+        if self._db is not None:
+            self._db.execute('DELETE FROM results WHERE version != ?', (version,))
+            self._db.commit()
+
+    def get(self, key, version):
+        """Cached result for ``key`` under model ``version``, or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._check_version(version)
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(result)
+            if self._db is not None:
+                row = self._db.execute('SELECT result FROM results WHERE key = ? AND version = ?',
+                                       (json.dumps(key), version)).fetchone()
+                if row is not None:
+                    result = json.loads(row[0])
+                    self._store(key, result)
+                    self.disk_hits += 1
+                    return dict(result)
+            self.misses += 1
+            return None
+
+    def put(self, key, version, result):
+        if not self.enabled or 'error' in result:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._store(key, dict(result))
+            if self._db is not None:
+                self._db.execute('INSERT OR REPLACE INTO results (key, version, result) VALUES (?, ?, ?)',
+                                 (json.dumps(key), version, json.dumps(result)))
+                self._db.commit()
+
+    def _store(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+def cache_from_env():
+    """ResultCache configured by PREDICT_CACHE_SIZE / _PRECISION / _PATH (size 0 disables it)."""
+    precision = os.environ.get('PREDICT_CACHE_PRECISION', 'none')
+    return ResultCache(max_entries=int(os.environ.get('PREDICT_CACHE_SIZE', 4096)),
+                       precision=None if precision.lower() == 'none' else int(precision),
+                       path=os.environ.get('PREDICT_CACHE_PATH') or None)
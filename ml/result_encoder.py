@@ -0,0 +1,43 @@
+import json
+from json.encoder import c_make_encoder, encode_basestring_ascii
+
+# ==================== RESULT ENCODER ====================
+# Serializes prediction results to exactly the bytes json.dumps produces,
+# faster. json.dumps builds a new C encoder on every call and tracks every
+# container it visits to detect reference cycles; results are plain trees of
+# dicts, lists, strings and numbers, so one C encoder is built at load time
+# and reused without the cycle check. Streams and serve responses encode one
+# row at a time, where the per-call set-up was a large share of the cost.
+# Results can also be packed as MessagePack for binary consumers.
+
+OUTPUT_FORMATS = ('json', 'msgpack')
+
+
+class ResultEncoder(object):
+    """Reusable json.dumps-compatible encoder (default separators, ensure_ascii, allow_nan)."""
+
+    def __init__(self):
+        if c_make_encoder is None:
+            # Interpreters without the _json accelerator
+            self._encode = None
+        else:
+            self._encode = c_make_encoder(None, None, encode_basestring_ascii, None, ': ', ', ', False, False, True)
+
+    def dumps(self, value):
+        """The same string as json.dumps(value) for an acyclic value."""
+        if self._encode is None:
+            return json.dumps(value)
+        return ''.join(self._encode(value, 0))
+
+    def lines(self, results):
+        """One JSON text per result, as the NDJSON writers emit them."""
+        return list(map(self.dumps, results))
+
+
+def msgpack_dumps(value):
+    """MessagePack bytes of a result (or list of results); needs the msgpack package."""
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("MessagePack output requires msgpack (pip install msgpack)")
+    return msgpack.packb(value, use_bin_type=True)
@@ -0,0 +1,222 @@
+from collections import namedtuple
+
+import numpy as np
+
+# ==================== SHARED EXPERT-SYSTEM RULE TABLE ====================
+# Single source of truth for the climate -> disease thresholds used by both the
+# synthetic data generator (train_model.py) and the expert system that is fused
+# with the ensemble at prediction time (predict.py).
+
+FEATURES = ('temperature', 'humidity', 'rainfall', 'aqi')
+
+DISEASES = ['Malaria', 'Dengue', 'Typhoid', 'Asthma', 'Viral Fever', 'Cholera', 'Heat Stroke', 'No Disease']
+
+# Features computed from the base columns, usable in rule conditions
+DERIVED_FEATURES = {
+    'temperature_deviation': lambda cols: np.abs(cols['temperature'] - 25),
+}
+
+COMPARATORS = {
+    '>': np.greater,
+    '<': np.less,
+    '>=': np.greater_equal,
+    '<=': np.less_equal,
+}
+
+# disease:      class the rule scores
+# weight:       expert-system score added at prediction time (None = training only)
+# train_weight: prior added by the synthetic data generator (None = prediction only)
+# when:         (feature, comparator, threshold) conditions that must all hold
+Rule = namedtuple('Rule', ['disease', 'weight', 'train_weight', 'when'])
+
+DISEASE_RULES = [
+    # ===== BASELINE =====
+    Rule('No Disease', 0.15, 1.2, ()),
+
+    # ===== MALARIA: High temp + High humidity + Rain =====
+    Rule('Malaria', 0.2, 0.2, (('temperature', '>', 25), ('humidity', '>', 60))),
+    Rule('Malaria', 0.35, 0.4, (('temperature', '>', 30), ('humidity', '>', 80))),
+    Rule('No Disease', None, -0.3, (('temperature', '>', 30), ('humidity', '>', 80))),
+    Rule('Malaria', 0.25, 0.25, (('rainfall', '>', 100), ('temperature', '>', 25))),
+    Rule('Malaria', None, 0.3, (('temperature', '>', 28), ('humidity', '>', 70), ('rainfall', '>', 50))),
+
+    # ===== DENGUE: Moderate-high temp + Humid + Some rain (breeding) =====
+    Rule('Dengue', 0.25, 0.25, (('temperature', '>', 25), ('temperature', '<', 35), ('humidity', '>', 60))),
+    Rule('Dengue', 0.3, 0.3, (('rainfall', '>', 50), ('rainfall', '<', 300), ('humidity', '>', 70))),
+    Rule('Dengue', 0.2, 0.2, (('temperature', '>', 28), ('humidity', '>', 75))),
+    Rule('No Disease', None, -0.2, (('temperature', '>', 28), ('humidity', '>', 75))),
+
+    # ===== TYPHOID: Heavy rain + Contamination risk =====
+    Rule('Typhoid', 0.3, 0.3, (('rainfall', '>', 150),)),
+    Rule('Typhoid', 0.35, 0.35, (('rainfall', '>', 250), ('humidity', '>', 70))),
+    Rule('No Disease', None, -0.2, (('rainfall', '>', 250), ('humidity', '>', 70))),
+    Rule('Typhoid', 0.15, 0.15, (('temperature', '>', 25), ('rainfall', '>', 100))),
+
+    # ===== CHOLERA: Very heavy rain + Warm =====
+    Rule('Cholera', 0.35, 0.35, (('rainfall', '>', 200), ('temperature', '>', 25))),
+    Rule('Cholera', 0.3, 0.3, (('rainfall', '>', 300),)),
+    Rule('No Disease', None, -0.3, (('rainfall', '>', 300),)),
+    Rule('Cholera', 0.2, 0.2, (('humidity', '>', 80), ('rainfall', '>', 150))),
+
+    # ===== ASTHMA: Poor AQI =====
+    Rule('Asthma', 0.2, 0.2, (('aqi', '>', 100),)),
+    Rule('Asthma', 0.35, 0.35, (('aqi', '>', 150),)),
+    Rule('No Disease', None, -0.25, (('aqi', '>', 150),)),
+    Rule('Asthma', 0.3, 0.3, (('aqi', '>', 200),)),
+    Rule('Asthma', 0.2, 0.25, (('aqi', '>', 300),)),
+    Rule('No Disease', None, -0.2, (('aqi', '>', 300),)),
+
+    # ===== VIRAL FEVER: Extreme temps =====
+    Rule('Viral Fever', 0.25, 0.25, (('temperature', '>', 35),)),
+    Rule('Viral Fever', 0.3, 0.3, (('temperature', '<', 18),)),
+    Rule('No Disease', None, -0.2, (('temperature', '<', 18),)),
+    Rule('Viral Fever', 0.15, 0.2, (('temperature_deviation', '>', 10),)),
+
+    # ===== HEAT STROKE: Very high temp, low humidity =====
+    Rule('Heat Stroke', 0.4, 0.4, (('temperature', '>', 38),)),
+    Rule('No Disease', None, -0.3, (('temperature', '>', 38),)),
+    Rule('Heat Stroke', 0.4, 0.4, (('temperature', '>', 42),)),
+    Rule('Heat Stroke', 0.25, 0.25, (('temperature', '>', 35), ('humidity', '<', 30))),
+]
+
+# Regional alert level -> extra expert-system score per disease
+RISK_LEVEL_BOOSTS = {
+    'High': {'Malaria': 0.25, 'Dengue': 0.25, 'Viral Fever': 0.15},
+    'Moderate': {'Malaria': 0.1, 'Dengue': 0.1},
+}
+
+# How strongly a feature's value triggers rule conditions (explainability):
+# (feature, comparator, threshold, weight)
+FEATURE_CONTRIBUTIONS = [
+    ('temperature', '>', 25, 0.15),
+    ('temperature', '>', 30, 0.2),
+    ('temperature', '>', 35, 0.25),
+    ('temperature', '>', 38, 0.3),
+    ('temperature', '>', 42, 0.3),
+    ('temperature', '<', 18, 0.25),
+
+    ('humidity', '>', 60, 0.15),
+    ('humidity', '>', 70, 0.2),
+    ('humidity', '>', 75, 0.15),
+    ('humidity', '>', 80, 0.2),
+    ('humidity', '<', 30, 0.15),
+
+    ('rainfall', '>', 50, 0.1),
+    ('rainfall', '>', 100, 0.15),
+    ('rainfall', '>', 150, 0.2),
+    ('rainfall', '>', 200, 0.25),
+    ('rainfall', '>', 250, 0.2),
+    ('rainfall', '>', 300, 0.2),
+
+    ('aqi', '>', 100, 0.15),
+    ('aqi', '>', 150, 0.25),
+    ('aqi', '>', 200, 0.25),
+    ('aqi', '>', 300, 0.2),
+]
+
+
+class RuleTable(object):
+    """A rule list compiled into array evaluators over an (N, len(FEATURES)) matrix.
+
+    Every distinct condition is evaluated once per call as a boolean column, a
+    single integer matrix product against the condition/rule membership matrix
+    tells which rules fired, and the fired weights are summed per output.
+    Weights for one output are accumulated left to right in table order (via
+    cumsum, not a BLAS reduction) so scores are bit-identical to evaluating
+    the rules one ``if`` at a time.
+    """
+
+    def __init__(self, rules, outputs):
+        # rules: iterable of (output, weight, conditions)
+        rules = list(rules)
+        self.outputs = list(outputs)
+        self.conditions = []
+        for _, _, when in rules:
+            for cond in when:
+                if cond not in self.conditions:
+                    self.conditions.append(cond)
+        for feature, op, _ in self.conditions:
+            if feature not in FEATURES and feature not in DERIVED_FEATURES:
+                raise ValueError(f"Unknown rule feature '{feature}'")
+            if op not in COMPARATORS:
+                raise ValueError(f"Unknown rule comparator '{op}'")
+
+        n_rules = len(rules)
+        self.membership = np.zeros((len(self.conditions), n_rules), dtype=np.int32)
+        self.required = np.zeros(n_rules, dtype=np.int32)
+        self.weights = np.zeros(n_rules)
+        per_output = [[] for _ in self.outputs]
+        for r, (output, weight, when) in enumerate(rules):
+            for cond in when:
+                self.membership[self.conditions.index(cond), r] = 1
+            self.required[r] = len(when)
+            self.weights[r] = weight
+            per_output[self.outputs.index(output)].append(r)
+
+        # (outputs, k) gather of rule columns; padding points at an all-zero column
+        width = max(1, max(len(idx) for idx in per_output))
+        self.gather = np.full((len(self.outputs), width), n_rules)
+        for o, idx in enumerate(per_output):
+            self.gather[o, :len(idx)] = idx
+
+    def fired(self, features):
+        """(N, n_rules) boolean matrix of which rules hold for each row."""
+        features = np.asarray(features)
+        cols = {name: features[:, i] for i, name in enumerate(FEATURES)}
+        for name, derive in DERIVED_FEATURES.items():
+            if any(feature == name for feature, _, _ in self.conditions):
+                cols[name] = derive(cols)
+        masks = np.empty((len(features), len(self.conditions)), dtype=np.int32)
+        for c, (feature, op, threshold) in enumerate(self.conditions):
+            masks[:, c] = COMPARATORS[op](cols[feature], threshold)
+        return masks @ self.membership == self.required
+
+    def __call__(self, features):
+        """(N, len(outputs)) summed weights of the rules that fired."""
+        fired = self.fired(features)
+        values = np.zeros((len(fired), len(self.weights) + 1))
+        values[:, :-1] = np.where(fired, self.weights, 0.0)
+        return np.cumsum(values[:, self.gather], axis=2)[:, :, -1]
+
+
+def _disease_rules(field):
+    return [(rule.disease, getattr(rule, field), rule.when)
+            for rule in DISEASE_RULES if getattr(rule, field) is not None]
+
+
+PREDICTION_RULES = RuleTable(_disease_rules('weight'), DISEASES)
+TRAINING_RULES = RuleTable(_disease_rules('train_weight'), DISEASES)
+CONTRIBUTION_RULES = RuleTable([(feature, weight, ((feature, op, threshold),))
+                                for feature, op, threshold, weight in FEATURE_CONTRIBUTIONS], FEATURES)
+
+
+def risk_level_boost(risk_level):
+    """Per-disease score vector added for a regional alert level."""
+    boost = np.zeros(len(DISEASES))
+    for disease, weight in RISK_LEVEL_BOOSTS.get(risk_level, {}).items():
+        boost[DISEASES.index(disease)] = weight
+    return boost
+
+
+# ==================== OUTBREAK EARLY-WARNING THRESHOLDS ====================
+# Climate envelope in which each disease spreads, for the multi-day outbreak
+# scorer in predict.py (and, through it, the backend's outbreak analysis).
+# temperature:   (low, high) bands, inclusive; a day in any band counts
+# humidity:      minimum relative humidity (0 = always met)
+# rainfall:      minimum daily rainfall (0 = not a factor)
+# aqi:           minimum AQI (None = not a factor)
+# multiplier:    how strongly matched conditions translate into outbreak risk
+# seasonal_peak: months (1-12) of peak transmission
+OutbreakThreshold = namedtuple('OutbreakThreshold', ['disease', 'temperature', 'humidity', 'rainfall', 'aqi',
+                                                     'multiplier', 'seasonal_peak'])
+
+OUTBREAK_THRESHOLDS = [
+    OutbreakThreshold('Malaria', ((25, 40),), 65, 80, None, 1.3, (6, 7, 8, 9, 10)),
+    OutbreakThreshold('Dengue', ((25, 38),), 60, 50, None, 1.4, (7, 8, 9, 10, 11)),
+    OutbreakThreshold('Typhoid', ((20, 40),), 50, 150, None, 1.2, (6, 7, 8, 9)),
+    OutbreakThreshold('Cholera', ((20, 42),), 60, 200, None, 1.5, (6, 7, 8, 9)),
+    OutbreakThreshold('Asthma', ((0, 50),), 0, 0, 120, 1.1, (10, 11, 12, 1, 2)),
+    # Cold and heat both favour viral fevers
+    OutbreakThreshold('Viral Fever', ((0, 20), (35, 50)), 40, 0, None, 1.0, (11, 12, 1, 2, 3)),
+    OutbreakThreshold('Heat Stroke', ((38, 55),), 0, 0, None, 1.6, (3, 4, 5, 6)),
+]
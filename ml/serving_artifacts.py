@@ -0,0 +1,135 @@
+import os
+
+import joblib
+import numpy as np
+
+# ==================== SERVING ARTIFACTS ====================
+# Uncompressed, memory-mappable copies of the trained models. train_model.py
+# writes <name>_model.serving.joblib next to each <name>_model.pkl; prediction
+# workers load them with mmap_mode='c', so the large arrays are paged in from
+# one shared page-cached file instead of being unpickled into private RAM.
+#
+# sklearn's Tree copies its node arrays when unpickled, so a forest is first
+# flattened into plain NumPy arrays (FlatForest) that stay memory-mapped.
+
+SERVING_SUFFIX = '.serving.joblib'
+
+# Copy-on-write: pages are shared until written, and estimators whose
+# compiled code insists on writable buffers (libsvm) still accept them.
+MMAP_MODE = 'c'
+
+# Rows scored per traversal pass, bounding the (rows x trees) index matrix
+PREDICT_CHUNK_CELLS = 2000000
+
+
+class FlatForest(object):
+    """A fitted RandomForestClassifier flattened into contiguous node arrays.
+
+    All trees share one node table; a row is routed through every tree at
+    once, one depth level per step. predict_proba matches sklearn's exactly:
+    X is compared as float32 and tree probabilities are summed in tree order.
+    """
+
+    def __init__(self, forest):
+        trees = [est.tree_ for est in forest.estimators_]
+        offsets = np.cumsum([0] + [t.node_count for t in trees[:-1]])
+
+        left, right, feature, threshold, values, cover = [], [], [], [], [], []
+        for offset, tree in zip(offsets, trees):
+            nodes = np.arange(tree.node_count) + offset
+            is_leaf = tree.children_left == -1
+            # Leaves point at themselves so extra traversal steps are no-ops
+            left.append(np.where(is_leaf, nodes, tree.children_left + offset))
+            right.append(np.where(is_leaf, nodes, tree.children_right + offset))
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            cover.append(tree.weighted_n_node_samples)
+
+            proba = tree.value[:, 0, :forest.n_classes_].copy()
+            if not np.allclose(proba.sum(axis=1), 1.0):
+                # Older sklearn stores weighted class counts and normalizes at predict time
+                normalizer = proba.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                proba /= normalizer
+            values.append(proba)
+
+        self.roots = np.ascontiguousarray(offsets, dtype=np.int64)
+        self.left = np.ascontiguousarray(np.concatenate(left), dtype=np.int64)
+        self.right = np.ascontiguousarray(np.concatenate(right), dtype=np.int64)
+        self.feature = np.ascontiguousarray(np.concatenate(feature), dtype=np.int64)
+        self.threshold = np.ascontiguousarray(np.concatenate(threshold), dtype=np.float64)
+        self.values = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        # Training samples (bootstrap-weighted) reaching each node, for TreeSHAP
+        self.cover = np.ascontiguousarray(np.concatenate(cover), dtype=np.float64)
+        self.max_depth = max(t.max_depth for t in trees)
+        self.classes_ = forest.classes_
+        self.n_features_in_ = forest.n_features_in_
+        self.feature_importances_ = forest.feature_importances_
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """(N, n_trees) global index of the leaf each row reaches in each tree."""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, np.newaxis]
+        nodes = np.repeat(self.roots[np.newaxis, :], len(X), axis=0)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        proba = np.zeros((len(X), len(self.classes_)))
+        chunk = max(1, PREDICT_CHUNK_CELLS // self.n_estimators)
+        for start in range(0, len(X), chunk):
+            leaves = self.apply(X[start:start + chunk])
+            out = proba[start:start + chunk]
+            for t in range(leaves.shape[1]):
+                out += self.values[leaves[:, t]]
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def serving_path(path):
+    """<name>_model.pkl -> <name>_model.serving.joblib"""
+    return os.path.splitext(path)[0] + SERVING_SUFFIX
+
+
+def resolve_artifact(path):
+    """Prefer the serving artifact for ``path`` when it is at least as new as the pickle."""
+    candidate = serving_path(path)
+    try:
+        if os.path.getmtime(candidate) >= os.path.getmtime(path):
+            return candidate
+    except OSError:
+        pass
+    return path
+
+
+def load_artifact(path):
+    if path.endswith(SERVING_SUFFIX):
+        return joblib.load(path, mmap_mode=MMAP_MODE)
+    return joblib.load(path)
+
+
+def to_serving_model(model):
+    if type(model).__name__ == 'RandomForestClassifier':
+        return FlatForest(model)
+    return model
+
+
+def export_serving_artifact(path, model=None):
+    """Write the uncompressed serving copy of the pickle at ``path``; returns its path."""
+    if model is None:
+        model = joblib.load(path)
+    target = serving_path(path)
+    tmp_path = f'{target}.tmp'
+    joblib.dump(to_serving_model(model), tmp_path, compress=0)
+    os.replace(tmp_path, target)
+    return target
@@ -0,0 +1,260 @@
+import json
+import os
+from datetime import date, datetime
+
+import numpy as np
+
+from rules import FEATURES
+
+# ==================== TEMPORAL FEATURES ====================
+# Lagged and rolling climate features per location: rainfall accumulated and
+# humidity sustained over the preceding weeks, plus mosquito degree-days.
+# Every location keeps ring buffers of its last HISTORY_DAYS daily values and
+# running window sums, so a new day costs O(1) whatever the history length.
+# Training computes them in one pass over a dataset's rows, and predict.py
+# keeps one state across calls (PREDICT_TEMPORAL_STATE), so daily updates
+# for thousands of locations never rescan history.
+
+TEMPORAL_WINDOWS = (7, 14, 30)
+TEMPORAL_LAGS = (1, 7)
+HISTORY_DAYS = max(TEMPORAL_WINDOWS)
+# Degrees above which malaria parasites and dengue virus develop in the mosquito
+DEGREE_DAY_BASE = 16.0
+# Running sums are recomputed from the ring buffers this often, so float
+# rounding cannot accumulate over years of daily updates
+RESUM_INTERVAL = 1024
+
+TEMPORAL_FEATURES = tuple(
+    [f'rainfall_sum_{w}d' for w in TEMPORAL_WINDOWS] +
+    [f'humidity_mean_{w}d' for w in TEMPORAL_WINDOWS] +
+    [f'degree_days_{w}d' for w in TEMPORAL_WINDOWS] +
+    [f'rainfall_lag_{lag}d' for lag in TEMPORAL_LAGS] +
+    [f'humidity_lag_{lag}d' for lag in TEMPORAL_LAGS]
+)
+
+# 0001-01-01 is ordinal 1, so 1970-01-01 (datetime64 day 0) is this ordinal
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Daily values held per day: rainfall, humidity, degree-days, observed (0/1)
+_RAIN, _HUMIDITY, _HEAT, _OBSERVED = range(4)
+
+
+def day_number(value):
+    """Proleptic ordinal of a date given as an ordinal, 'YYYY-MM-DD[...]' string, date or datetime."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+class _Series(object):
+    """Rolling-window state of one location. Day d lives in slot d % HISTORY_DAYS."""
+
+    __slots__ = ('last_day', 'days', 'sums', 'steps')
+
+    def __init__(self, day):
+        self.last_day = day
+        self.days = [[0.0] * 4 for _ in range(HISTORY_DAYS)]
+        self.sums = [[0.0] * 4 for _ in TEMPORAL_WINDOWS]
+        self.steps = 0
+
+    def _add(self, day, sign):
+        values = self.days[day % HISTORY_DAYS]
+        for i, window in enumerate(TEMPORAL_WINDOWS):
+            if self.last_day - day < window:
+                sums = self.sums[i]
+                for k in range(4):
+                    sums[k] += sign * values[k]
+
+    def advance(self, day):
+        """Move the windows forward to ``day``; skipped days count as unobserved."""
+        if day - self.last_day >= HISTORY_DAYS:
+            self.days = [[0.0] * 4 for _ in range(HISTORY_DAYS)]
+            self.sums = [[0.0] * 4 for _ in TEMPORAL_WINDOWS]
+            self.last_day = day
+            return
+        while self.last_day < day:
+            self.last_day += 1
+            # Drop the day that leaves each window, then reuse the oldest slot
+            for i, window in enumerate(TEMPORAL_WINDOWS):
+                leaving = self.days[(self.last_day - window) % HISTORY_DAYS]
+                sums = self.sums[i]
+                for k in range(4):
+                    sums[k] -= leaving[k]
+            self.days[self.last_day % HISTORY_DAYS] = [0.0] * 4
+        self.steps += 1
+        if self.steps % RESUM_INTERVAL == 0:
+            self.resum()
+
+    def record(self, day, rainfall, humidity, temperature):
+        """Set (or replace) the values of ``day``, which must be within the history."""
+        self._add(day, -1)
+        self.days[day % HISTORY_DAYS] = [rainfall, humidity, max(temperature - DEGREE_DAY_BASE, 0.0), 1.0]
+        self._add(day, 1)
+
+    def copy(self):
+        series = _Series(self.last_day)
+        series.days = [list(values) for values in self.days]
+        series.sums = [list(sums) for sums in self.sums]
+        series.steps = self.steps
+        return series
+
+    def resum(self):
+        for i, window in enumerate(TEMPORAL_WINDOWS):
+            self.sums[i] = self._window(self.last_day, window)
+
+    def _window(self, day, window):
+        sums = [0.0] * 4
+        # Slots older than the history already hold newer days
+        for past in range(max(day - window, self.last_day - HISTORY_DAYS) + 1, day + 1):
+            values = self.days[past % HISTORY_DAYS]
+            for k in range(4):
+                sums[k] += values[k]
+        return sums
+
+    def features(self, day):
+        """TEMPORAL_FEATURES for the windows ending at ``day`` (an observed day in the history)."""
+        if day == self.last_day:
+            sums = self.sums
+        else:
+            # Backfilled day: its windows exclude the later days, so sum them directly
+            sums = [self._window(day, window) for window in TEMPORAL_WINDOWS]
+        today = self.days[day % HISTORY_DAYS]
+        row = [s[_RAIN] for s in sums]
+        row += [s[_HUMIDITY] / s[_OBSERVED] for s in sums]
+        row += [s[_HEAT] for s in sums]
+        for k in (_RAIN, _HUMIDITY):
+            for lag in TEMPORAL_LAGS:
+                past = self.days[(day - lag) % HISTORY_DAYS]
+                # Unknown lags repeat the day's own value
+                row.append(past[k] if past[_OBSERVED] and self.last_day - (day - lag) < HISTORY_DAYS else today[k])
+        return row
+
+
+class TemporalState(object):
+    """Rolling-window state of every location, updated one daily observation at a time.
+
+    Observations normally arrive in date order per location and cost O(1).
+    A day already seen (or skipped) within the last HISTORY_DAYS is replaced
+    in place, e.g. when a corrected reading arrives. Days older than that get
+    no features. Forecast days are scored against a copy() so they never
+    enter the saved history.
+    """
+
+    def __init__(self):
+        self._series = {}
+
+    def __len__(self):
+        return len(self._series)
+
+    def update(self, location, day, temperature, humidity, rainfall):
+        """Record one observation; returns its TEMPORAL_FEATURES, or None if the day is too old."""
+        day = day_number(day)
+        location = str(location)
+        series = self._series.get(location)
+        if series is None:
+            series = self._series[location] = _Series(day)
+        elif day > series.last_day:
+            series.advance(day)
+        elif series.last_day - day >= HISTORY_DAYS:
+            return None
+        series.record(day, float(rainfall), float(humidity), float(temperature))
+        return series.features(day)
+
+    def copy(self, locations=None):
+        """An independent state holding ``locations`` (default: every location)."""
+        state = TemporalState()
+        for location in self._series if locations is None else map(str, locations):
+            if location in self._series:
+                state._series[location] = self._series[location].copy()
+        return state
+
+    def update_many(self, locations, days, X):
+        """update() for each row of X (temperature, humidity, rainfall, aqi), in order.
+
+        Returns a float64 (n, len(TEMPORAL_FEATURES)) matrix with NaN rows for
+        observations too old to place.
+        """
+        out = np.full((len(X), len(TEMPORAL_FEATURES)), np.nan)
+        for r, (location, day, values) in enumerate(zip(locations, days, np.asarray(X).tolist())):
+            row = self.update(location, day, values[0], values[1], values[2])
+            if row is not None:
+                out[r] = row
+        return out
+
+    def to_dict(self):
+        return {location: {'last_day': s.last_day, 'days': s.days, 'steps': s.steps}
+                for location, s in self._series.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        for location, saved in data.items():
+            series = _Series(saved['last_day'])
+            series.days = saved['days']
+            series.steps = saved['steps']
+            series.resum()
+            state._series[location] = series
+        return state
+
+    def save(self, path):
+        """Atomically write the state as JSON."""
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'history_days': HISTORY_DAYS, 'locations': self.to_dict()}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """The state saved at ``path``; empty if the file does not exist yet."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            saved = json.load(f)
+        if saved.get('history_days') != HISTORY_DAYS:
+            raise ValueError(f"Temporal state {path} was saved with {saved.get('history_days')} days of history, "
+                             f"expected {HISTORY_DAYS}")
+        return cls.from_dict(saved['locations'])
+
+
+def load_temporal_sample(path, max_rows=None, chunk_size=None, seed=42, stats=None):
+    """Like data_loader.load_sample, with TEMPORAL_FEATURES after the four same-day features.
+
+    The dataset needs ``location`` and ``date`` columns, with each location's
+    rows in date order; the features are computed over every row in one pass
+    before sampling. Rows with unparseable dates or dates too old to place
+    are dropped (counted in stats['rows_dropped']).
+    Returns (X float32 (n, 4 + len(TEMPORAL_FEATURES)), disease label codes int8).
+    """
+    # Training only: keeps pandas out of predict.py's start-up
+    import pandas as pd
+    from data_loader import (DEFAULT_CHUNK_SIZE, DEFAULT_MAX_ROWS, FEATURE_DTYPE, LABEL_COLUMN, TEMPORAL_COLUMNS,
+                             SchemaError, iter_dataset, sample_rows)
+
+    max_rows = max_rows or DEFAULT_MAX_ROWS
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+
+    if stats is None:
+        stats = {}
+    state = TemporalState()
+
+    def chunks():
+        for df in iter_dataset(path, chunk_size, stats, keep=TEMPORAL_COLUMNS):
+            dates = pd.to_datetime(df['date'], errors='coerce').to_numpy()
+            valid = ~np.isnat(dates)
+            days = dates[valid].astype('datetime64[D]').astype(np.int64) + _EPOCH_ORDINAL
+            base = df[list(FEATURES)].to_numpy(dtype=FEATURE_DTYPE)[valid]
+            temporal = state.update_many(df['location'].to_numpy()[valid], days.tolist(), base)
+            placed = ~np.isnan(temporal).any(axis=1)
+            stats['rows_dropped'] += int(len(df) - placed.sum())
+            codes = df[LABEL_COLUMN].cat.codes.to_numpy(dtype=np.int8)[valid]
+            yield np.hstack([base[placed], temporal[placed]]), codes[placed]
+
+    X, codes = sample_rows(chunks(), len(FEATURES) + len(TEMPORAL_FEATURES), max_rows, chunk_size, seed)
+    if len(X) == 0:
+        raise SchemaError(f"Dataset has no valid dated rows: {path}")
+    stats['locations'] = len(state)
+    return X, codes
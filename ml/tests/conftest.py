@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The ml modules import each other as top-level modules (predict.py runs as a script)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import predict
+from result_cache import ResultCache
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setattr(predict, 'result_cache', ResultCache(max_entries=0))
+
+
+@pytest.fixture
+def rows():
+    rng = np.random.default_rng(13)
+    values = rng.uniform([5, 10, 0, 10], [48, 99, 450, 450], size=(30, 4)).tolist()
+    # Exact rule thresholds, a repeated row and the No Disease corner
+    return values + [[35, 70, 100, 100], [20, 45, 0, 50], values[0], [25, 50, 0, 40]]
+
+
+@pytest.mark.parametrize('risk_level', ['Low', 'Moderate', 'High'])
+def test_batch_matches_single_predictions(rows, risk_level):
+    items = [{'temp': t, 'humidity': h, 'rainfall': r, 'aqi': a} for t, h, r, a in rows]
+    batch = predict.predict_batch(items, risk_level, detail='full')
+
+    for result, row in zip(batch, rows):
+        assert result.pop('date') == ''
+        assert result == predict.calculate_risk(*row, risk_level=risk_level)
+
+
+def test_bad_rows_do_not_affect_the_others(rows):
+    items = [{'temp': t, 'humidity': h, 'rainfall': r, 'aqi': a} for t, h, r, a in rows[:3]]
+    items.insert(1, {'temp': 'hot', 'humidity': 80, 'rainfall': 40, 'aqi': 90})
+    batch = predict.predict_batch(items, detail='minimal')
+
+    assert 'error' in batch[1]
+    assert [result['disease'] for result in batch[:1] + batch[2:]] == \
+        [predict.calculate_risk(*row, detail='minimal')['disease'] for row in rows[:3]]
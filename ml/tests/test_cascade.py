@@ -0,0 +1,18 @@
+import numpy as np
+
+import predict
+
+
+def test_escalated_rows_report_every_member(monkeypatch):
+    rng = np.random.default_rng(3)
+    items = [{'temp': t, 'humidity': h, 'rainfall': r, 'aqi': a}
+             for t, h, r, a in rng.uniform([5, 10, 0, 10], [48, 99, 450, 450], size=(20, 4)).tolist()]
+    full = predict.predict_batch(items, engine='full')
+    # A margin no fused risk can reach sends every row through every member
+    monkeypatch.setattr(predict, 'CASCADE_MARGIN', 1.0)
+    cascade = predict.predict_batch(items, engine='cascade')
+
+    for full_result, cascade_result in zip(full, cascade):
+        assert set(cascade_result['ensemble']) == set(full_result['ensemble'])
+        assert sorted(cascade_result['members_used']) == sorted(full_result['ensemble'])
+        assert cascade_result['disease_risks'] == full_result['disease_risks']
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_loader import SchemaError, iter_dataset, load_sample, sample_rows
+from rules import DISEASES, FEATURES
+
+
+@pytest.fixture
+def aliased_csv(tmp_path):
+    path = tmp_path / 'history.csv'
+    path.write_text('Temp,Relative_Humidity,rain,AIR_QUALITY,Diagnosis,notes\n'
+                    '31.5,82,120,90,malaria,a\n'
+                    '22,55,0,310, Asthma ,b\n'
+                    'hot,55,0,310,Asthma,c\n'
+                    '40,20,0,80,Influenza,d\n'
+                    '43,18,0,95,HEAT STROKE,e\n')
+    return str(path)
+
+
+def test_aliases_are_resolved_and_bad_rows_dropped(aliased_csv):
+    stats = {}
+    df = pd.concat(iter_dataset(aliased_csv, chunk_size=2, stats=stats), ignore_index=True)
+
+    assert list(df.columns) == list(FEATURES) + ['disease']
+    assert df['disease'].tolist() == ['Malaria', 'Asthma', 'Heat Stroke']
+    assert df['temperature'].dtype == np.float32
+    assert df[list(FEATURES)].to_numpy().tolist() == [[31.5, 82, 120, 90], [22, 55, 0, 310], [43, 18, 0, 95]]
+    assert stats == {'rows_read': 5, 'rows_dropped': 2}
+
+
+def test_missing_column_is_a_schema_error(tmp_path):
+    path = tmp_path / 'history.csv'
+    path.write_text('temperature,humidity,rainfall,disease\n30,80,100,Malaria\n')
+    with pytest.raises(SchemaError, match='aqi'):
+        next(iter_dataset(str(path)))
+
+
+def test_parquet_matches_csv(aliased_csv, tmp_path):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'history.parquet')
+    pd.read_csv(aliased_csv, dtype=str).to_parquet(path)
+    from_csv = pd.concat(iter_dataset(aliased_csv), ignore_index=True)
+    pd.testing.assert_frame_equal(pd.concat(iter_dataset(path, chunk_size=2), ignore_index=True), from_csv)
+
+
+@pytest.fixture
+def numbered_csv(tmp_path):
+    """1000 rows whose temperature is the row number."""
+    path = str(tmp_path / 'rows.csv')
+    rows = np.arange(1000)
+    pd.DataFrame({'temperature': rows, 'humidity': 50, 'rainfall': 0, 'aqi': 50,
+                  'disease': np.array(DISEASES)[rows % len(DISEASES)]}).to_csv(path, index=False)
+    return path
+
+
+def test_sample_is_a_subset_of_distinct_rows(numbered_csv):
+    X, codes = load_sample(numbered_csv, max_rows=100, chunk_size=64)
+    rows = X[:, 0].astype(int)
+    assert len(rows) == 100 == len(set(rows.tolist()))
+    assert np.array_equal(codes, rows % len(DISEASES))
+
+    X, _ = load_sample(numbered_csv, max_rows=5000, chunk_size=64)
+    assert sorted(X[:, 0].astype(int).tolist()) == list(range(1000))
+
+
+def test_sample_does_not_depend_on_chunk_size(numbered_csv):
+    first, _ = load_sample(numbered_csv, max_rows=100, chunk_size=64, seed=5)
+    second, _ = load_sample(numbered_csv, max_rows=100, chunk_size=300, seed=5)
+    assert sorted(first[:, 0].tolist()) == sorted(second[:, 0].tolist())
+
+
+def test_every_row_is_equally_likely():
+    n, max_rows, trials = 400, 40, 2000
+    counts = np.zeros(n)
+    for seed in range(trials):
+        chunks = ((np.arange(start, start + 50, dtype=np.float32)[:, None], np.zeros(50, dtype=np.int8))
+                  for start in range(0, n, 50))
+        X, _ = sample_rows(chunks, 1, max_rows, chunk_size=50, seed=seed)
+        counts[X[:, 0].astype(int)] += 1
+    # Each row is kept with probability max_rows / n; compare the first and last chunks too
+    expected = trials * max_rows / n
+    assert np.abs(counts - expected).max() < 5 * np.sqrt(expected)
+    assert abs(counts[:50].mean() - counts[-50:].mean()) < 0.1 * expected
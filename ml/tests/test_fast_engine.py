@@ -0,0 +1,21 @@
+import json
+
+import predict
+from result_cache import ResultCache
+
+
+def test_missing_grid_falls_back_visibly(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(predict, 'result_cache', ResultCache(max_entries=0))
+    monkeypatch.setattr(predict, 'fast_model_path', str(tmp_path / 'fast_model.joblib'))
+    monkeypatch.setattr(predict, '_fast_fallback_warned', set())
+    items = [{'temp': 32, 'humidity': 85, 'rainfall': 120, 'aqi': 90},
+             {'temp': 44, 'humidity': 20, 'rainfall': 0, 'aqi': 350}]
+
+    full = predict.predict_batch(items, engine='full')
+    fast = predict.predict_batch(items, engine='fast')
+    predict.predict_batch(items, engine='fast')
+
+    assert [result.pop('engine') for result in fast] == ['full', 'full']
+    assert fast == full
+    warnings = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+    assert len(warnings) == 1 and 'fell back to the full ensemble' in warnings[0]['warning']
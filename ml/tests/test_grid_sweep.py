@@ -0,0 +1,17 @@
+import numpy as np
+
+from grid_sweep import load_field
+
+
+def test_field_keeps_float64_unless_compact(tmp_path):
+    rng = np.random.default_rng(5)
+    arrays = {name: rng.uniform(0, 100, (3, 2, 4)) + 1e-9 for name in ('temperature', 'humidity', 'rainfall', 'aqi')}
+    npz, npy = str(tmp_path / 'field.npz'), str(tmp_path / 'field.npy')
+    np.savez(npz, **arrays)
+    np.save(npy, np.stack(list(arrays.values()), axis=-1))
+
+    for path in (npz, npy):
+        cube, _ = load_field(path)
+        assert cube.dtype == np.float64
+        assert np.array_equal(cube[..., 0], arrays['temperature'])
+        assert load_field(path, compact=True)[0].dtype == np.float32
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+import hyperparameter_search
+from hyperparameter_search import FoldCache, halving_sizes, successive_halving
+
+
+class Clock(object):
+    """Stands in for the time module: fits advance it instead of sleeping."""
+
+    now = 0.0
+
+    @classmethod
+    def perf_counter(cls):
+        return cls.now
+
+
+class SlowMajority(BaseEstimator, ClassifierMixin):
+    """Takes 1e-4 s per training row; only wrong=0 predicts the majority class."""
+
+    def __init__(self, wrong=0):
+        self.wrong = wrong
+
+    def fit(self, X, y):
+        Clock.now += len(X) * 1e-4
+        self.classes_, counts = np.unique(y, return_counts=True)
+        self.label_ = self.classes_[(np.argmax(counts) + self.wrong) % len(self.classes_)]
+        return self
+
+    def predict(self, X):
+        return np.full(len(X), self.label_)
+
+
+SPACE = {'Slow': {'wrong': [1, 0, 1, 1, 1, 1, 1, 1]}}
+
+
+@pytest.fixture
+def data(monkeypatch):
+    monkeypatch.setattr(hyperparameter_search, 'time', Clock)
+    rng = np.random.default_rng(0)
+    return rng.random((4000, 4)), np.where(rng.random(4000) < 0.7, 'Malaria', 'Dengue')
+
+
+def _search(X, y, budget):
+    started = Clock.now
+    winners, trials = successive_halving({'Slow': SlowMajority()}, X, y, SPACE, budget=budget, eta=2, min_rows=500,
+                                         log=lambda message: None)
+    return winners, trials, Clock.now - started
+
+
+def test_sizes_grow_by_eta_up_to_every_row():
+    assert halving_sizes(4000, min_rows=500, eta=2) == [500, 1000, 2000, 4000]
+    assert halving_sizes(9000, min_rows=1000, eta=3) == [1000, 3000, 9000]
+    assert halving_sizes(100, min_rows=500, eta=3) == [100]
+
+
+def test_fold_subsets_are_nested_and_stratified(data):
+    X, y = data
+    cache = FoldCache(X, y)
+    share = (y[cache.order[:500]] == 'Malaria').mean()
+    assert abs(share - (y == 'Malaria').mean()) < 0.01
+    assert cache.folds(500) is cache.folds(500)
+
+
+def test_search_stops_before_a_round_that_would_overrun_the_budget(data):
+    X, y = data
+    # Every round costs ~0.8s: half the candidates, each on twice the rows
+    winners, trials, seconds = _search(X, y, budget=2.0)
+
+    assert seconds <= 2.0
+    assert sorted({trial['round'] for trial in trials}) == [1, 2]
+    assert winners['Slow']['params'] == {'wrong': 0} and winners['Slow']['rows'] == 1000
+
+
+def test_first_round_always_runs_and_a_large_budget_finishes(data):
+    X, y = data
+    _, trials, _ = _search(X, y, budget=0)
+    assert {trial['round'] for trial in trials} == {1} and len(trials) == 8
+
+    winners, trials, _ = _search(X, y, budget=60)
+    # 8 -> 4 -> 2 -> 1 candidates: the last one is settled and never refitted
+    assert [sum(trial['round'] == r for trial in trials) for r in (1, 2, 3)] == [8, 4, 2]
+    assert winners['Slow']['params'] == {'wrong': 0} and winners['Slow']['rows'] == 2000
@@ -0,0 +1,62 @@
+import json
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import train_model
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(train_model, 'MODEL_DIR', str(tmp_path))
+    monkeypatch.setattr(train_model, 'MANIFEST_PATH', str(tmp_path / 'model_manifest.json'))
+    X, y = train_model.load_training_data(None)
+    forest = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0).fit(X, y)
+    train_model.save_artifact(forest, train_model.artifact_path('RandomForest'))
+    return tmp_path
+
+
+def _same_tree(a, b):
+    return np.array_equal(a.tree_.threshold, b.tree_.threshold) and np.array_equal(a.tree_.value, b.tree_.value)
+
+
+def test_updates_keep_a_sliding_window_of_trees(model_dir):
+    original = joblib.load(train_model.artifact_path('RandomForest'))
+
+    first = train_model.update_models(None, extra_trees=4, max_trees=12)
+    forest = joblib.load(train_model.artifact_path('RandomForest'))
+    assert forest.n_estimators == len(forest.estimators_) == 12
+    # The two oldest trees were retired; the rest are kept as they were, new ones last
+    assert all(_same_tree(a, b) for a, b in zip(forest.estimators_[:8], original.estimators_[2:]))
+    assert first['version'] == 1
+
+    second = train_model.update_models(None, extra_trees=4, max_trees=12)
+    updated = joblib.load(train_model.artifact_path('RandomForest'))
+    assert all(_same_tree(a, b) for a, b in zip(updated.estimators_[:8], forest.estimators_[4:]))
+    assert second['version'] == 2
+
+
+def test_every_update_leaves_a_versioned_artifact(model_dir):
+    for _ in range(2):
+        train_model.update_models(None, extra_trees=4, max_trees=12)
+
+    with open(train_model.MANIFEST_PATH) as f:
+        versions = json.load(f)['versions']
+    assert [(v['version'], v['mode'], v['artifacts']['RandomForest']) for v in versions] == \
+        [(1, 'incremental', 'RandomForest_model.v001.pkl'), (2, 'incremental', 'RandomForest_model.v002.pkl')]
+    first = joblib.load(os.path.join(model_dir, 'RandomForest_model.v001.pkl'))
+    live = joblib.load(train_model.artifact_path('RandomForest'))
+    latest = joblib.load(os.path.join(model_dir, 'RandomForest_model.v002.pkl'))
+    assert all(_same_tree(a, b) for a, b in zip(live.estimators_, latest.estimators_))
+    assert not _same_tree(first.estimators_[-1], latest.estimators_[-1])
+    # No full retrain recorded a primary model, so model.pkl is left alone
+    assert not os.path.exists(os.path.join(model_dir, 'model.pkl'))
+
+
+def test_update_needs_a_trained_forest(tmp_path, monkeypatch):
+    monkeypatch.setattr(train_model, 'MODEL_DIR', str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        train_model.update_models(None)
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+import predict
+from micro_batch import MicroBatcher
+from result_cache import ResultCache
+
+
+class Scorer(object):
+    """Records each batch it scores and answers item -> item * 10."""
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if self.fail_on in items:
+            raise RuntimeError('scoring failed')
+        return [item * 10 for item in items]
+
+
+def test_full_batches_are_scored_at_once_and_the_rest_at_the_deadline():
+    scorer = Scorer()
+
+    async def run():
+        batcher = MicroBatcher(scorer, max_batch=4, max_wait=0.05)
+        futures = [batcher.submit(item) for item in range(10)]
+        # Two full batches went out as soon as they filled up
+        assert scorer.batches == [[0, 1, 2, 3], [4, 5, 6, 7]] and len(batcher) == 2
+        return await asyncio.gather(*futures)
+
+    assert asyncio.run(run()) == [item * 10 for item in range(10)]
+    assert scorer.batches[2] == [8, 9]
+
+
+def test_each_caller_gets_its_own_result():
+    scorer = Scorer()
+
+    async def caller(batcher, item):
+        await asyncio.sleep(0.001 * (item % 3))
+        return item, await batcher.submit(item)
+
+    async def run():
+        batcher = MicroBatcher(scorer, max_batch=8, max_wait=0.005)
+        return await asyncio.gather(*(caller(batcher, item) for item in range(50)))
+
+    assert all(result == item * 10 for item, result in asyncio.run(run()))
+    assert sum(len(batch) for batch in scorer.batches) == 50
+    assert len(scorer.batches) < 50
+
+
+def test_a_failed_batch_only_fails_its_own_callers():
+    scorer = Scorer(fail_on=5)
+
+    async def run():
+        batcher = MicroBatcher(scorer, max_batch=4, max_wait=0.01)
+        return await asyncio.gather(*(batcher.submit(item) for item in range(8)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert results[:4] == [0, 10, 20, 30]
+    assert all(isinstance(result, RuntimeError) for result in results[4:])
+
+
+def test_max_batch_must_be_positive():
+    with pytest.raises(ValueError):
+        MicroBatcher(Scorer(), max_batch=0)
+
+
+def test_queued_requests_get_their_own_predictions(monkeypatch):
+    monkeypatch.setattr(predict, 'result_cache', ResultCache(max_entries=0))
+    requests = [{'id': i, 'temperature': 20 + i, 'humidity': 40 + 5 * i, 'rainfall': 30 * i, 'aqi': 60 + 40 * i,
+                 'risk_level': ('Low', 'High')[i % 2], 'detail': ('full', 'minimal')[i % 3 == 0]}
+                for i in range(9)]
+
+    async def run():
+        batcher = MicroBatcher(predict._score_queued, max_batch=4, max_wait=0.005)
+        return await asyncio.gather(*(batcher.submit((request, 0.0)) for request in requests))
+
+    for request, response in zip(requests, asyncio.run(run())):
+        assert response['id'] == request['id']
+        assert response['result'] == predict.calculate_risk(request['temperature'], request['humidity'],
+                                                            request['rainfall'], request['aqi'],
+                                                            request['risk_level'], detail=request['detail'])
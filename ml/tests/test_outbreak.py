@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+import predict
+from rules import FEATURES, OUTBREAK_THRESHOLDS
+
+
+def reference_scores(forecast, months):
+    """outbreak_scores one location, day and disease at a time, straight from the threshold table."""
+    n_locations, n_days = len(forecast), len(forecast[0])
+    score = np.zeros((n_locations, len(OUTBREAK_THRESHOLDS)))
+    run_days = np.zeros(score.shape, dtype=int)
+    day_scores = np.zeros((n_locations, n_days, len(OUTBREAK_THRESHOLDS)))
+    for l in range(n_locations):
+        for k, threshold in enumerate(OUTBREAK_THRESHOLDS):
+            run = longest = 0
+            for d in range(n_days):
+                temperature, humidity, rainfall, aqi = forecast[l][d]
+                if not np.isfinite(forecast[l][d]).all():
+                    run = 0
+                    continue
+                met = [any(low <= temperature <= high for low, high in threshold.temperature),
+                       humidity >= threshold.humidity,
+                       bool(threshold.rainfall) and rainfall >= threshold.rainfall,
+                       threshold.aqi is not None and aqi >= threshold.aqi]
+                applicable = [True, True, bool(threshold.rainfall), threshold.aqi is not None]
+                day_score = sum(w for w, hit in zip(predict.OUTBREAK_WEIGHTS, met) if hit) * threshold.multiplier
+                if months[d] in threshold.seasonal_peak:
+                    day_score *= predict.SEASONAL_PEAK_MULTIPLIER
+                risks = predict.score_features(np.array([forecast[l][d]]))['risks'][0]
+                probability = risks[predict.DISEASE_INDEX[threshold.disease]] * 100
+                day_scores[l, d, k] = min((1 - predict.OUTBREAK_ENSEMBLE_WEIGHT) * day_score
+                                          + predict.OUTBREAK_ENSEMBLE_WEIGHT * probability, 100)
+                if all(hit or not needed for hit, needed in zip(met, applicable)):
+                    run += 1
+                    longest = max(longest, run)
+                else:
+                    run = 0
+            bonus = min(predict.OUTBREAK_RUN_BONUS * max(longest - 1, 0), predict.OUTBREAK_RUN_BONUS_CAP)
+            score[l, k] = round(min(day_scores[l, :, k].max() + bonus, 100))
+            run_days[l, k] = longest
+    return day_scores, run_days, score
+
+
+@pytest.fixture
+def forecast():
+    rng = np.random.default_rng(5)
+    forecast = rng.uniform([0, 20, 0, 20], [50, 99, 320, 260], size=(4, 12, 4))
+    # A long wet warm spell, the Viral Fever cold and heat bands and their edges
+    forecast[0, 2:10] = [30, 85, 260, 60]
+    forecast[1, :4] = [[20, 50, 0, 40], [35, 40, 0, 40], [19.9, 45, 10, 130], [50, 60, 0, 120]]
+    forecast[1, 4:] = [40, 20, 0, 30]
+    # Missing days break runs and are not scored
+    forecast[2, 5] = np.nan
+    forecast[3, 0, 1] = np.inf
+    return forecast
+
+
+@pytest.mark.parametrize('month', [1, 4, 8, 11])
+def test_vectorized_scores_match_scalar_reference(forecast, month):
+    scores = predict.outbreak_scores(forecast, month)
+    day_scores, run_days, score = reference_scores(forecast.tolist(), [month] * forecast.shape[1])
+
+    np.testing.assert_allclose(scores['day_score'], day_scores, rtol=1e-12)
+    np.testing.assert_array_equal(scores['run_days'], run_days)
+    np.testing.assert_array_equal(scores['score'], score)
+
+
+def test_months_per_day(forecast):
+    months = [5, 6, 7, 8, 9, 10, 11, 12, 1, 2, 3, 4]
+    scores = predict.outbreak_scores(forecast, months)
+    _, run_days, score = reference_scores(forecast.tolist(), months)
+
+    np.testing.assert_array_equal(scores['run_days'], run_days)
+    np.testing.assert_array_equal(scores['score'], score)
+
+
+def test_warnings_are_ranked_with_alert_levels(forecast):
+    scores = predict.outbreak_scores(forecast, 8)
+    warnings = predict.outbreak_warnings(scores, locations=['a', 'b', 'c', 'd'])
+
+    keys = [(-w['risk_score'], -w['run_days']) for w in warnings]
+    assert keys == sorted(keys)
+    assert len(warnings) == int((scores['score'] >= predict.ALERT_LEVELS[-1][1]).sum())
+    for warning in warnings:
+        level = next(level for level, minimum in predict.ALERT_LEVELS if warning['risk_score'] >= minimum)
+        assert warning['alert_level'] == level
+        assert set(warning['triggers']) <= set(FEATURES)
+
+    spell = next(w for w in warnings if w['location'] == 'a' and w['disease'] == 'Cholera')
+    assert spell['run_days'] >= 8 and spell['run_start'] == 2
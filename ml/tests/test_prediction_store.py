@@ -0,0 +1,25 @@
+import sqlite3
+
+import pytest
+
+from prediction_store import PredictionStore, SQLiteStore
+
+
+def test_store_without_insert_fails_on_creation():
+    class Incomplete(PredictionStore):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_sqlite_store_writes_partial_chunk_on_close(tmp_path):
+    path = str(tmp_path / 'predictions.db')
+    items = [{'temp': 30, 'humidity': 80, 'rainfall': 40, 'aqi': 90, 'location': 'Pune'}] * 5
+    results = [{'disease': 'Dengue', 'accuracy': 41.2}] * 5
+    with SQLiteStore(path, chunk_rows=2, user_id=7) as store:
+        store.add(items, results)
+        assert store.written == 4
+    assert store.written == 5
+    rows = sqlite3.connect(path).execute('SELECT user_id, location, predicted_disease FROM predictions').fetchall()
+    assert rows == [(7, 'Pune', 'Dengue')] * 5
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+import predict
+from model_registry import ModelRegistry
+from result_cache import ResultCache, cache_from_env
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', 'v1', {'disease': 'Malaria'})
+    cache.put('b', 'v1', {'disease': 'Dengue'})
+    assert cache.get('a', 'v1') == {'disease': 'Malaria'}
+
+    cache.put('c', 'v1', {'disease': 'Cholera'})
+
+    assert cache.get('b', 'v1') is None
+    assert cache.get('a', 'v1') == {'disease': 'Malaria'}
+    assert cache.get('c', 'v1') == {'disease': 'Cholera'}
+    assert cache.evictions == 1
+
+
+def test_error_results_are_not_cached():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', 'v1', {'error': 'boom'})
+    assert len(cache) == 0
+
+
+def test_model_change_invalidates_entries(tmp_path):
+    artifact = tmp_path / 'model.pkl'
+    artifact.write_bytes(b'first model')
+    registry = ModelRegistry(check_interval=0, loader=lambda path: open(path, 'rb').read())
+    cache = ResultCache(max_entries=8)
+
+    version = registry.fingerprint([str(artifact)])
+    cache.put('a', version, {'disease': 'Malaria'})
+    assert cache.get('a', registry.fingerprint([str(artifact)])) == {'disease': 'Malaria'}
+
+    artifact.write_bytes(b'retrained model')
+    new_version = registry.fingerprint([str(artifact)])
+
+    assert new_version != version
+    assert cache.get('a', new_version) is None
+    assert len(cache) == 0
+
+
+def test_fingerprint_does_not_load_models(tmp_path):
+    artifact = tmp_path / 'model.pkl'
+    artifact.write_bytes(b'first model')
+    registry = ModelRegistry(check_interval=0, loader=lambda path: open(path, 'rb').read())
+
+    version = registry.fingerprint([str(artifact), str(tmp_path / 'missing.pkl')])
+    assert registry.loads == 0 and len(registry) == 0
+
+    # Loading the model does not change its fingerprint
+    registry.get(str(artifact))
+    assert registry.fingerprint([str(artifact), str(tmp_path / 'missing.pkl')]) == version
+    assert registry.loads == 1
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    key = ((32.5, 85.0, 120.25, 90.0), 'Low', 'full', 'full')
+    result = {'disease': 'Dengue', 'accuracy': 41.27, 'disease_risks': {'Dengue': 41.3, 'Malaria': 30.1}}
+    ResultCache(max_entries=8, path=path).put(key, 'v1', result)
+
+    restarted = ResultCache(max_entries=8, path=path)
+    assert restarted.get(key, 'v1') == result
+    assert restarted.disk_hits == 1
+    # A hit from disk is promoted to memory
+    assert restarted.get(key, 'v1') == result
+    assert restarted.hits == 1
+    assert restarted.get(key, 'v2') is None
+
+
+def test_default_cache_keeps_exact_inputs(monkeypatch):
+    for name in ('PREDICT_CACHE_SIZE', 'PREDICT_CACHE_PRECISION', 'PREDICT_CACHE_PATH'):
+        monkeypatch.delenv(name, raising=False)
+    cache = cache_from_env()
+    assert cache.enabled
+    assert cache.quantize([32.123, 85.77]) == [32.123, 85.77]
+
+
+@pytest.fixture
+def random_inputs():
+    rng = np.random.default_rng(7)
+    lows, highs = [5, 10, 0, 10], [48, 99, 450, 450]
+    return rng.uniform(lows, highs, size=(40, 4)).tolist()
+
+
+def test_cached_results_match_uncached(monkeypatch, random_inputs):
+    for name in ('PREDICT_CACHE_SIZE', 'PREDICT_CACHE_PRECISION', 'PREDICT_CACHE_PATH'):
+        monkeypatch.delenv(name, raising=False)
+    items = [{'temp': t, 'humidity': h, 'rainfall': r, 'aqi': a} for t, h, r, a in random_inputs]
+
+    monkeypatch.setattr(predict, 'result_cache', ResultCache(max_entries=0))
+    uncached_batch = predict.predict_batch(items, detail='full')
+    uncached_single = [predict.calculate_risk(*row) for row in random_inputs[:5]]
+
+    monkeypatch.setattr(predict, 'result_cache', cache_from_env())
+    # Twice: the first pass fills the cache, the second is answered from it
+    for _ in range(2):
+        assert predict.predict_batch(items, detail='full') == uncached_batch
+        assert [predict.calculate_risk(*row) for row in random_inputs[:5]] == uncached_single
+    assert predict.result_cache.hits > 0
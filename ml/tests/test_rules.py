@@ -0,0 +1,56 @@
+import operator
+
+import numpy as np
+import pytest
+
+from rules import (CONTRIBUTION_RULES, DISEASE_RULES, DISEASES, FEATURE_CONTRIBUTIONS, FEATURES, PREDICTION_RULES,
+                   TRAINING_RULES, RuleTable)
+
+OPERATORS = {'>': operator.gt, '<': operator.lt, '>=': operator.ge, '<=': operator.le}
+
+
+def _holds(row, conditions):
+    values = dict(zip(FEATURES, row), temperature_deviation=abs(row[0] - 25))
+    return all(OPERATORS[op](values[feature], threshold) for feature, op, threshold in conditions)
+
+
+def _reference(rows, field):
+    """The rule table evaluated one ``if`` at a time, in table order."""
+    scores = np.zeros((len(rows), len(DISEASES)))
+    for r, row in enumerate(rows):
+        for rule in DISEASE_RULES:
+            weight = getattr(rule, field)
+            if weight is not None and _holds(row, rule.when):
+                scores[r, DISEASES.index(rule.disease)] += weight
+    return scores
+
+
+@pytest.fixture
+def rows():
+    rng = np.random.default_rng(4)
+    random = rng.uniform([0, 0, 0, 0], [50, 100, 450, 450], size=(300, 4))
+    # Every threshold exactly, so strict comparisons are exercised at the boundary
+    thresholds = np.array([[25, 60, 100, 100], [30, 80, 150, 150], [35, 70, 300, 300], [18, 30, 50, 200],
+                           [38, 75, 200, 300], [42, 80, 250, 100], [15, 81, 301, 301]], dtype=float)
+    return np.vstack([random, thresholds])
+
+
+@pytest.mark.parametrize('table, field', [(PREDICTION_RULES, 'weight'), (TRAINING_RULES, 'train_weight')])
+def test_rule_table_matches_one_rule_at_a_time(rows, table, field):
+    assert np.array_equal(table(rows), _reference(rows.tolist(), field))
+
+
+def test_contributions_match_feature_thresholds(rows):
+    expected = np.zeros((len(rows), len(FEATURES)))
+    for r, row in enumerate(rows.tolist()):
+        for feature, op, threshold, weight in FEATURE_CONTRIBUTIONS:
+            if _holds(row, ((feature, op, threshold),)):
+                expected[r, FEATURES.index(feature)] += weight
+    assert np.array_equal(CONTRIBUTION_RULES(rows), expected)
+
+
+def test_unknown_features_and_comparators_are_rejected():
+    with pytest.raises(ValueError):
+        RuleTable([('Malaria', 0.2, (('pressure', '>', 1000),))], DISEASES)
+    with pytest.raises(ValueError):
+        RuleTable([('Malaria', 0.2, (('temperature', '!=', 30),))], DISEASES)
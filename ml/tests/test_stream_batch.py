@@ -0,0 +1,71 @@
+import io
+import json
+
+import predict
+
+
+def _stream(lines, **kwargs):
+    out = io.StringIO()
+    written = predict.stream_batch(io.StringIO(''.join(line + '\n' for line in lines)), out, **kwargs)
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert written == len(results)
+    return results
+
+
+def test_missing_field_gets_a_per_line_error():
+    lines = ['{"temp": 30, "humidity": 80, "rainfall": 40, "aqi": 90}',
+             '{"temp": 30, "humidity": 80, "aqi": 90}',
+             '{"temp": 44, "humidity": 20, "rainfall": 0, "aqi": 350}']
+    results = _stream(lines, detail='minimal')
+
+    assert len(results) == 3
+    assert 'disease' in results[0] and 'disease' in results[2]
+    assert results[1]['error'] == "'rainfall'"
+
+
+def _line(day, temp=30.0):
+    return json.dumps({'temp': temp, 'humidity': 70, 'rainfall': 20 * day, 'aqi': 90, 'date': f'2024-06-{day:02d}'})
+
+
+def test_results_keep_input_order_across_chunks():
+    lines = [_line(day, temp=15 + day) for day in range(1, 26)]
+    lines[3] = '{"temp": 30, "humidity": 70,'
+    lines[10] = '[1, 2, 3]'
+    lines[17] = json.dumps({'temp': 'n/a', 'humidity': 70, 'rainfall': 0, 'aqi': 90, 'date': '2024-06-18'})
+    lines.insert(5, '')
+    results = _stream(lines, chunk_size=4, detail='minimal')
+
+    assert len(results) == 25
+    errors = [pos for pos, result in enumerate(results) if 'error' in result]
+    assert errors == [3, 10, 17]
+    assert 'JSON object per line' in results[10]['error']
+    valid = [json.loads(line) for pos, line in enumerate(l for l in lines if l) if pos not in errors]
+    expected = predict.predict_batch(valid, detail='minimal')
+    assert [result for result in results if 'error' not in result] == expected
+    assert [result['date'] for pos, result in enumerate(results) if pos != 3 and pos != 10] == \
+        [f'2024-06-{day:02d}' for day in range(1, 26) if day not in (4, 11)]
+
+
+def test_each_chunk_is_written_before_the_next_is_read():
+    out = io.StringIO()
+    written_when_read = []
+
+    def lines():
+        for day in range(1, 11):
+            written_when_read.append(len(out.getvalue().splitlines()))
+            yield _line(day) + '\n'
+
+    assert predict.stream_batch(lines(), out, chunk_size=3, detail='minimal') == 10
+    assert written_when_read == [0, 0, 0, 3, 3, 3, 6, 6, 6, 9]
+
+
+def test_only_scored_rows_are_persisted(tmp_path):
+    import sqlite3
+    from prediction_store import SQLiteStore
+
+    path = str(tmp_path / 'predictions.db')
+    lines = [_line(1), 'not json', _line(2), '{"temp": 30}', _line(3)]
+    with SQLiteStore(path, chunk_rows=2) as store:
+        results = _stream(lines, chunk_size=2, detail='minimal', store=store)
+    rows = sqlite3.connect(path).execute('SELECT rainfall, predicted_disease FROM predictions').fetchall()
+    assert rows == [(20.0 * day, results[pos]['disease']) for day, pos in ((1, 0), (2, 2), (3, 4))]
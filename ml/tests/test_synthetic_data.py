@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from rules import DISEASES, FEATURES, TRAINING_RULES
+from train_model import (DISEASE_LABELS, FEATURE_RANGES, NO_DISEASE, create_probabilistic_data, generate_chunk,
+                         synthetic_arrays)
+
+
+def test_same_seed_same_data():
+    first = create_probabilistic_data(3000, chunk_size=1000, seed=7)
+    pd.testing.assert_frame_equal(first, create_probabilistic_data(3000, chunk_size=1000, seed=7))
+    assert not first.equals(create_probabilistic_data(3000, chunk_size=1000, seed=8))
+
+
+def test_chunks_regenerate_on_their_own():
+    data = create_probabilistic_data(2500, chunk_size=1000, seed=3)
+    X, codes = generate_chunk(2, 500, seed=3)
+    assert np.array_equal(data[list(FEATURES)].to_numpy()[2000:], X)
+    assert np.array_equal(data['disease'].to_numpy()[2000:], DISEASE_LABELS[codes])
+
+    X32, codes32 = synthetic_arrays(2500, chunk_size=1000, seed=3)
+    assert np.array_equal(X32, data[list(FEATURES)].to_numpy().astype(np.float32))
+    assert np.array_equal(DISEASE_LABELS[codes32], data['disease'].to_numpy())
+
+
+def test_features_stay_in_their_ranges():
+    data = create_probabilistic_data(5000, seed=1)
+    for feature, (low, high) in FEATURE_RANGES.items():
+        assert data[feature].between(low, high).all()
+
+
+def test_class_balance_follows_the_rule_priors():
+    n = 200000
+    X, codes = synthetic_arrays(n, chunk_size=50000, seed=11)
+    probs = TRAINING_RULES(X.astype(np.float64))
+    probs[:, NO_DISEASE] = np.maximum(probs[:, NO_DISEASE], 0.05)
+    probs = np.maximum(probs, 0)
+    expected = (probs / probs.sum(axis=1, keepdims=True)).mean(axis=0)
+
+    shares = np.bincount(codes, minlength=len(DISEASES)) / n
+    # Each share is a mean of n Bernoulli draws: well within 5 standard errors
+    assert np.all(np.abs(shares - expected) < 5 * np.sqrt(expected * (1 - expected) / n))
+    assert np.all(shares > 0)
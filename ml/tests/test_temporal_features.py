@@ -0,0 +1,172 @@
+import json
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from temporal_features import (DEGREE_DAY_BASE, TEMPORAL_FEATURES, TEMPORAL_LAGS, TEMPORAL_WINDOWS, TemporalState,
+                               day_number)
+
+
+@pytest.fixture(scope='module')
+def observations():
+    """Two interleaved locations over ~5 months, with skipped days and a gap longer than the history."""
+    rng = np.random.default_rng(11)
+    rows = []
+    for location in ('Pune', 'Patna'):
+        day = date(2024, 1, 1)
+        for _ in range(120):
+            rows.append((location, day, rng.uniform(10, 45), rng.uniform(20, 98), rng.uniform(0, 300)))
+            day += timedelta(days=int(rng.choice([1, 1, 1, 2, 4])))
+        day += timedelta(days=45)
+        for _ in range(20):
+            rows.append((location, day, rng.uniform(10, 45), rng.uniform(20, 98), rng.uniform(0, 300)))
+            day += timedelta(days=1)
+    rows.sort(key=lambda row: row[1])
+    return pd.DataFrame(rows, columns=['location', 'date', 'temperature', 'humidity', 'rainfall'])
+
+
+def _pandas_features(df):
+    """TEMPORAL_FEATURES recomputed from scratch with pandas rolling windows over a daily calendar."""
+    expected = {}
+    for location, group in df.groupby('location'):
+        daily = group.set_index(pd.to_datetime(group['date']))[['temperature', 'humidity', 'rainfall']]
+        daily = daily.asfreq('D')
+        heat = (daily['temperature'] - DEGREE_DAY_BASE).clip(lower=0)
+        columns = {}
+        for w in TEMPORAL_WINDOWS:
+            columns[f'rainfall_sum_{w}d'] = daily['rainfall'].rolling(w, min_periods=1).sum()
+        for w in TEMPORAL_WINDOWS:
+            columns[f'humidity_mean_{w}d'] = daily['humidity'].rolling(w, min_periods=1).mean()
+        for w in TEMPORAL_WINDOWS:
+            columns[f'degree_days_{w}d'] = heat.rolling(w, min_periods=1).sum()
+        for feature in ('rainfall', 'humidity'):
+            for lag in TEMPORAL_LAGS:
+                # Unknown lags repeat the day's own value
+                columns[f'{feature}_lag_{lag}d'] = daily[feature].shift(lag).fillna(daily[feature])
+        frame = pd.DataFrame(columns)[list(TEMPORAL_FEATURES)]
+        observed = daily['rainfall'].notna()
+        for day, values in frame[observed].iterrows():
+            expected[(location, day.date())] = values.to_numpy()
+    return expected
+
+
+def test_incremental_windows_match_pandas_rolling(observations):
+    state = TemporalState()
+    expected = _pandas_features(observations)
+    for row in observations.itertuples(index=False):
+        features = state.update(row.location, row.date, row.temperature, row.humidity, row.rainfall)
+        assert np.allclose(features, expected[(row.location, row.date)], rtol=0, atol=1e-9)
+
+
+def test_backfilled_day_matches_recomputed_windows(observations):
+    state = TemporalState()
+    for row in observations.itertuples(index=False):
+        state.update(row.location, row.date, row.temperature, row.humidity, row.rainfall)
+
+    # Replace a recent reading of one location; its windows end at that day
+    last = observations[observations['location'] == 'Pune'].iloc[-3]
+    features = state.update('Pune', last['date'], 30.0, 90.0, 250.0)
+    corrected = observations.copy()
+    corrected.loc[last.name, ['temperature', 'humidity', 'rainfall']] = [30.0, 90.0, 250.0]
+    assert np.allclose(features, _pandas_features(corrected)[('Pune', last['date'])], rtol=0, atol=1e-9)
+
+
+def test_days_older_than_history_get_no_features():
+    state = TemporalState()
+    state.update('Pune', '2024-03-01', 30, 80, 100)
+    assert state.update('Pune', '2024-01-15', 30, 80, 100) is None
+    rows = state.update_many(['Pune'], [day_number('2024-01-15')], [[30, 80, 100, 50]])
+    assert np.isnan(rows).all()
+
+
+def test_save_load_round_trip(tmp_path, observations):
+    path = str(tmp_path / 'temporal_state.json')
+    head, tail = observations.iloc[:150], observations.iloc[150:]
+    state = TemporalState()
+    for row in head.itertuples(index=False):
+        state.update(row.location, row.date, row.temperature, row.humidity, row.rainfall)
+    state.save(path)
+
+    restored = TemporalState.load(path)
+    assert len(restored) == len(state)
+    assert restored.to_dict() == state.to_dict()
+    for row in tail.itertuples(index=False):
+        args = (row.location, row.date, row.temperature, row.humidity, row.rainfall)
+        assert np.allclose(restored.update(*args), state.update(*args), rtol=0, atol=1e-9)
+
+
+def test_load_missing_file_is_empty(tmp_path):
+    assert len(TemporalState.load(str(tmp_path / 'missing.json'))) == 0
+
+
+def test_load_rejects_other_history_length(tmp_path):
+    path = tmp_path / 'temporal_state.json'
+    path.write_text('{"history_days": 7, "locations": {}}')
+    with pytest.raises(ValueError):
+        TemporalState.load(str(path))
+
+
+def test_forecast_days_do_not_enter_the_state(monkeypatch):
+    import predict
+    from result_cache import ResultCache
+
+    state = TemporalState()
+    monkeypatch.setattr(predict, 'temporal_state', state)
+    monkeypatch.setattr(predict, 'result_cache', ResultCache(max_entries=0))
+    reading = {'location': 'Pune', 'date': '2024-06-01', 'temp': 30, 'humidity': 80, 'rainfall': 40, 'aqi': 90}
+    predict.predict_batch([reading])
+    saved = json.dumps(state.to_dict())
+
+    forecast = [{'location': 'Pune', 'date': f'2024-06-0{d}', 'temp': 31, 'humidity': 85, 'rainfall': 100, 'aqi': 90,
+                 'observed': False} for d in range(2, 9)]
+    results = predict.predict_batch(forecast)
+
+    assert json.dumps(state.to_dict()) == saved
+    # Forecast days still build on each other within the batch
+    sums = [result['temporal_features']['rainfall_sum_7d'] for result in results]
+    assert sums == [140.0, 240.0, 340.0, 440.0, 540.0, 640.0, 700.0]
+    # The next real reading follows the last observed day, not the forecast
+    assert state.update('Pune', '2024-06-02', 30, 80, 10)[0] == 50.0
+
+
+def _dated_items():
+    return [{'location': 'Pune', 'date': f'2024-06-0{d}', 'temp': 30 + d, 'humidity': 80, 'rainfall': 10 * d,
+             'aqi': 90} for d in range(1, 6)]
+
+
+def test_broken_temporal_model_only_drops_its_member(monkeypatch, tmp_path):
+    import predict
+    from result_cache import ResultCache
+
+    broken = tmp_path / 'Temporal_model.pkl'
+    broken.write_bytes(b'not a model')
+    monkeypatch.setattr(predict, 'temporal_model_path', str(broken))
+    monkeypatch.setattr(predict, 'result_cache', ResultCache(max_entries=0))
+    monkeypatch.setattr(predict, 'temporal_state', TemporalState())
+    items = _dated_items()
+
+    results = predict.predict_batch(items)
+    undated = predict.predict_batch([{key: item[key] for key in ('temp', 'humidity', 'rainfall', 'aqi')}
+                                     for item in items])
+    for result, plain in zip(results, undated):
+        assert 'error' not in result
+        assert 'Temporal Forest' not in result['ensemble']
+        assert result.pop('temporal_features')
+        assert {**result, 'date': ''} == plain
+
+
+def test_dated_items_use_the_cache_without_a_temporal_model(monkeypatch, tmp_path):
+    import predict
+    from result_cache import ResultCache
+
+    monkeypatch.setattr(predict, 'temporal_model_path', str(tmp_path / 'Temporal_model.pkl'))
+    monkeypatch.setattr(predict, 'result_cache', ResultCache(max_entries=64))
+    monkeypatch.setattr(predict, 'temporal_state', TemporalState())
+
+    first = predict.predict_batch(_dated_items())
+    second = predict.predict_batch(_dated_items())
+    assert predict.result_cache.hits == len(second)
+    assert [result['disease'] for result in first] == [result['disease'] for result in second]
+    assert all('temporal_features' in result for result in second)
@@ -0,0 +1,82 @@
+from itertools import combinations
+from math import factorial
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import predict
+from tree_shap import ForestShap
+
+
+@pytest.fixture(scope='module')
+def forest():
+    rng = np.random.default_rng(3)
+    X = rng.uniform([10, 15, 0, 10], [50, 98, 500, 450], size=(400, 4))
+    y = np.where(X[:, 0] > 35, 'Heat Stroke', np.where(X[:, 2] > 200, 'Cholera', 'Dengue'))
+    flip = rng.random(len(y)) < 0.2
+    y[flip] = rng.choice(['Heat Stroke', 'Cholera', 'Dengue'], size=flip.sum())
+    return RandomForestClassifier(n_estimators=4, max_depth=4, random_state=0).fit(X, y), X
+
+
+def _conditional_expectation(tree, x, subset, node=0):
+    """Path-dependent E[f(x) | x_S]: follow x on features in S, average the rest by cover."""
+    t = tree.tree_
+    if t.children_left[node] == -1:
+        value = t.value[node][0]
+        return value / value.sum()
+    left, right = t.children_left[node], t.children_right[node]
+    if t.feature[node] in subset:
+        goes_left = np.float32(x[t.feature[node]]) <= t.threshold[node]
+        return _conditional_expectation(tree, x, subset, left if goes_left else right)
+    cover = t.weighted_n_node_samples
+    return (cover[left] * _conditional_expectation(tree, x, subset, left)
+            + cover[right] * _conditional_expectation(tree, x, subset, right)) / cover[node]
+
+
+def _brute_force_shap(model, x):
+    n = len(x)
+    value = {}
+    for size in range(n + 1):
+        for subset in combinations(range(n), size):
+            value[subset] = np.mean([_conditional_expectation(tree, x, set(subset)) for tree in model.estimators_],
+                                    axis=0)
+    phi = np.zeros((n, model.n_classes_))
+    for i in range(n):
+        others = [j for j in range(n) if j != i]
+        for size in range(n):
+            weight = factorial(size) * factorial(n - size - 1) / factorial(n)
+            for subset in combinations(others, size):
+                phi[i] += weight * (value[tuple(sorted(subset + (i,)))] - value[subset])
+    return phi
+
+
+def test_matches_brute_force_shapley(forest):
+    model, X = forest
+    explainer = ForestShap(model)
+    rows = X[:12]
+    phi = explainer.shap_values(rows)
+    for r, x in enumerate(rows):
+        assert np.allclose(phi[r], _brute_force_shap(model, x), atol=1e-6)
+
+
+def test_values_sum_to_prediction_minus_expected_value(forest):
+    model, X = forest
+    explainer = ForestShap(model)
+    phi = explainer.shap_values(X)
+    assert np.allclose(explainer.expected_value + phi.sum(axis=1), model.predict_proba(X), atol=1e-6)
+
+
+def test_rf_shap_waterfall_adds_up(forest, tmp_path, monkeypatch):
+    model, X = forest
+    path = str(tmp_path / 'RandomForest_model.pkl')
+    joblib.dump(model, path)
+    monkeypatch.setattr(predict, 'rf_model_path', path)
+
+    proba = model.predict_proba(X[:50])
+    best = proba.argmax(axis=1)
+    prediction = np.array([predict.DISEASE_INDEX[disease] for disease in model.classes_[best]])
+    base, contributions = predict._rf_shap(X[:50], prediction)
+
+    assert np.allclose(base + contributions.sum(axis=1), proba[np.arange(50), best] * 100, atol=1e-4)
@@ -1,173 +1,318 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.svm import SVC
 from sklearn.metrics import accuracy_score, classification_report
 from sklearn.preprocessing import StandardScaler
+from sklearn.base import clone
+from joblib import Parallel, delayed
 import joblib
+import argparse
+import json
 import os
+import time
+from datetime import datetime
+
+from rules import DISEASES, FEATURES, TRAINING_RULES
+from data_loader import load_sample, DEFAULT_MAX_ROWS
+from temporal_features import TEMPORAL_FEATURES, load_temporal_sample
+from serving_artifacts import export_serving_artifact
+from distill import FAST_MODEL_PATH, DEFAULT_RESOLUTION, build_fast_model
+from hyperparameter_search import (DEFAULT_BUDGET_SECONDS, DEFAULT_ETA, HYPERPARAMETERS_PATH, SEARCH_FOLDS,
+                                   load_hyperparameters, save_hyperparameters, successive_halving)
+from instrumentation import PROFILE_MODES, Metrics, megabytes, peak_rss_bytes, profiling
 
 # Feature: Temperature, Humidity, Rainfall, AQI
 # Target: Disease (Malaria, Dengue, Typhoid, Asthma, Viral Fever, Cholera, Heat Stroke, No Disease)
 
-def create_probabilistic_data(n_samples=5000):
-    np.random.seed(42)
-    data = []
-
-    for _ in range(n_samples):
-        temp = np.random.uniform(10, 50)
-        humidity = np.random.uniform(15, 98)
-        rainfall = np.random.uniform(0, 500)
-        aqi = np.random.uniform(10, 450)
-
-        probs = {
-            'No Disease': 1.2,
-            'Malaria': 0.0,
-            'Dengue': 0.0,
-            'Typhoid': 0.0,
-            'Asthma': 0.0,
-            'Viral Fever': 0.0,
-            'Cholera': 0.0,
-            'Heat Stroke': 0.0
-        }
-
-        # ===== MALARIA: High temp + High humidity + Rain =====
-        if temp > 25 and humidity > 60:
-            probs['Malaria'] += 0.2
-        if temp > 30 and humidity > 80:
-            probs['Malaria'] += 0.4
-            probs['No Disease'] -= 0.3
-        if rainfall > 100 and temp > 25:
-            probs['Malaria'] += 0.25
-        if temp > 28 and humidity > 70 and rainfall > 50:
-            probs['Malaria'] += 0.3
-
-        # ===== DENGUE: Moderate-high temp + Humid + Some rain (breeding) =====
-        if 25 < temp < 35 and humidity > 60:
-            probs['Dengue'] += 0.25
-        if rainfall > 50 and rainfall < 300 and humidity > 70:
-            probs['Dengue'] += 0.3
-        if temp > 28 and humidity > 75:
-            probs['Dengue'] += 0.2
-            probs['No Disease'] -= 0.2
-
-        # ===== TYPHOID: Heavy rain + Contamination risk =====
-        if rainfall > 150:
-            probs['Typhoid'] += 0.3
-        if rainfall > 250 and humidity > 70:
-            probs['Typhoid'] += 0.35
-            probs['No Disease'] -= 0.2
-        if temp > 25 and rainfall > 100:
-            probs['Typhoid'] += 0.15
-
-        # ===== CHOLERA: Very heavy rain + Warm =====
-        if rainfall > 200 and temp > 25:
-            probs['Cholera'] += 0.35
-        if rainfall > 300:
-            probs['Cholera'] += 0.3
-            probs['No Disease'] -= 0.3
-        if humidity > 80 and rainfall > 150:
-            probs['Cholera'] += 0.2
-
-        # ===== ASTHMA: Poor AQI =====
-        if aqi > 100:
-            probs['Asthma'] += 0.2
-        if aqi > 150:
-            probs['Asthma'] += 0.35
-            probs['No Disease'] -= 0.25
-        if aqi > 200:
-            probs['Asthma'] += 0.3
-        if aqi > 300:
-            probs['Asthma'] += 0.25
-            probs['No Disease'] -= 0.2
-
-        # ===== VIRAL FEVER: Extreme temps =====
-        if temp > 35:
-            probs['Viral Fever'] += 0.25
-        if temp < 18:
-            probs['Viral Fever'] += 0.3
-            probs['No Disease'] -= 0.2
-        if abs(temp - 25) > 12:
-            probs['Viral Fever'] += 0.2
-
-        # ===== HEAT STROKE: Very high temp, low humidity =====
-        if temp > 38:
-            probs['Heat Stroke'] += 0.4
-            probs['No Disease'] -= 0.3
-        if temp > 42:
-            probs['Heat Stroke'] += 0.4
-        if temp > 35 and humidity < 30:
-            probs['Heat Stroke'] += 0.25
-
-        # Clamp no disease
-        probs['No Disease'] = max(probs['No Disease'], 0.05)
-
-        # Normalize
-        total_prob = sum(max(0, p) for p in probs.values())
-        normalized_probs = [max(0, p) / total_prob for p in probs.values()]
-        diseases = list(probs.keys())
-
-        choice = np.random.choice(diseases, p=normalized_probs)
-        data.append([temp, humidity, rainfall, aqi, choice])
-
-    return pd.DataFrame(data, columns=['temperature', 'humidity', 'rainfall', 'aqi', 'disease'])
-
-def train_models():
-    print("=" * 60)
-    print("CLIMATE DISEASE PREDICTOR - MODEL TRAINING")
-    print("=" * 60)
+NO_DISEASE = DISEASES.index('No Disease')
+# Label code -> disease name (compact mode keeps labels as int8 codes)
+DISEASE_LABELS = np.array(DISEASES, dtype=object)
 
-    print("\n[1/4] Generating training data (5000 samples)...")
-    df = create_probabilistic_data(5000)
+MODEL_DIR = os.path.dirname(__file__)
+MANIFEST_PATH = os.path.join(MODEL_DIR, 'model_manifest.json')
 
-    print("\nDataset distribution:")
-    print(df['disease'].value_counts())
-    print(f"\nTotal samples: {len(df)}")
+# Incremental updates: trees grown per update, and the forest size cap after
+# which the oldest trees are retired (a sliding window over past data)
+INCREMENTAL_TREES = 20
+MAX_FOREST_TREES = 400
+
+# Uniform sampling range of each feature in the synthetic data
+FEATURE_RANGES = {
+    'temperature': (10, 50),
+    'humidity': (15, 98),
+    'rainfall': (0, 500),
+    'aqi': (10, 450)
+}
+DEFAULT_CHUNK_SIZE = 100000
+
+# Stopping margins compared by --cascade-report (0 stops after the cheapest
+# member, 1 always runs every member)
+CASCADE_REPORT_MARGINS = (0.0, 0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 1.0)
+CASCADE_REPORT_PATH = os.path.join(MODEL_DIR, 'cascade_report.json')
+
+# Stage timings and counters of this run (train_model.py --metrics-file)
+metrics = Metrics('climate_train')
+metrics.collect('peak_rss_bytes', 'Peak resident memory of the training process.', 'gauge', peak_rss_bytes)
+
+def generate_chunk(index, n_rows, seed=42):
+    """Draw one chunk of synthetic samples: (n_rows, 4) features and label codes.
+
+    Chunk ``index`` gets its own child of SeedSequence(seed), so any chunk can
+    be regenerated on its own (e.g. in a worker process) with identical output.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+    lows = [FEATURE_RANGES[f][0] for f in FEATURES]
+    highs = [FEATURE_RANGES[f][1] for f in FEATURES]
+    X = rng.uniform(lows, highs, size=(n_rows, len(FEATURES)))
+
+    # Class priors from the shared rule table (rules.py)
+    probs = TRAINING_RULES(X)
+
+    # Clamp no disease
+    probs[:, NO_DISEASE] = np.maximum(probs[:, NO_DISEASE], 0.05)
+
+    # Normalize
+    probs = np.maximum(probs, 0)
+    probs /= probs.sum(axis=1, keepdims=True)
+
+    # One categorical draw for all rows (inverse CDF)
+    cdf = np.cumsum(probs, axis=1)
+    u = rng.random(n_rows)
+    labels = np.minimum((u[:, None] >= cdf).sum(axis=1), len(DISEASES) - 1)
+    return X, labels
+
+def iter_probabilistic_data(n_samples=5000, chunk_size=DEFAULT_CHUNK_SIZE, seed=42):
+    """Stream the synthetic dataset as DataFrames of at most chunk_size rows."""
+    for index, start in enumerate(range(0, n_samples, chunk_size)):
+        X, codes = generate_chunk(index, min(chunk_size, n_samples - start), seed)
+        df = pd.DataFrame(X, columns=list(FEATURES))
+        df['disease'] = DISEASE_LABELS[codes]
+        yield df
+
+def create_probabilistic_data(n_samples=5000, chunk_size=DEFAULT_CHUNK_SIZE, seed=42):
+    """Synthetic climate/disease dataset; output depends only on (n_samples, chunk_size, seed)."""
+    return pd.concat(iter_probabilistic_data(n_samples, chunk_size, seed), ignore_index=True)
+
+def synthetic_arrays(n_samples=5000, chunk_size=DEFAULT_CHUNK_SIZE, seed=42):
+    """The synthetic dataset as (X float32 (n, 4), label codes int8) without a DataFrame.
+
+    Each chunk is written straight into buffers allocated once for all rows.
+    Rows are the create_probabilistic_data rows rounded to float32.
+    """
+    X = np.empty((n_samples, len(FEATURES)), dtype=np.float32)
+    codes = np.empty(n_samples, dtype=np.int8)
+    for index, start in enumerate(range(0, n_samples, chunk_size)):
+        stop = min(start + chunk_size, n_samples)
+        X[start:stop], codes[start:stop] = generate_chunk(index, stop - start, seed)
+    return X, codes
+
+def artifact_path(name):
+    return os.path.join(MODEL_DIR, f'{name}_model.pkl')
+
+def save_artifact(model, path):
+    """Write a model atomically so running prediction servers never read a partial file."""
+    tmp_path = f'{path}.tmp'
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
+def export_serving(paths=None):
+    """Write memory-mappable serving copies of the saved models."""
+    if paths is None:
+        paths = [artifact_path(name) for name in build_models()]
+        paths += [os.path.join(MODEL_DIR, 'model.pkl'), artifact_path('Temporal')]
+    for path in paths:
+        if os.path.exists(path):
+            target = export_serving_artifact(path)
+            print(f"  Serving artifact: {target} ({os.path.getsize(target) / 1e6:.1f} MB)")
+
+def distill_fast_model(resolution=DEFAULT_RESOLUTION):
+    """Rebuild the distilled fast-path grid from the saved models and print its fidelity."""
+    print("\nDistilling fast-path model...")
+    started = time.perf_counter()
+    with metrics.stage('distill'):
+        grid = build_fast_model(resolution)
+    fidelity = grid.fidelity
+    print(f"  Saved: {FAST_MODEL_PATH} ({os.path.getsize(FAST_MODEL_PATH) / 1e6:.1f} MB, "
+          f"{time.perf_counter() - started:.1f}s)")
+    print(f"  Fidelity on {fidelity['samples']} random inputs: "
+          f"{fidelity['disease_agreement'] * 100:.2f}% same disease, "
+          f"risk score MAE {fidelity['risk_score_mae']}, probability MAE {fidelity['probability_mae']}")
+    print(f"  Fast path: {fidelity['microseconds_per_row']} µs/row")
+    return fidelity
 
-    X = df[['temperature', 'humidity', 'rainfall', 'aqi']]
-    y = df['disease']
+def load_manifest():
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    return {'versions': []}
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+def record_version(entry):
+    """Append a training run to model_manifest.json and return its version number."""
+    manifest = load_manifest()
+    entry = dict(entry, version=len(manifest['versions']) + 1,
+                 created=datetime.now().isoformat(timespec='seconds'))
+    manifest['versions'].append(entry)
+    tmp_path = f'{MANIFEST_PATH}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+    return entry['version']
 
-    print(f"\nTraining set: {len(X_train)}, Test set: {len(X_test)}")
+def build_models(tuned=True):
+    """Fresh, unfitted ensemble members keyed by artifact name.
 
+    With tuned=True the winners of the last --tune search
+    (hyperparameters.json) replace the defaults.
+    """
     models = {
         'RandomForest': RandomForestClassifier(n_estimators=200, max_depth=15, min_samples_split=5, random_state=42),
-        'LogisticRegression': LogisticRegression(max_iter=2000, multi_class='multinomial', C=1.0),
+        'LogisticRegression': LogisticRegression(max_iter=2000, C=1.0),
         'SVM': SVC(probability=True, kernel='rbf', C=10.0, gamma='scale')
     }
+    if tuned:
+        for name, params in load_hyperparameters().items():
+            if name in models:
+                models[name].set_params(**params)
+    return models
 
-    results = {}
+def default_workers():
+    """Worker budget for training: TRAIN_WORKERS if set, else every core."""
+    return int(os.environ.get('TRAIN_WORKERS', 0)) or os.cpu_count() or 1
 
-    print("\n[2/4] Training models...")
+def _labels(y):
+    """Disease names for ``y``, which holds either names or int8 label codes."""
+    return DISEASE_LABELS[y] if y.dtype.kind in 'iu' else y
+
+def _fit_and_score(name, split, estimator, X, y, train_idx, test_idx, keep_model):
+    """Fit a clone of ``estimator`` on one split and score it (runs in a worker process).
+
+    Label codes are expanded to names only for the split being fitted, so
+    models always carry disease names in classes_.
+    """
+    start = time.perf_counter()
+    model = clone(estimator).fit(X[train_idx], _labels(y[train_idx]))
+    y_pred = model.predict(X[test_idx])
+    return {
+        'name': name,
+        'split': split,
+        'accuracy': accuracy_score(_labels(y[test_idx]), y_pred),
+        'model': model if keep_model else None,
+        'y_pred': y_pred if keep_model else None,
+        'seconds': time.perf_counter() - start,
+        'peak_rss': peak_rss_bytes()
+    }
+
+def load_training_data(dataset=None, max_rows=DEFAULT_MAX_ROWS, chunk_size=DEFAULT_CHUNK_SIZE, compact=False):
+    """(X, y) from an uploaded dataset, or the synthetic generator when none is given.
+
+    compact=True returns float32 features and int8 label codes (see
+    DISEASE_LABELS); otherwise y holds disease names.
+    """
+    if dataset is None:
+        print("\n[1/4] Generating training data (5000 samples)...")
+        if compact:
+            return synthetic_arrays(5000)
+        df = create_probabilistic_data(5000)
+        return df[list(FEATURES)].to_numpy(), df['disease'].to_numpy()
+
+    print(f"\n[1/4] Loading training data from {dataset} (sampling at most {max_rows} rows)...")
+    stats = {}
+    X, codes = load_sample(dataset, max_rows=max_rows, chunk_size=chunk_size, stats=stats)
+    print(f"  Rows read: {stats['rows_read']}, dropped (invalid): {stats['rows_dropped']}, used: {len(X)}")
+    return X, codes if compact else DISEASE_LABELS[codes]
+
+def train_models(dataset=None, n_workers=None, cv_folds=5, max_rows=DEFAULT_MAX_ROWS, compact=False):
+    """Fit, cross-validate and save every ensemble member.
+
+    compact=True trains on float32 features with int8 label codes, which
+    the pool shares with its workers instead of pickling per task.
+    """
+    n_workers = n_workers or default_workers()
+    timings = {}
+    started = time.perf_counter()
+
+    print("=" * 60)
+    print("CLIMATE DISEASE PREDICTOR - MODEL TRAINING")
+    print("=" * 60)
+
+    stage_start = time.perf_counter()
+    X, y = load_training_data(dataset, max_rows, compact=compact)
+
+    print("\nDataset distribution:")
+    print(pd.Series(_labels(y), name='disease').value_counts())
+    print(f"\nTotal samples: {len(y)}")
+
+    train_idx, test_idx = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42, stratify=y)
+    folds = list(StratifiedKFold(n_splits=cv_folds).split(X, y))
+    timings['data'] = time.perf_counter() - stage_start
+
+    print(f"\nTraining set: {len(train_idx)}, Test set: {len(test_idx)}")
+
+    models = build_models()
+    tuned = load_hyperparameters()
+    if tuned:
+        print(f"  Using tuned hyperparameters from {HYPERPARAMETERS_PATH}")
+
+    # Every holdout fit and CV fold of every model is an independent task, so
+    # all of them share one process pool instead of running back to back.
+    # Fold models are scored inside the worker; only the holdout models (the
+    # ones we save) are sent back to this process.
+    stage_start = time.perf_counter()
+    print(f"\n[2/4] Training models ({n_workers} workers)...")
+    tasks = []
     for name, model in models.items():
-        print(f"\n  Training {name}...")
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
-        acc = accuracy_score(y_test, y_pred)
-        results[name] = acc
-
-        # Cross-validation
-        cv_scores = cross_val_score(model, X, y, cv=5, scoring='accuracy')
-        print(f"  {name} Test Accuracy: {acc:.4f}")
+        tasks.append(delayed(_fit_and_score)(name, 'holdout', model, X, y, train_idx, test_idx, True))
+        for fold, (fold_train, fold_test) in enumerate(folds):
+            tasks.append(delayed(_fit_and_score)(name, fold, model, X, y, fold_train, fold_test, False))
+    outputs = Parallel(n_jobs=n_workers)(tasks)
+    timings['fit'] = time.perf_counter() - stage_start
+
+    fitted, holdout_pred, results, fit_seconds = {}, {}, {}, {}
+    for name in models:
+        runs = [o for o in outputs if o['name'] == name]
+        holdout = next(o for o in runs if o['split'] == 'holdout')
+        cv_scores = np.array([o['accuracy'] for o in runs if o['split'] != 'holdout'])
+        fitted[name] = holdout['model']
+        holdout_pred[name] = holdout['y_pred']
+        results[name] = holdout['accuracy']
+        fit_seconds[name] = sum(o['seconds'] for o in runs)
+
+        print(f"\n  {name} Test Accuracy: {results[name]:.4f}")
         print(f"  {name} CV Accuracy:   {cv_scores.mean():.4f} (+/- {cv_scores.std():.4f})")
+        print(f"  {name} Fit time:      {fit_seconds[name]:.2f}s across {len(runs)} fits")
 
-        # Save model
-        model_filename = os.path.join(os.path.dirname(__file__), f'{name}_model.pkl')
-        joblib.dump(model, model_filename)
+    # Save models
+    stage_start = time.perf_counter()
+    for name, model in fitted.items():
+        model_filename = artifact_path(name)
+        save_artifact(model, model_filename)
         print(f"  Saved: {model_filename}")
 
     # Save best model as main model.pkl
     best_model_name = max(results, key=results.get)
-    best_model_path = os.path.join(os.path.dirname(__file__), 'model.pkl')
-    joblib.dump(models[best_model_name], best_model_path)
+    best_model_path = os.path.join(MODEL_DIR, 'model.pkl')
+    save_artifact(fitted[best_model_name], best_model_path)
+    export_serving()
+    timings['save'] = time.perf_counter() - stage_start
+    for stage, seconds in timings.items():
+        metrics.observe(stage, seconds)
+    for name, seconds in fit_seconds.items():
+        metrics.observe(f'fit.{name}', seconds)
+    metrics.inc('rows_trained', len(y))
+    metrics.inc('models_fitted', len(outputs))
+    # Parallel runs tasks in this process when n_workers is 1
+    peak_memory = {'main': peak_rss_bytes(), 'worker': max(o['peak_rss'] for o in outputs)}
+    record_version({'mode': 'full', 'dataset': dataset, 'rows': int(len(y)), 'best_model': best_model_name,
+                    'seconds': round(time.perf_counter() - started, 3), 'compact': compact, 'tuned': bool(tuned),
+                    'peak_rss_mb': {proc: megabytes(peak) for proc, peak in peak_memory.items()},
+                    'accuracy': {name: round(acc, 4) for name, acc in results.items()}})
 
     print("\n[3/4] Classification Report (Best Model):")
     print(f"Best Model: {best_model_name} ({results[best_model_name]:.4f})")
-    y_pred_best = models[best_model_name].predict(X_test)
-    print(classification_report(y_test, y_pred_best))
+    print(classification_report(_labels(y[test_idx]), holdout_pred[best_model_name]))
 
     print("\n[4/4] Summary:")
     print("-" * 40)
@@ -175,8 +320,309 @@ def train_models():
         bar = "█" * int(acc * 30)
         print(f"  {name:25s} {acc:.4f} {bar}")
     print("-" * 40)
+    print("  Stage wall time:")
+    for stage, seconds in timings.items():
+        print(f"  {stage:25s} {seconds:.2f}s")
+    print(f"  Peak memory ({'compact' if compact else 'float64'} mode):")
+    for proc, peak in peak_memory.items():
+        print(f"  {proc:25s} {megabytes(peak)} MB")
+    print("-" * 40)
     print(f"\n✅ Best model ({best_model_name}) saved as model.pkl")
     print("All models saved successfully!")
+    return {'accuracy': results, 'best_model': best_model_name, 'timings': timings, 'fit_seconds': fit_seconds,
+            'peak_rss_bytes': peak_memory}
+
+def tune_hyperparameters(dataset=None, n_workers=None, budget=DEFAULT_BUDGET_SECONDS, eta=DEFAULT_ETA,
+                         max_rows=DEFAULT_MAX_ROWS, compact=False):
+    """Successive-halving search over each member's hyperparameters (hyperparameter_search.py).
+
+    Searches the training split of a full retrain (the held-out rows stay
+    unseen) and writes the winners, with every candidate's accuracy and fit
+    time, to hyperparameters.json; build_models() uses them from then on.
+    """
+    n_workers = n_workers or default_workers()
+    started = time.perf_counter()
+    print("=" * 60)
+    print("CLIMATE DISEASE PREDICTOR - HYPERPARAMETER SEARCH")
+    print("=" * 60)
+
+    X, y = load_training_data(dataset, max_rows, compact=compact)
+    train_idx, _ = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42, stratify=y)
+    X, y = X[train_idx], y[train_idx]
+
+    print(f"\nSearching {len(y)} training rows ({n_workers} workers, {eta}x halving, budget {budget:.0f}s)...")
+    with metrics.stage('tune'):
+        winners, trials = successive_halving(build_models(tuned=False), X, y, budget=budget, eta=eta,
+                                             n_workers=n_workers)
+    seconds = time.perf_counter() - started
+    metrics.inc('tuning_fits', len(trials) * SEARCH_FOLDS)
+
+    defaults = {name: {key: model.get_params()[key] for key in winners[name]['params']}
+                for name, model in build_models(tuned=False).items()}
+    save_hyperparameters({'created': datetime.now().isoformat(timespec='seconds'), 'dataset': dataset,
+                          'rows': int(len(y)), 'budget_seconds': budget, 'seconds': round(seconds, 3), 'eta': eta,
+                          'folds': SEARCH_FOLDS, 'defaults': defaults, 'winners': winners, 'trials': trials})
+
+    print("\nWinners (mean CV accuracy, mean fit time, rows):")
+    print("-" * 40)
+    for name, result in winners.items():
+        params = ', '.join(f'{key}={value}' for key, value in result['params'].items())
+        print(f"  {name:20s} {result['accuracy']:.4f} {result['fit_seconds']:7.2f}s {result['rows']:>8}  {params}")
+    print("-" * 40)
+    print(f"  {len(trials)} candidate evaluations in {seconds:.1f}s")
+    print(f"  Saved: {HYPERPARAMETERS_PATH}")
+    return winners
+
+def train_temporal_model(dataset, max_rows=DEFAULT_MAX_ROWS, chunk_size=None):
+    """Fit the temporal forest: the RandomForest on same-day plus lagged and rolling features.
+
+    The dataset needs location and date columns (temporal_features.py). A
+    forest on the same-day features alone is fitted on the same split for
+    comparison; only the temporal one is saved, as Temporal_model.pkl.
+    """
+    started = time.perf_counter()
+    print("=" * 60)
+    print("CLIMATE DISEASE PREDICTOR - TEMPORAL MODEL")
+    print("=" * 60)
+
+    print(f"\n[1/3] Computing temporal features from {dataset} (sampling at most {max_rows} rows)...")
+    stats = {}
+    X, codes = load_temporal_sample(dataset, max_rows=max_rows, chunk_size=chunk_size, stats=stats)
+    print(f"  Rows read: {stats['rows_read']}, dropped: {stats['rows_dropped']}, used: {len(X)} "
+          f"from {stats['locations']} locations")
+    y = DISEASE_LABELS[codes]
+    train_idx, test_idx = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42, stratify=y)
+
+    print(f"\n[2/3] Fitting forests with {len(FEATURES)} and {X.shape[1]} features...")
+    forest = build_models()['RandomForest']
+    same_day = clone(forest).fit(X[train_idx, :len(FEATURES)], y[train_idx])
+    baseline = accuracy_score(y[test_idx], same_day.predict(X[test_idx, :len(FEATURES)]))
+    model = clone(forest).fit(X[train_idx], y[train_idx])
+    accuracy = accuracy_score(y[test_idx], model.predict(X[test_idx]))
+    print(f"  Same-day features: {baseline:.4f}")
+    print(f"  + temporal:        {accuracy:.4f}")
+    top = sorted(zip(FEATURES + TEMPORAL_FEATURES, model.feature_importances_), key=lambda x: x[1], reverse=True)
+    print("  Top features: " + ", ".join(f"{name} {importance:.3f}" for name, importance in top[:5]))
+
+    print("\n[3/3] Saving artifacts...")
+    path = artifact_path('Temporal')
+    save_artifact(model, path)
+    print(f"  Saved: {path}")
+    export_serving([path])
+
+    seconds = time.perf_counter() - started
+    metrics.observe('temporal', seconds)
+    metrics.inc('rows_trained', len(train_idx))
+    metrics.inc('models_fitted', 2)
+    record_version({'mode': 'temporal', 'dataset': dataset, 'rows': int(len(y)), 'seconds': round(seconds, 3),
+                    'accuracy': {'Temporal': round(accuracy, 4), 'RandomForest (same day)': round(baseline, 4)}})
+    return {'accuracy': accuracy, 'baseline_accuracy': baseline, 'seconds': seconds}
+
+def update_models(dataset, extra_trees=INCREMENTAL_TREES, max_trees=MAX_FOREST_TREES, max_rows=DEFAULT_MAX_ROWS,
+                  compact=False):
+    """Fold a new batch of observations into the saved ensemble without a full retrain.
+
+    The RandomForest grows ``extra_trees`` trees fitted on the new batch only,
+    with the same hyperparameters, and retires its oldest trees beyond
+    ``max_trees``. The RBF SVM and LogisticRegression have no cheap incremental
+    update and are carried over unchanged until the next full retrain.
+    """
+    started = time.perf_counter()
+    print("=" * 60)
+    print("CLIMATE DISEASE PREDICTOR - INCREMENTAL UPDATE")
+    print("=" * 60)
+
+    rf_path = artifact_path('RandomForest')
+    if not os.path.exists(rf_path):
+        raise FileNotFoundError(f"{rf_path} not found - run a full retrain before incremental updates")
+    rf = joblib.load(rf_path)
+
+    X, y = load_training_data(dataset, max_rows, compact=compact)
+    fit_idx, eval_idx = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42)
+    version = len(load_manifest()['versions']) + 1
+
+    print(f"\n[2/4] Growing {extra_trees} trees on {len(fit_idx)} new rows...")
+    new_trees = clone(rf).set_params(n_estimators=extra_trees, warm_start=False, random_state=version)
+    new_trees.fit(X[fit_idx], _labels(y[fit_idx]))
+    if list(new_trees.classes_) != list(rf.classes_):
+        missing = sorted(set(rf.classes_) - set(new_trees.classes_))
+        print(f"  Skipped: new batch has no samples of {', '.join(missing)}; the forest needs every class.")
+        return None
+
+    y_eval = _labels(y[eval_idx])
+    before = accuracy_score(y_eval, rf.predict(X[eval_idx]))
+    rf.estimators_ = (rf.estimators_ + new_trees.estimators_)[-max_trees:]
+    rf.n_estimators = len(rf.estimators_)
+    after = accuracy_score(y_eval, rf.predict(X[eval_idx]))
+    print(f"  Accuracy on held-out new rows: {before:.4f} -> {after:.4f} ({rf.n_estimators} trees)")
+
+    # Keep a versioned copy next to the live artifact, then promote it
+    print("\n[3/4] Saving artifacts...")
+    versioned_name = f'RandomForest_model.v{version:03d}.pkl'
+    save_artifact(rf, os.path.join(MODEL_DIR, versioned_name))
+    save_artifact(rf, rf_path)
+    print(f"  Saved: {versioned_name} (promoted to {rf_path})")
+
+    manifest = load_manifest()
+    full_runs = [v for v in manifest['versions'] if v['mode'] == 'full']
+    if full_runs and full_runs[-1].get('best_model') == 'RandomForest':
+        save_artifact(rf, os.path.join(MODEL_DIR, 'model.pkl'))
+        print("  RandomForest is the primary model; model.pkl updated as well")
+    export_serving([rf_path, os.path.join(MODEL_DIR, 'model.pkl')])
+
+    seconds = time.perf_counter() - started
+    metrics.observe('incremental', seconds)
+    metrics.inc('rows_trained', len(fit_idx))
+    metrics.inc('models_fitted')
+    record_version({'mode': 'incremental', 'dataset': dataset, 'rows': int(len(y)), 'seconds': round(seconds, 3),
+                    'compact': compact, 'peak_rss_mb': megabytes(peak_rss_bytes()), 'trees': rf.n_estimators,
+                    'artifacts': {'RandomForest': versioned_name},
+                    'accuracy': {'RandomForest': round(after, 4)}})
+
+    print("\n[4/4] Summary:")
+    print("-" * 40)
+    print(f"  Incremental update: {seconds:.2f}s")
+    print(f"  Peak memory ({'compact' if compact else 'float64'} mode): {megabytes(peak_rss_bytes())} MB")
+    if full_runs:
+        full_seconds = full_runs[-1]['seconds']
+        print(f"  Last full retrain:  {full_seconds:.2f}s ({full_seconds / max(seconds, 1e-9):.1f}x slower)")
+    print("-" * 40)
+    return {'version': version, 'seconds': seconds, 'accuracy_before': before, 'accuracy_after': after}
+
+def cascade_report(dataset=None, max_rows=DEFAULT_MAX_ROWS, margins=CASCADE_REPORT_MARGINS):
+    """Accuracy versus models evaluated for predict.py's cascade engine at each stopping margin.
+
+    Scores the held-out split of a full retrain (same data and split) with
+    the saved models, and writes the table to cascade_report.json.
+    """
+    import predict
+
+    print("=" * 60)
+    print("CLIMATE DISEASE PREDICTOR - CASCADE REPORT")
+    print("=" * 60)
+    X, y = load_training_data(dataset, max_rows)
+    _, test_idx = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42, stratify=y)
+    X_test, y_test = X[test_idx], _labels(y[test_idx])
+    members = predict.cascade_members()
+    if not members:
+        raise FileNotFoundError("No saved models to evaluate - run a full retrain first")
+    print(f"\nScoring {len(test_idx)} held-out rows with members: "
+          f"{', '.join(' = '.join(copies) for _, _, copies in members)}")
+    # Copies of an artifact are evaluated once; count each distinct model once
+    distinct = [name for name, _, _ in members]
+
+    start = time.perf_counter()
+    full = predict.score_features(X_test, engine='full')
+    full_seconds = time.perf_counter() - start
+    full_pred = DISEASE_LABELS[full['prediction']]
+    rows = [{'margin': None, 'accuracy': round(float((full_pred == y_test).mean()), 4), 'agreement': 1.0,
+             'mean_models': float(len(members)), 'seconds': round(full_seconds, 3)}]
+
+    for margin in margins:
+        start = time.perf_counter()
+        scores = predict.score_features(X_test, engine='cascade', margin=margin)
+        seconds = time.perf_counter() - start
+        pred = DISEASE_LABELS[scores['prediction']]
+        correct = pred == y_test
+        evaluated = scores['used'][:, [name in distinct for name, _, _ in scores['members']]].sum(axis=1)
+        rows.append({
+            'margin': margin,
+            'accuracy': round(float(correct.mean()), 4),
+            'agreement': round(float((pred == full_pred).mean()), 4),
+            'mean_models': round(float(evaluated.mean()), 3),
+            'seconds': round(seconds, 3),
+            # Rows that stopped after k models, and how accurate those rows were
+            'by_models': {int(k): {'rows': int((evaluated == k).sum()),
+                                   'accuracy': round(float(correct[evaluated == k].mean()), 4)}
+                          for k in np.unique(evaluated)}
+        })
+
+    print("-" * 60)
+    print(f"  {'margin':>8s} {'accuracy':>9s} {'vs full':>8s} {'models':>7s} {'time':>8s}")
+    for row in rows:
+        label = 'full' if row['margin'] is None else f"{row['margin']:g}"
+        print(f"  {label:>8s} {row['accuracy']:9.4f} {row['agreement']:8.2%} {row['mean_models']:7.2f} "
+              f"{row['seconds']:7.3f}s")
+    print("-" * 60)
+
+    report = {'created_at': datetime.now().isoformat(timespec='seconds'), 'dataset': dataset,
+              'rows': int(len(test_idx)), 'members': [[name, len(copies)] for name, _, copies in members],
+              'results': rows}
+    tmp_path = f'{CASCADE_REPORT_PATH}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, CASCADE_REPORT_PATH)
+    print(f"  Saved: {CASCADE_REPORT_PATH}")
+    return report
 
 if __name__ == '__main__':
-    train_models()
+    parser = argparse.ArgumentParser(description='Train the climate disease ensemble.')
+    parser.add_argument('dataset', nargs='?',
+                        help='CSV/Parquet file with temperature, humidity, rainfall, aqi, disease '
+                             '(default: synthetic data)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='process pool size (default: TRAIN_WORKERS or all cores)')
+    parser.add_argument('--max-rows', type=int, default=DEFAULT_MAX_ROWS,
+                        help='maximum rows sampled from the dataset for training')
+    parser.add_argument('--incremental', action='store_true',
+                        help='fold the dataset into the saved models instead of retraining from scratch')
+    parser.add_argument('--extra-trees', type=int, default=INCREMENTAL_TREES,
+                        help='trees added to the RandomForest per incremental update')
+    parser.add_argument('--max-trees', type=int, default=MAX_FOREST_TREES,
+                        help='RandomForest size cap; the oldest trees are dropped beyond it')
+    parser.add_argument('--export-serving', action='store_true',
+                        help='only (re)write the memory-mappable serving copies of the saved models')
+    parser.add_argument('--distill', action='store_true',
+                        help='also build the distilled fast-path model (predict.py --fast) from the saved models')
+    parser.add_argument('--grid-resolution', type=int, default=DEFAULT_RESOLUTION,
+                        help='points per feature in the distilled lookup grid')
+    parser.add_argument('--tune', action='store_true',
+                        help='search each model\'s hyperparameters (successive halving) before retraining')
+    parser.add_argument('--tune-budget', type=float, default=DEFAULT_BUDGET_SECONDS,
+                        help='wall-clock budget of the search in seconds')
+    parser.add_argument('--tune-eta', type=int, default=DEFAULT_ETA,
+                        help='halving factor: 1/eta of the candidates survive each round on eta times the rows')
+    parser.add_argument('--temporal', action='store_true',
+                        help='also fit the temporal forest on lagged/rolling features (dataset needs location and '
+                             'date columns)')
+    parser.add_argument('--cascade-report', action='store_true',
+                        help="only report the cascade engine's accuracy versus models evaluated on the held-out split")
+    parser.add_argument('--cascade-margins', type=float, nargs='+', default=CASCADE_REPORT_MARGINS,
+                        help='stopping margins compared by --cascade-report')
+    parser.add_argument('--compact', action='store_true',
+                        help='train on float32 features and int8 label codes (less memory per worker)')
+    parser.add_argument('--metrics-file', help='write stage timings and counters here in Prometheus text format')
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                        help='profile the run with cProfile or tracemalloc and print the report')
+    args = parser.parse_args()
+    if args.incremental and not args.dataset:
+        parser.error('--incremental needs a dataset with the new observations')
+    if args.tune and (args.incremental or args.export_serving or args.cascade_report):
+        parser.error('--tune runs before a full retrain')
+    if args.temporal and not args.dataset:
+        parser.error('--temporal needs a dataset with location and date columns')
+
+    try:
+        with profiling(args.profile), metrics.stage('total'):
+            if args.export_serving:
+                with metrics.stage('export'):
+                    export_serving()
+            elif args.cascade_report:
+                cascade_report(args.dataset, args.max_rows, args.cascade_margins)
+            elif args.incremental:
+                update_models(args.dataset, extra_trees=args.extra_trees, max_trees=args.max_trees,
+                              max_rows=args.max_rows, compact=args.compact)
+            else:
+                if args.tune:
+                    tune_hyperparameters(args.dataset, n_workers=args.workers, budget=args.tune_budget,
+                                         eta=args.tune_eta, max_rows=args.max_rows, compact=args.compact)
+                train_models(args.dataset, n_workers=args.workers, max_rows=args.max_rows, compact=args.compact)
+            if args.temporal:
+                train_temporal_model(args.dataset, args.max_rows)
+
+            # An existing fast-path grid no longer matches the retrained models; rebuild it
+            if args.distill or (os.path.exists(FAST_MODEL_PATH) and not (args.export_serving or args.cascade_report)):
+                distill_fast_model(args.grid_resolution)
+    finally:
+        if args.metrics_file:
+            metrics.write(args.metrics_file)
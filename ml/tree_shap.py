@@ -0,0 +1,125 @@
+from itertools import combinations
+from math import factorial
+
+import numpy as np
+
+from serving_artifacts import FlatForest
+
+# ==================== TREESHAP ====================
+# Exact path-dependent TreeSHAP for the RandomForest member, vectorized over
+# rows. Every root-to-leaf path is folded, once per model load, into a
+# per-feature interval and cover fraction, and each leaf's Shapley values are
+# tabulated for all 2**n_features "row falls inside the interval" patterns
+# (the Fast TreeSHAP v2 precomputation). Explaining a row is then one
+# interval test and table gather per leaf, plus a matrix product with the
+# leaf values. Intervals are stored as ranges of threshold bins, so the
+# per-leaf test is a single unsigned integer comparison per feature.
+
+# Rows x leaves evaluated per pass, bounding the working arrays
+SHAP_CHUNK_CELLS = 4000000
+
+
+class ForestShap(object):
+    """Per-row SHAP values of a forest's predict_proba.
+
+    shap_values(X) is (N, n_features, n_classes); for every row,
+    expected_value + shap_values.sum(axis=1) equals predict_proba(X).
+    """
+
+    def __init__(self, forest):
+        if not isinstance(forest, FlatForest):
+            forest = FlatForest(forest)
+        if getattr(forest, 'cover', None) is None:
+            raise ValueError("Serving artifact predates TreeSHAP support; re-export it with "
+                             "train_model.py --export-serving")
+
+        n_features = forest.n_features_in_
+        n_nodes = len(forest.left)
+        nodes = np.arange(n_nodes)
+        is_leaf = forest.left == nodes
+
+        # Walk all trees top-down at once, narrowing each node's interval on
+        # its split feature and multiplying in the cover fraction of the branch.
+        lows = np.full((n_nodes, n_features), -np.inf)
+        highs = np.full((n_nodes, n_features), np.inf)
+        fractions = np.ones((n_nodes, n_features))
+        frontier = forest.roots[~is_leaf[forest.roots]]
+        while len(frontier):
+            f = forest.feature[frontier]
+            for child, bound in ((forest.left[frontier], highs), (forest.right[frontier], lows)):
+                lows[child], highs[child], fractions[child] = lows[frontier], highs[frontier], fractions[frontier]
+                bound[child, f] = forest.threshold[frontier]
+                fractions[child, f] *= forest.cover[child] / forest.cover[frontier]
+            children = np.concatenate([forest.left[frontier], forest.right[frontier]])
+            frontier = children[~is_leaf[children]]
+
+        leaves = nodes[is_leaf]
+        self._set_bins(lows[leaves], highs[leaves])
+        self.values = np.ascontiguousarray(forest.values[leaves] / forest.n_estimators, dtype=np.float32)
+        self.table = self._shapley_table(fractions[leaves]).reshape(-1, n_features)
+        self.offsets = np.arange(len(leaves), dtype=np.int64) << n_features
+        self.expected_value = (np.prod(fractions[leaves], axis=1)[:, np.newaxis] * self.values).sum(axis=0)
+        self.classes_ = forest.classes_
+        self.n_features_in_ = n_features
+
+    def _set_bins(self, lows, highs):
+        """Encode each leaf's (low, high] interval as a range of threshold bins.
+
+        A value's bin is the number of thresholds below it, so it lies in
+        (low, high] exactly when its bin is in [start, start + width).
+        """
+        self.cuts, self.starts, self.widths = [], [], []
+        for j in range(lows.shape[1]):
+            cuts = np.unique(np.concatenate([lows[:, j], highs[:, j]]))
+            cuts = cuts[np.isfinite(cuts)]
+            start = np.where(np.isfinite(lows[:, j]), np.searchsorted(cuts, lows[:, j]) + 1, 0)
+            stop = np.where(np.isfinite(highs[:, j]), np.searchsorted(cuts, highs[:, j]) + 1, len(cuts) + 1)
+            self.cuts.append(cuts)
+            self.starts.append(start.astype(np.uint32))
+            self.widths.append((stop - start).astype(np.uint32))
+
+    def _patterns(self, X):
+        """(rows, leaves) bitmask of the features whose leaf interval contains the row."""
+        pattern = np.zeros((len(X), len(self.values)), dtype=np.int64)
+        for j, cuts in enumerate(self.cuts):
+            bins = np.searchsorted(cuts, X[:, j]).astype(np.uint32)[:, np.newaxis]
+            # Unsigned wrap-around turns start <= bin < start + width into one test
+            pattern |= ((bins - self.starts[j]) < self.widths[j]).astype(np.int64) << j
+        return pattern
+
+    @staticmethod
+    def _shapley_table(fractions):
+        """(leaves, 2**F, F) Shapley weights of each feature for every inside-pattern.
+
+        A leaf's game is v(S) = prod_{j in S} a_j * prod_{j not in S} c_j, with
+        a_j = 1 if the row is inside the leaf's interval on feature j and c_j
+        the cover fraction of the path's splits on j. For such a product game
+        phi_i = (a_i - c_i) * sum_S |S|!(F-|S|-1)!/F! * prod_S a_j * prod_rest c_j.
+        """
+        n_leaves, n_features = fractions.shape
+        weights = [factorial(s) * factorial(n_features - s - 1) / factorial(n_features)
+                   for s in range(n_features)]
+        table = np.zeros((n_leaves, 1 << n_features, n_features), dtype=np.float32)
+        for pattern in range(1 << n_features):
+            inside = np.array([(pattern >> j) & 1 for j in range(n_features)], dtype=np.float64)
+            for i in range(n_features):
+                others = [j for j in range(n_features) if j != i]
+                total = np.zeros(n_leaves)
+                for size in range(n_features):
+                    for subset in combinations(others, size):
+                        rest = [j for j in others if j not in subset]
+                        total += weights[size] * np.prod(inside[list(subset)]) * np.prod(fractions[:, rest], axis=1)
+                table[:, pattern, i] = (inside[i] - fractions[:, i]) * total
+        return table
+
+    def shap_values(self, X):
+        # Trees compare features as float32, like sklearn
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n, n_features = X.shape
+        out = np.empty((n, n_features, self.values.shape[1]))
+        chunk = max(1, SHAP_CHUNK_CELLS // len(self.values))
+        for start in range(0, n, chunk):
+            rows = X[start:start + chunk]
+            coef = np.take(self.table, self.offsets + self._patterns(rows), axis=0)  # (rows, leaves, F)
+            out[start:start + chunk] = np.matmul(coef.transpose(0, 2, 1), self.values)
+        return out